@@ -0,0 +1,73 @@
+"""
+Measures /chat/ throughput as the number of concurrent clients grows.
+
+Lex is replaced by a stub that sleeps for --lex-ms, so the numbers show how
+well the async endpoint overlaps slow Lex calls rather than Lex itself.
+Requires httpx.
+
+Usage:
+    python benchmarks/bench_async_chat.py [--lex-ms 50] [--clients 1 8 32 64]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(1, os.path.join(BACKEND_DIR, "lambda_api"))
+os.environ.setdefault("LEX_BOT_ID", "BENCHBOT")
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-1")
+# Every simulated client shares one address, and stdout transcripts would bury the results
+os.environ.setdefault("ADMISSION_RATE", "0")
+os.environ.setdefault("TRANSCRIPT_SINK", "off")
+
+import httpx  # noqa: E402
+
+import lambda_function  # noqa: E402
+
+
+class SleepingLex:
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def recognize_text(self, **kwargs):
+        time.sleep(self.seconds)
+        return {
+            "sessionState": {"dialogAction": {"type": "ElicitSlot"}},
+            "messages": [{"contentType": "PlainText", "content": "What is your current mood?"}],
+        }
+
+
+async def run(clients, requests_per_client):
+    transport = httpx.ASGITransport(app=lambda_function.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in range(requests_per_client):
+                response = await client.post("/chat/", json={"message": "Recommend a song"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        return clients * requests_per_client / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lex-ms", type=float, default=50.0)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=10, help="requests per client")
+    args = parser.parse_args()
+
+    lambda_function.lex_client = SleepingLex(args.lex_ms / 1000)
+    print(f"Lex stub latency {args.lex_ms:.0f} ms, "
+          f"runner concurrency {lambda_function.lex_runner.max_concurrency}")
+    print(f"{'clients':>8} {'req/s':>8}")
+    for clients in args.clients:
+        throughput = asyncio.run(run(clients, args.requests))
+        print(f"{clients:>8} {throughput:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares cold-start cost of the JSON-lines and binary (mmap) catalogs.
+
+Each format is loaded in a fresh interpreter, the way a Lambda cold start
+would, and the script reports load time plus resident memory after loading
+and after the first query.
+
+Usage:
+    python benchmarks/bench_catalog_load.py [--size 200000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from recommender import Catalog  # noqa: E402
+from recommender.catalog_file import write_catalog  # noqa: E402
+
+# Runs in the child interpreter: prints load seconds and RSS in bytes
+PROBE = """
+import json, os, sys, time
+sys.path.insert(0, {backend!r})
+import numpy
+from recommender import Recommender, load_catalog
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+before = rss()
+start = time.perf_counter()
+recommender = Recommender(load_catalog({path!r}))
+loaded = time.perf_counter() - start
+after_load = rss()
+start = time.perf_counter()
+recommender.recommend("happy", "rock", k=5)
+first_query = time.perf_counter() - start
+print(json.dumps({{"load": loaded, "first_query": first_query,
+                   "rss_load": after_load - before, "rss_query": rss() - before}}))
+"""
+
+
+def write_jsonl(catalog, path):
+    moods, genres = catalog.moods, catalog.genres
+    with open(path, "w", encoding="utf-8") as f:
+        for row in range(len(catalog)):
+            features = catalog.features[row]
+            f.write(json.dumps({
+                "id": int(catalog.track_ids[row]),
+                "title": catalog.titles[row],
+                "artist": catalog.artists[row],
+                "moods": [m for i, m in enumerate(moods) if features[i]],
+                "genres": [g for i, g in enumerate(genres) if features[len(moods) + i]],
+                "popularity": float(features[-1]),
+            }) + "\n")
+
+
+def probe(path):
+    output = subprocess.check_output([sys.executable, "-c", PROBE.format(backend=BACKEND_DIR, path=path)])
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200_000)
+    args = parser.parse_args()
+
+    catalog = Catalog.synthetic(args.size)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {
+            "jsonl": os.path.join(tmp, "catalog.jsonl"),
+            "mcat": os.path.join(tmp, "catalog.mcat"),
+        }
+        write_jsonl(catalog, paths["jsonl"])
+        write_catalog(catalog, paths["mcat"])
+
+        print(f"{args.size} tracks")
+        print(f"{'format':>6} {'file MB':>8} {'load ms':>8} {'query ms':>9} {'RSS load MB':>12} {'RSS query MB':>13}")
+        for name, path in paths.items():
+            result = probe(path)
+            print(f"{name:>6} {os.path.getsize(path) / 2**20:>8.1f} {result['load'] * 1000:>8.1f} "
+                  f"{result['first_query'] * 1000:>9.2f} {result['rss_load'] / 2**20:>12.1f} "
+                  f"{result['rss_query'] / 2**20:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Per-invocation handler overhead of the two API entry points.
+
+The same /chat/ request is sent through
+
+  handler       API Gateway proxy event -> Mangum -> FastAPI -> pydantic
+  url_handler   Function URL event, parsed and encoded directly
+
+and compared with awaiting answer() on its own, which is the shared
+business logic. Overhead is the handler time minus that baseline. The
+message matches a sample utterance, so it is answered in-process and Lex
+latency does not drown the difference; a Lex-bound message (stubbed with
+LocalLex) is measured too. Metrics and transcripts are switched off.
+
+Usage:
+    python benchmarks/bench_entry_points.py [--requests 5000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "tools"))
+
+from harness import api_gateway_event, function_url_event, load_api  # noqa: E402
+from local_lex import LocalLex  # noqa: E402
+
+MESSAGES = {"local": "I am in a happy mood", "lex": "hello"}
+
+
+def timed(calls, requests):
+    """
+    Median and p99 of each call in microseconds
+
+    Calls are interleaved so that drift (GC, CPU frequency, cache growth)
+    hits every entry point alike.
+    """
+    samples = {name: [] for name in calls}
+    for _ in range(requests):
+        for name, call in calls.items():
+            start = time.perf_counter()
+            call()
+            samples[name].append((time.perf_counter() - start) * 1e6)
+    results = {}
+    for name, values in samples.items():
+        values.sort()
+        results[name] = statistics.median(values), values[int(len(values) * 0.99)]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    api = load_api(METRICS_ENABLED="false", TRANSCRIPT_SINK="off", LEX_CACHE_SIZE="0", ADMISSION_RATE="0")
+    api.lex_client = LocalLex()
+    api.warm_up()
+    loop = asyncio.new_event_loop()
+    encoder = "orjson" if "orjson" in sys.modules else "json"
+    print(f"{args.requests} requests per row, JSON encoder {encoder}")
+    print(f"{'message':>8} {'entry point':>12} {'median µs':>10} {'p99 µs':>9} {'overhead µs':>12}")
+
+    for label, message in MESSAGES.items():
+        body = {"message": message, "session_id": f"bench-{label}"}
+        proxy_event = api_gateway_event("POST", "/chat/", body)
+        url_event = function_url_event("POST", "/chat/", body)
+        runs = {
+            "answer()": lambda: loop.run_until_complete(api.answer(message, f"bench-{label}")),
+            "handler": lambda: api.handler(proxy_event, None),
+            "url_handler": lambda: api.url_handler(url_event, None),
+        }
+        timed(runs, 200)
+        results = timed(runs, args.requests)
+        baseline = results["answer()"][0]
+        for name, (median, p99) in results.items():
+            print(f"{label:>8} {name:>12} {median:>10.1f} {p99:>9.1f} {median - baseline:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measures streaming ingestion into the mood/genre inverted indexes.
+
+Writes a synthetic CSV dump and a delta touching --delta-fraction of it, then
+builds the index and applies the delta in a fresh interpreter, reporting
+throughput and that interpreter's peak RSS.
+
+Usage:
+    python benchmarks/bench_ingest.py [--rows 1000000] [--delta-fraction 0.01]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from recommender import load_catalog  # noqa: E402
+
+# Runs in the child interpreter: prints timings, sizes and peak RSS in KiB
+PROBE = """
+import json, resource, sys, time
+sys.path.insert(0, {backend!r})
+from recommender.build_catalog import read_records
+from recommender.ingest import InvertedIndex, normalized
+
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+index, rows = InvertedIndex.build(normalized(read_records({dump!r})))
+build = time.perf_counter() - start
+start = time.perf_counter()
+applied, touched = index.apply_delta(normalized(read_records({delta!r})))
+delta = time.perf_counter() - start
+print(json.dumps({{"rows": rows, "build": build, "applied": applied, "touched": touched,
+                   "delta": delta, "index_bytes": index.nbytes, "baseline_kib": baseline,
+                   "peak_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def write_dump(path, rows, first_id, rng, moods, genres, deleted_share=0.0):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "artist", "moods", "genres", "popularity", "deleted"])
+        for i in range(rows):
+            track_id = first_id + i
+            writer.writerow([
+                track_id, f"Track {track_id}", f"Artist {track_id % 997}",
+                "|".join(rng.sample(moods, rng.randint(1, 3))), rng.choice(genres),
+                f"{rng.random():.3f}", "true" if rng.random() < deleted_share else "",
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--delta-fraction", type=float, default=0.01)
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        dump, delta = os.path.join(tmp, "tracks.csv"), os.path.join(tmp, "delta.csv")
+        write_dump(dump, args.rows, 1, rng, catalog.moods, catalog.genres)
+        # Half of the delta rewrites existing tracks (a fifth of those deleted), half adds new ones
+        changes = max(1, int(args.rows * args.delta_fraction))
+        write_dump(delta, changes, args.rows - changes // 2, rng, catalog.moods, catalog.genres, 0.1)
+
+        output = subprocess.check_output(
+            [sys.executable, "-c", PROBE.format(backend=BACKEND_DIR, dump=dump, delta=delta)])
+        result = json.loads(output)
+        print(f"dump:   {result['rows']} rows, {os.path.getsize(dump) / 2**20:.1f} MB")
+        print(f"build:  {result['rows'] / result['build']:.0f} rows/s ({result['build']:.2f} s), "
+              f"index {result['index_bytes'] / 2**20:.1f} MB")
+        print(f"delta:  {result['applied']} rows in {result['delta'] * 1000:.1f} ms "
+              f"({result['applied'] / result['delta']:.0f} rows/s), "
+              f"{result['touched']} posting lists rewritten")
+        print(f"RSS:    peak {result['peak_kib'] / 1024:.1f} MB "
+              f"(interpreter and imports {result['baseline_kib'] / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
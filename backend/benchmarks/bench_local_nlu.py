@@ -0,0 +1,82 @@
+"""
+Measures how much traffic the local NLU fast path absorbs and what it saves.
+
+A synthetic message mix is generated from the bot's own sample utterances,
+with a share of out-of-vocabulary slot values and free text mixed in. Each
+message is routed through LocalMatcher; hits are answered by the in-process
+recommender and misses would go to Lex.
+
+Usage:
+    python benchmarks/bench_local_nlu.py [--messages 20000] [--lex-ms 120]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(1, os.path.join(BACKEND_DIR, "lambda_api"))
+
+from local_nlu import INTENT_NAME, LocalMatcher, load_bot_definition  # noqa: E402
+from recommender import Recommender, load_catalog  # noqa: E402
+
+UNKNOWN_WORDS = ["grumpy", "meh", "weird", "polka", "sleepy", "whatever"]
+FREE_TEXT = ["hello", "thanks!", "who are you?", "stop", "start over", "yes", "no"]
+
+
+def message_mix(count, catalog, unknown_rate, free_text_rate, seed=0):
+    rng = random.Random(seed)
+    templates = load_bot_definition()["intents"][INTENT_NAME]["sample_utterances"]
+    for _ in range(count):
+        if rng.random() < free_text_rate:
+            yield rng.choice(FREE_TEXT)
+            continue
+        moods, genres = catalog.moods, catalog.genres
+        if rng.random() < unknown_rate:
+            moods = genres = UNKNOWN_WORDS
+        yield rng.choice(templates).format(mood=rng.choice(moods), genre=rng.choice(genres))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--unknown-rate", type=float, default=0.1, help="share of out-of-vocabulary slot values")
+    parser.add_argument("--free-text-rate", type=float, default=0.1, help="share of messages not based on a template")
+    parser.add_argument("--lex-ms", type=float, default=120.0, help="typical recognize_text round-trip to compare against")
+    args = parser.parse_args()
+
+    recommender = Recommender(load_catalog())
+    start = time.perf_counter()
+    matcher = LocalMatcher.from_bot_definition(recommender.catalog)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    messages = list(message_mix(args.messages, recommender.catalog, args.unknown_rate, args.free_text_rate))
+    hits = 0
+    hit_seconds = miss_seconds = 0.0
+    for message in messages:
+        start = time.perf_counter()
+        found = matcher.match(message)
+        if found:
+            recommender.reply(**found.slots)
+            hits += 1
+            hit_seconds += time.perf_counter() - start
+        else:
+            miss_seconds += time.perf_counter() - start
+
+    misses = len(messages) - hits
+    hit_us = hit_seconds / max(hits, 1) * 1e6
+    miss_us = miss_seconds / max(misses, 1) * 1e6
+    saved_ms = hits * args.lex_ms - hit_seconds * 1000 - miss_seconds * 1000
+    print(f"matcher compile:        {compile_ms:.2f} ms ({len(matcher.templates)} templates)")
+    print(f"messages:               {len(messages)}")
+    print(f"local hit rate:         {hits / len(messages):.1%}")
+    print(f"local answer latency:   {hit_us:.1f} us (match + recommend)")
+    print(f"miss overhead:          {miss_us:.1f} us before falling back to Lex")
+    print(f"Lex time saved:         {saved_ms / len(messages):.1f} ms per message "
+          f"at {args.lex_ms:.0f} ms per recognize_text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Measures the quantized mood vector table.
+
+Reports the build time from the lexicon, the file and in-memory sizes
+(int8 against the float32 equivalent), the cold-start cost of mapping the
+file and resolving a first word, and per-lookup latency for lexicon words,
+unseen words resolved through n-grams, phrases and LRU cache hits.
+
+Usage:
+    python benchmarks/bench_mood_vectors.py [--repeats 20000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender.mood_vectors import (  # noqa: E402
+    DEFAULT_LEXICON_PATH, MoodVectors, open_vectors, write_vectors,
+)
+
+LOOKUPS = {
+    "lexicon word": ["pumped", "chill", "bummed", "nervous", "stoked"],
+    "unseen word": ["chillin", "nervy", "energised", "furiously", "hopefulness"],
+    "phrase": ["kinda down", "super pumped", "feeling blue", "good vibes", "really chill"],
+    "no match": ["banana", "music", "qwerty", "something", "weather"],
+}
+
+
+def per_call_us(fn, words, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        fn(words[i % len(words)])
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=20000)
+    args = parser.parse_args()
+
+    with open(DEFAULT_LEXICON_PATH, encoding="utf-8") as f:
+        lexicon = json.load(f)
+    start = time.perf_counter()
+    built = MoodVectors.from_lexicon(lexicon)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "mood_vectors.mvec")
+        size = write_vectors(built, path)
+        start = time.perf_counter()
+        vectors = open_vectors(path)
+        open_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        vectors.resolve("pumped")
+        first_ms = (time.perf_counter() - start) * 1000
+
+        float32_bytes = vectors.term_q.size * 4 + vectors.ngram_q.size * 4 + vectors.ngram_keys.nbytes \
+            + vectors.centroids.nbytes
+        print(f"{len(vectors.term_index)} terms, {len(vectors.ngram_keys)} n-grams, {len(vectors.moods)} moods")
+        print(f"build from lexicon {build_ms:.1f} ms, file {size / 1024:.1f} KiB")
+        print(f"arrays {vectors.nbytes / 1024:.1f} KiB int8 vs {float32_bytes / 1024:.1f} KiB float32")
+        print(f"cold start: open {open_ms:.3f} ms + first resolve {first_ms:.3f} ms")
+        print(f"{'lookup':>13} {'uncached us':>12} {'cached us':>10}  resolved")
+        for label, words in LOOKUPS.items():
+            uncached = per_call_us(vectors._resolve, words, args.repeats)
+            cached = per_call_us(vectors.resolve, words, args.repeats)
+            resolved = ", ".join(f"{w}={vectors.resolve(w)}" for w in words[:3])
+            print(f"{label:>13} {uncached:>12.2f} {cached:>10.3f}  {resolved}")
+        del vectors
+
+
+if __name__ == "__main__":
+    main()
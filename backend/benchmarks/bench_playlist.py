@@ -0,0 +1,84 @@
+"""
+Measures per-page latency of paginated playlists.
+
+Pages 1-100 of a playlist are read from a large synthetic catalog three
+ways: from a warm container's cached LazyRanking, from a cold container
+that only has the cursor (a new ranking per page), and by re-ranking the
+whole catalog with a full sort per page, which is what the lazy ranking
+replaces.
+
+Usage:
+    python benchmarks/bench_playlist.py [--tracks 1000000] [--page-size 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender import Catalog, Recommender  # noqa: E402
+from recommender.playlist import PlaylistPager  # noqa: E402
+
+REPORTED_PAGES = (1, 2, 5, 10, 20, 50, 100)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+
+    recommender = Recommender(Catalog.synthetic(args.tracks, seed=0))
+    size = args.page_size
+
+    warm = PlaylistPager(recommender)
+    warm_ms = {}
+    page, warm_ms[1] = timed(lambda: warm.page("happy", "pop", size, limit=None))
+    cursors = [None, page.cursor]
+    for number in range(2, args.pages + 1):
+        page, warm_ms[number] = timed(lambda: warm.resume(cursors[-1], limit=None))
+        cursors.append(page.cursor)
+
+    cold_ms = {}
+    for number in REPORTED_PAGES:
+        if number > args.pages:
+            continue
+        pager = PlaylistPager(recommender)
+        if number == 1:
+            _, cold_ms[number] = timed(lambda: pager.page("happy", "pop", size, limit=None))
+        else:
+            _, cold_ms[number] = timed(lambda: pager.resume(cursors[number - 1], limit=None))
+
+    full_ms = {}
+    for number in REPORTED_PAGES:
+        if number > args.pages:
+            continue
+        offset = (number - 1) * size
+
+        def full_sort():
+            scores = recommender.scores("happy", "pop")
+            return np.argsort(-scores, kind="stable")[offset:offset + size]
+
+        _, full_ms[number] = timed(full_sort)
+
+    print(f"{args.tracks:,} tracks, {size} per page")
+    print(f"{'page':>6} {'warm cached (ms)':>17} {'cold cursor (ms)':>17} {'full sort (ms)':>15}")
+    for number in REPORTED_PAGES:
+        if number in cold_ms:
+            print(f"{number:>6} {warm_ms[number]:>17.3f} {cold_ms[number]:>17.3f} {full_ms[number]:>15.3f}")
+    total = sum(warm_ms.values())
+    print(f"warm: {args.pages} pages in {total:.1f} ms, {total / args.pages:.3f} ms per page on average")
+
+
+if __name__ == "__main__":
+    main()
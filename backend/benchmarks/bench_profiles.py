@@ -0,0 +1,90 @@
+"""
+Measures user preference profiles at scale.
+
+Creates --users profiles (one update each), then reports update cost, memory
+per user, ranking latency with and without a profile blended in, and how
+long the file-backed store takes to reopen.
+
+Usage:
+    python benchmarks/bench_profiles.py [--users 1000000] [--size 100000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender import Catalog, ProfileStore, Recommender  # noqa: E402
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def fill(store, recommender, users, rng):
+    signals = [recommender.preference_signal(row) for row in rng.integers(len(recommender.catalog), size=256)]
+    start = time.perf_counter()
+    for user in range(users):
+        store.update(f"user-{user}", signals[user & 255])
+    return (time.perf_counter() - start) / users
+
+
+def ranking_latency(recommender, store, users, rng, repeats=200):
+    moods = recommender.catalog.moods
+    plain, personal = [], []
+    for _ in range(repeats):
+        mood = moods[rng.integers(len(moods))]
+        profile = store.get(f"user-{rng.integers(users)}")
+        start = time.perf_counter()
+        recommender.top_k(mood, k=1)
+        plain.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        recommender.top_k(mood, k=1, profile=profile)
+        personal.append(time.perf_counter() - start)
+    return statistics.median(plain), statistics.median(personal)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--size", type=int, default=100_000, help="catalog tracks")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    recommender = Recommender(Catalog.synthetic(args.size))
+    dimensions = recommender.catalog.dimensions
+    print(f"{args.users} users, {args.size} tracks, {dimensions} dimensions")
+
+    before = rss_bytes()
+    store = ProfileStore(dimensions)
+    update = fill(store, recommender, args.users, rng)
+    used = rss_bytes() - before
+    plain, personal = ranking_latency(recommender, store, args.users, rng)
+    print(f"memory:    {store.nbytes / args.users:.0f} B/user vectors, "
+          f"{used / args.users:.0f} B/user RSS incl. ID index")
+    print(f"update:    {update * 1e6:.2f} us")
+    print(f"ranking:   {plain * 1000:.3f} ms plain, {personal * 1000:.3f} ms with profile")
+    del store
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profiles.prf")
+        store = ProfileStore(dimensions, path=path)
+        update = fill(store, recommender, args.users, rng)
+        store.close()
+        start = time.perf_counter()
+        store = ProfileStore(dimensions, path=path)
+        reopen = time.perf_counter() - start
+        size = os.path.getsize(path) + os.path.getsize(path + ".ids")
+        store.close()
+    print(f"file:      {update * 1e6:.2f} us/update, reopen {reopen * 1000:.0f} ms, "
+          f"{size / 2**20:.1f} MB on disk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Measures recommendation latency as the catalog grows.
+
+Usage:
+    python benchmarks/bench_recommender.py [--sizes 1000 10000 100000 1000000] [--k 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender import Catalog, Recommender  # noqa: E402
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000.0
+
+
+def bench(size, k, repeats):
+    catalog = Catalog.synthetic(size)
+    recommender = Recommender(catalog)
+    queries = [(catalog.moods[i % len(catalog.moods)], catalog.genres[i % len(catalog.genres)])
+               for i in range(repeats)]
+
+    # Warm up BLAS and the page cache before timing
+    recommender.top_k(*queries[0], k=k)
+
+    samples = []
+    for mood, genre in queries:
+        start = time.perf_counter()
+        recommender.top_k(mood, genre, k=k)
+        samples.append(time.perf_counter() - start)
+    return percentile_ms(samples, 50), percentile_ms(samples, 99), catalog.features.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'tracks':>10} {'p50 ms':>8} {'p99 ms':>8} {'features MB':>12}")
+    for size in args.sizes:
+        p50, p99, nbytes = bench(size, args.k, args.repeats)
+        print(f"{size:>10} {p50:>8.3f} {p99:>8.3f} {nbytes / 2**20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
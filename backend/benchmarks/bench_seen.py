@@ -0,0 +1,61 @@
+"""
+Measures the session seen-set carried in Lex session attributes.
+
+For realistic session lengths it reports the encoded size, encode + decode
+time, the observed false-positive rate (unserved rows reported as served)
+and the cost of picking the next unheard track.
+
+Usage:
+    python benchmarks/bench_seen.py [--catalogs 36 4096 1000000] [--lengths 5 20 50 100 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender import Catalog, Recommender  # noqa: E402
+from recommender.seen import SeenSet  # noqa: E402
+
+
+def per_call(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalogs", type=int, nargs="+", default=[36, 4096, 1_000_000])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[5, 20, 50, 100, 200])
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'catalog':>9} {'kind':>6} {'served':>7} {'chars':>6} {'enc+dec us':>11} {'false pos':>10} {'pick ms':>8}")
+    for size in args.catalogs:
+        recommender = Recommender(Catalog.synthetic(size, seed=1))
+        for length in args.lengths:
+            if length >= size:
+                continue
+            served = rng.choice(size, length, replace=False)
+            seen = SeenSet(size)
+            for row in served:
+                seen.add(row)
+            encoded = seen.encode()
+            codec = per_call(lambda: SeenSet.decode(seen.encode(), size), args.repeats)
+
+            others = np.setdiff1d(rng.choice(size, min(size, 200_000), replace=False), served)
+            false_positive = seen.contains(others).mean() if len(others) else 0.0
+            pick = per_call(lambda: recommender.pick("happy", seen=seen), max(1, args.repeats // 100))
+            kind = "bitset" if seen.exact else "bloom"
+            print(f"{size:>9} {kind:>6} {length:>7} {len(encoded):>6} {codec * 1e6:>11.1f} "
+                  f"{false_positive:>10.2e} {pick * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares conversations with and without server-side sessions.
+
+Simulated users open with one of the bot's sample utterances, answer slot
+prompts with their mood and confirm with "yes", until they receive the song
+the recommender picks for that mood (or give up after --max-turns). Without
+a session every message starts a new Lex conversation, which is how /chat/
+behaved before session_id was accepted. Lex is the in-process LocalLex.
+
+Usage:
+    python benchmarks/bench_sessions.py [--conversations 500]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+from harness import load_api  # noqa: E402
+from local_lex import LocalLex  # noqa: E402
+from local_nlu import INTENT_NAME, load_bot_definition  # noqa: E402
+
+MOODS = ["happy", "sad", "energetic", "calm", "romantic"]
+
+
+async def conversation(api, opening, mood, use_session, max_turns):
+    expected = api.get_recommender().reply(mood)
+    session_id = None
+    message = opening
+    for turn in range(1, max_turns + 1):
+        reply = await api.answer(message, session_id)
+        if use_session:
+            session_id = reply["session_id"]
+        if reply["response"] == expected:
+            return turn
+        if reply["response"] == "Shall i look for music based on your mood?":
+            message = "yes"
+        elif reply["response"] == "What is your current mood?":
+            message = mood
+        else:
+            message = opening
+    return None
+
+
+async def run(api, conversations, use_session, max_turns, seed=0):
+    rng = random.Random(seed)
+    templates = load_bot_definition()["intents"][INTENT_NAME]["sample_utterances"]
+    openings = [t for t in templates if "{genre}" not in t]
+    turns = []
+    for _ in range(conversations):
+        mood = rng.choice(MOODS)
+        turns.append(await conversation(api, rng.choice(openings).format(mood=mood), mood, use_session, max_turns))
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=500)
+    parser.add_argument("--max-turns", type=int, default=6)
+    args = parser.parse_args()
+
+    # Keep local answers out of the way so every opening exercises the Lex dialog
+    api = load_api(LOCAL_NLU_ENABLED="false", LEX_CACHE_SIZE="0")
+    print(f"{'mode':<12} {'completed':>10} {'avg turns':>10} {'Lex calls':>10}")
+    for use_session in (False, True):
+        api.lex_client = LocalLex()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            turns = asyncio.run(run(api, args.conversations, use_session, args.max_turns))
+        done = [t for t in turns if t is not None]
+        average = sum(done) / len(done) if done else float("nan")
+        label = "session" if use_session else "no session"
+        print(f"{label:<12} {len(done) / len(turns):>10.1%} {average:>10.2f} {api.lex_client.calls:>10}")
+
+
+if __name__ == "__main__":
+    main()
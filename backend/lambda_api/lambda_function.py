@@ -1,13 +1,43 @@
 # lambda_function.py
 """Lambda handler for FastAPI music recommender chatbot."""
 from mangum import Mangum
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import boto3
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional
+import asyncio
+import base64
+import contextlib
+import functools
+import hashlib
+import re
 import uuid
 import json
 import os
+import time
+
+from local_nlu import INTENT_NAME, LocalMatcher, load_bot_definition
+from metrics import Metrics
+from resilience import AdmissionControl, CircuitBreaker, is_lex_fault
+from response_cache import MULTI_TURN_ACTIONS, ResponseCache
+from session_store import create_session_store
+from transcripts import TranscriptLogger
+import lex_runtime
+
+# Compact JSON, with orjson when it is installed
+try:
+    import orjson
+
+    def dump_json(data):
+        return orjson.dumps(data).decode()
+
+    load_json = orjson.loads
+except ImportError:
+    def dump_json(data):
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+    load_json = json.loads
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -21,11 +51,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Lex accepts session IDs of 2-100 characters from this set
+SESSION_ID_PATTERN = r"^[0-9a-zA-Z._:-]{2,100}$"
+SessionId = Optional[Annotated[str, Field(pattern=SESSION_ID_PATTERN)]]
+# Ties sessions to one user's preference profile; IDs are stored one per line
+USER_ID_MAX_LENGTH = 200
+UserId = Optional[Annotated[str, Field(min_length=1, max_length=USER_ID_MAX_LENGTH, pattern=r"^[^\n]+$")]]
+
+# Longest playlist page a chat reply or GET /playlists returns; matches
+# recommender.playlist.MAX_PAGE_SIZE, which is only imported on first use
+PLAYLIST_MAX_SIZE = 25
+
 class ChatRequest(BaseModel):
     message: str
+    session_id: SessionId = None
+    # Tracks per reply; above 1 the bot answers with a playlist page
+    playlist_size: Optional[int] = Field(None, ge=1, le=PLAYLIST_MAX_SIZE)
+    # Sets the session's userId attribute, so the user's profile follows them across sessions
+    user_id: UserId = None
+
+class FeedbackRequest(BaseModel):
+    track_id: int
+    liked: bool
+    session_id: SessionId = None
+    # Overrides the session's userId attribute, like the attribute overrides the session
+    user_id: UserId = None
+
+# Per-stage timings, printed as one CloudWatch EMF line per invocation
+metrics = Metrics.from_env("api")
+
+# Bounded runner that keeps blocking Lex calls off the event loop
+lex_runner = lex_runtime.LexRunner.from_env()
+
+# Batch limits. A batch must be answered before the function times out
+# (API_TIMEOUT_SECONDS, set by the stack) and API Gateway gives up. At worst
+# every wave of BATCH_CONCURRENCY items waits out the Lex deadline before its
+# fallbacks answer, so by default batches hold as many waves as fit.
+API_TIMEOUT_SECONDS = float(os.environ.get("API_TIMEOUT_SECONDS", "10"))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "16"))
+# Time left after the last wave's Lex deadline to answer with fallbacks
+BATCH_MARGIN_SECONDS = 2
+BATCH_WAVES = max(1, int((API_TIMEOUT_SECONDS - BATCH_MARGIN_SECONDS) // lex_runner.timeout))
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", BATCH_CONCURRENCY * BATCH_WAVES))
+
+class BatchItem(BaseModel):
+    message: str
+    session_id: SessionId = None
 
-# Initialize Lex client
-lex_client = boto3.client("lexv2-runtime")
+class BatchChatRequest(BaseModel):
+    items: List[BatchItem] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+# Skips Lex while it is throttling, failing or slow, answering locally instead
+lex_breaker = CircuitBreaker.from_env()
+
+# Token bucket per client address, per warm container
+admission = AdmissionControl.from_env()
+
+# Used when Lex is unavailable and no mood could be spotted in the message
+FALLBACK_TEMPLATE = "I'm having trouble understanding requests right now, but here is a popular pick: {song}"
 
 # Configuration - use environment variables in Lambda
 LEX_BOT_ID = os.environ.get("LEX_BOT_ID")
@@ -35,35 +118,692 @@ LEX_LOCALE_ID = os.environ.get("LEX_LOCALE_ID", "en_US")
 if not LEX_BOT_ID:
     raise ValueError("LEX_BOT_ID environment variable is required")
 
-@app.post("/chat/")
-def chat_with_lex(request: ChatRequest):
-    # Generate a unique session ID for each request
-    session_id = str(uuid.uuid4())
+# Per-session dialog state; expires with the bot's idle session TTL by default
+session_store = create_session_store(load_bot_definition()["idle_session_ttl_in_seconds"])
 
-    try:
-        response = lex_client.recognize_text(
-            botId=LEX_BOT_ID,
-            botAliasId=LEX_BOT_ALIAS_ID,
-            localeId=LEX_LOCALE_ID,
-            sessionId=session_id,
-            text=request.message
-        )
-
-        messages = response.get("messages", [])
-        print(f"Lex response: {messages}")
-
-        if messages:
-            return {"response": messages[0].get("content", "")}
-        else:
-            return {"response": "Sorry, I didn't get that."}
+# Turn-by-turn transcripts, batched to a sink by a background thread
+transcript_log = TranscriptLogger.from_env()
+# Longest an invocation spends writing transcripts left queued by the last freeze
+TRANSCRIPT_STALE_FLUSH_SECONDS = float(os.environ.get("TRANSCRIPT_STALE_FLUSH_SECONDS", "0.5"))
+
+# Heavy dependencies (boto3, NumPy and the catalog) are created on first use,
+# so cold starts and /health only pay for FastAPI. Set EAGER_INIT=true to
+# build them at import time instead, e.g. under provisioned concurrency.
+lex_client = None
+recommender = None
+profile_store = None
+local_matcher = None
+playlist_pager = None
+LOCAL_NLU_ENABLED = os.environ.get("LOCAL_NLU_ENABLED", "true").lower() == "true"
+
+def get_lex_client():
+    """Lex client with a tuned connection pool."""
+    global lex_client
+    if lex_client is None:
+        lex_client = lex_runtime.create_client()
+    return lex_client
+
+def get_recommender():
+    global recommender, profile_store
+    if recommender is None:
+        from recommender import Recommender, load_catalog
+        from recommender.mood_vectors import load_mood_vectors
+        from recommender.profiles import create_profile_store
+        recommender = Recommender(load_catalog(), load_mood_vectors())
+        # Preference vectors for turns answered in-process, as the fulfillment Lambda keeps its own
+        profile_store = create_profile_store(recommender.catalog.dimensions)
+    return recommender
+
+def get_profile_store():
+    """Per-user preference vectors, or None when PROFILE_STORE=off."""
+    get_recommender()
+    return profile_store
+
+def get_playlist_pager():
+    """Playlist rankings of recent queries, kept per warm container."""
+    global playlist_pager
+    if playlist_pager is None:
+        from recommender.playlist import PlaylistPager
+        playlist_pager = PlaylistPager(get_recommender())
+    return playlist_pager
+
+def get_local_matcher():
+    """Local fast path for utterances that fully match a sample utterance template."""
+    global local_matcher
+    if local_matcher is None and LOCAL_NLU_ENABLED:
+        local_matcher = LocalMatcher.from_bot_definition(get_recommender().catalog)
+    return local_matcher
+
+# Recent Lex answers, kept per warm container
+lex_cache = ResponseCache(
+    max_entries=int(os.environ.get("LEX_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.environ.get("LEX_CACHE_TTL_SECONDS", "300")),
+)
+
+def text_response(content, **session_state):
+    """Wraps a reply produced outside Lex in a Lex-shaped response."""
+    return {
+        "sessionState": session_state,
+        "messages": [{"contentType": "PlainText", "content": content}],
+    }
+
+def remember(session_id, response, previous):
+    """Stores the dialog state Lex (or the local path) left the session in."""
+    session_state = response.get("sessionState") or {}
+    dialog_action = session_state.get("dialogAction") or {}
+    state = {
+        "dialogAction": dialog_action.get("type"),
+        "intent": (session_state.get("intent") or {}).get("name"),
+        "sessionAttributes": session_state.get("sessionAttributes") or previous.get("sessionAttributes") or {},
+    }
+    if dialog_action.get("type") in MULTI_TURN_ACTIONS:
+        # Handed back to Lex on the next turn, whose sessionState replaces Lex's own
+        state["lexState"] = {"dialogAction": dialog_action, "intent": session_state.get("intent") or {}}
+    session_store.put(session_id, state)
+
+def local_reply(slots, attributes, template=None, user=None):
+    """
+    Recommends like the fulfillment Lambda does: personalised for user,
+    skipping songs this session has heard, recording the new one in the
+    session attributes and moving the user's profile towards it. Sessions
+    with a playlistSize attribute above 1 get a playlist page instead.
+    """
+    from recommender.engine import REPLY_TEMPLATE, TRACKS_ATTRIBUTE, served_tracks
+    from recommender.playlist import turn_page
+    from recommender.seen import SEEN_ATTRIBUTE, SeenSet
+
+    page = turn_page(get_playlist_pager(), attributes, slots.get("mood"), slots.get("genre"))
+    if page is not None:
+        return page.message
+    engine = get_recommender()
+    profiles = get_profile_store()
+    user = user if profiles is not None else None
+    profile = profiles.get(user) if user else None
+    seen = SeenSet.decode(attributes.get(SEEN_ATTRIBUTE), len(engine.catalog))
+    row = engine.pick(slots.get("mood"), slots.get("genre"), profile=profile, seen=seen)
+    seen.add(row)
+    attributes[SEEN_ATTRIBUTE] = seen.encode()
+    attributes[TRACKS_ATTRIBUTE] = served_tracks(engine.catalog, [row])
+    if user:
+        with metrics.stage("Profile"):
+            profiles.update(user, engine.preference_signal(row))
+    return (template or REPLY_TEMPLATE).format(song=engine.catalog.describe(row))
+
+def local_response(session_id, previous, slots, attributes, template=None):
+    """Recommends in-process and returns it as a fulfilled, Lex-shaped response."""
+    from recommender.profiles import profile_user
+
+    response = text_response(
+        local_reply(slots, attributes, template, profile_user(attributes, session_id)),
+        dialogAction={"type": "Close"},
+        intent={
+            "name": INTENT_NAME,
+            "state": "Fulfilled",
+            "slots": {name: {"value": {"interpretedValue": value}} for name, value in slots.items()},
+        },
+        sessionAttributes=attributes,
+    )
+    remember(session_id, response, previous)
+    return response
+
+def fallback_response(message, session_id, previous, attributes):
+    """
+    Answers without Lex while it is unavailable
+
+    Any mood or genre named in the message is used; otherwise the session
+    gets the most popular track it has not heard yet.
+    """
+    matcher = get_local_matcher()
+    slots = matcher.spot(message) if matcher else {}
+    template = None if slots.get("mood") else FALLBACK_TEMPLATE
+    return local_response(session_id, previous, slots, attributes, template)
+
+def more_response(message, session_id, previous, attributes):
+    """
+    Serves "give me 10 more" from the session's playlist cursor in-process
+
+    Returns:-
+        Lex-shaped response, or None when the message does not continue a playlist
+    """
+    if not attributes.get("playlist"):
+        return None
+    from recommender.playlist import turn_page
+
+    page = turn_page(get_playlist_pager(), attributes, text=message)
+    if page is None:
+        return None
+    response = text_response(
+        page.message,
+        dialogAction={"type": "Close"},
+        intent={"name": "FallbackIntent", "state": "Fulfilled"},
+        sessionAttributes=attributes,
+    )
+    remember(session_id, response, previous)
+    return response
+
+async def respond(message, session_id, playlist_size=None, user_id=None):
+    """
+    Runs one conversational turn and returns (Lex-shaped response, source)
 
+    While a session is in the middle of a dialog (Lex is eliciting a slot or
+    asking for confirmation) the message goes to Lex, or to the response
+    cache when another session sent it in the same dialog state. Otherwise
+    the message is stateless, so the local matcher may answer it too. A playlist_size sets the session's tracks per reply and
+    a user_id the user whose profile personalises it, on this turn and the
+    session's later ones.
+    """
+    previous = session_store.get(session_id) or {}
+    in_dialog = previous.get("dialogAction") in MULTI_TURN_ACTIONS
+    attributes = dict(previous.get("sessionAttributes") or {})
+    if playlist_size is not None:
+        attributes["playlistSize"] = str(playlist_size)
+    if user_id is not None:
+        attributes["userId"] = user_id
+
+    if not in_dialog:
+        # Next page of the session's playlist, which Lex would only route to FallbackIntent
+        with metrics.stage("Playlist"):
+            response = more_response(message, session_id, previous, attributes)
+        if response is not None:
+            return response, "local"
+
+        # Serve fully specified requests in-process, skipping the Lex round-trip
+        with metrics.stage("LocalNLU"):
+            matcher = get_local_matcher()
+            local = matcher.match(message) if matcher else None
+        if local:
+            return local_response(session_id, previous, local.slots, attributes), "local"
+
+    # Hand Lex back any session attributes it (or we) set on earlier turns.
+    # A sessionState replaces Lex's, so mid-dialog it must carry the intent
+    # and dialog action too, or the slot being elicited would be dropped.
+    session_state = {}
+    if in_dialog:
+        if previous.get("lexState"):
+            session_state["sessionState"] = {**previous["lexState"], "sessionAttributes": attributes}
+    elif attributes:
+        session_state["sessionState"] = {"sessionAttributes": attributes}
+
+    # Replay a recent Lex answer to the same message sent in the same state.
+    # Mid-dialog that needs the state Lex is in, which older sessions lack.
+    cache_key = None
+    if not in_dialog or "sessionState" in session_state:
+        with metrics.stage("Cache"):
+            cache_key = ResponseCache.key(
+                message, LEX_BOT_ID, LEX_BOT_ALIAS_ID, LEX_LOCALE_ID, session_state.get("sessionState")
+            )
+            response = lex_cache.get(cache_key)
+        if response is not None:
+            metrics.count("CacheHit")
+            remember(session_id, response, previous)
+            return response, "cache"
+
+    # While the breaker is open, answer at once rather than wait on a failing Lex
+    if not lex_breaker.allow():
+        metrics.count("BreakerOpen")
+        return fallback_response(message, session_id, previous, attributes), "fallback"
+
+    started = time.perf_counter()
+    failed = True
+    try:
+        # Includes the fulfillment Lambda when Lex calls it on this turn
+        with metrics.stage("Lex"):
+            response = await lex_runner.run(
+                get_lex_client().recognize_text,
+                botId=LEX_BOT_ID,
+                botAliasId=LEX_BOT_ALIAS_ID,
+                localeId=LEX_LOCALE_ID,
+                sessionId=session_id,
+                text=message,
+                **session_state
+            )
+        failed = False
+    except asyncio.TimeoutError as e:
+        print(f"Lex unavailable, answering with fallback: {e!r}")
+        return fallback_response(message, session_id, previous, attributes), "fallback"
+    except lex_runtime.LexOverloaded as e:
+        # This container's own queue is full; Lex was never called
+        failed = None
+        print(f"Lex queue full, answering with fallback: {e!r}")
+        return fallback_response(message, session_id, previous, attributes), "fallback"
     except Exception as e:
         print(f"Error calling Lex: {str(e)}")
-        return {"response": "Sorry, there was an error processing your request."}
+        failed = is_lex_fault(e)
+        if failed:
+            return fallback_response(message, session_id, previous, attributes), "fallback"
+        return text_response("Sorry, there was an error processing your request."), "lex"
+    finally:
+        if failed is None:
+            lex_breaker.cancel()
+        else:
+            lex_breaker.record(failed, time.perf_counter() - started)
+
+    remember(session_id, response, previous)
+    if cache_key is not None and lex_cache.cacheable(response):
+        lex_cache.put(cache_key, response)
+    return response, "lex"
+
+async def converse(message, session_id, playlist_size=None, user_id=None):
+    """Runs one turn through respond() and queues its transcript."""
+    started = time.perf_counter()
+    with metrics.stage("Turn"):
+        response, source = await respond(message, session_id, playlist_size, user_id)
+    metrics.count(f"Source{source.capitalize()}")
+    if transcript_log is not None:
+        transcript_log.log(transcript_record(message, session_id, response, source, time.perf_counter() - started))
+    return response, source
+
+def new_session_id():
+    return str(uuid.uuid4())
+
+async def answer(message, session_id=None, playlist_size=None, user_id=None):
+    """Produces the bot's first reply to one message, starting a session if needed."""
+    session_id = session_id or new_session_id()
+    response, source = await converse(message, session_id, playlist_size, user_id)
+    messages = response.get("messages", [])
+    if messages:
+        return {"response": messages[0].get("content", ""), "source": source, "session_id": session_id}
+    else:
+        return {"response": "Sorry, I didn't get that.", "source": source, "session_id": session_id}
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def dialog_state(response, source):
+    """Summarizes the recognized intent and slots for the stream's state event."""
+    session_state = response.get("sessionState") or {}
+    intent = session_state.get("intent") or {}
+    slots = {
+        name: ((slot or {}).get("value") or {}).get("interpretedValue")
+        for name, slot in (intent.get("slots") or {}).items()
+    }
+    return {
+        "source": source,
+        "dialogAction": (session_state.get("dialogAction") or {}).get("type"),
+        "intent": intent.get("name"),
+        "intentState": intent.get("state"),
+        "slots": slots,
+    }
+
+def transcript_record(message, session_id, response, source, elapsed):
+    """One analytics row per turn: utterance, intent, slots, served track ids and latency."""
+    state = dialog_state(response, source)
+    # Recommendations and playlist pages (which "more" reaches as FallbackIntent)
+    # name the tracks they served in the tracks session attribute
+    fulfilled = state["intent"] in (INTENT_NAME, "FallbackIntent") and state["intentState"] == "Fulfilled"
+    tracks = ((response.get("sessionState") or {}).get("sessionAttributes") or {}).get("tracks")
+    return {
+        "timestamp": time.time(),
+        "session_id": session_id,
+        "utterance": message,
+        **state,
+        "track_ids": [int(track) for track in tracks.split(",")] if fulfilled and tracks else None,
+        "latency_ms": round(elapsed * 1000, 3),
+    }
+
+def admission_wait(client):
+    """Spends a token of client's bucket; returns 0, or seconds to wait when throttled."""
+    wait = admission.admit(client)
+    if wait:
+        metrics.count("Throttled")
+    return wait
+
+def admission_check(request: Request):
+    """Answers 429 with Retry-After once a client has used up its token bucket."""
+    wait = admission_wait(request.client.host if request.client else None)
+    if wait:
+        raise HTTPException(429, "Too many requests", headers={"Retry-After": AdmissionControl.retry_after(wait)})
+
+@app.post("/chat/", dependencies=[Depends(admission_check)])
+async def chat_with_lex(request: ChatRequest):
+    result = await answer(request.message, request.session_id, request.playlist_size, request.user_id)
+    with metrics.stage("Serialize"):
+        return JSONResponse(result)
+
+@app.post("/feedback", dependencies=[Depends(admission_check)])
+def feedback(request: FeedbackRequest):
+    """
+    Likes or dislikes a track, moving the user's profile towards or away from it
+
+    The user is user_id, else the session's userId attribute, else the
+    session itself.
+    """
+    import numpy as np
+    from recommender.profiles import FEEDBACK_WEIGHTS, profile_user
+
+    engine = get_recommender()
+    rows = np.flatnonzero(engine.catalog.track_ids == request.track_id)
+    if not len(rows):
+        raise HTTPException(404, "Unknown track_id")
+    attributes = (session_store.get(request.session_id) or {}).get("sessionAttributes") if request.session_id else None
+    user = request.user_id or profile_user(attributes, request.session_id)
+    if user is None:
+        raise HTTPException(422, "session_id or user_id is required")
+    profiles = get_profile_store()
+    if profiles is None:
+        return {"user": user, "updated": False}
+    with metrics.stage("Profile"):
+        profiles.update(user, engine.preference_signal(rows[0]), weight=FEEDBACK_WEIGHTS[request.liked])
+    metrics.count("Feedback")
+    return {"user": user, "updated": True}
+
+@app.post("/chat/stream", dependencies=[Depends(admission_check)])
+async def chat_stream(request: ChatRequest):
+    """
+    Streams the reply as Server-Sent Events
+
+    A start event is flushed before Lex is called, so clients get their
+    first byte immediately. It is followed by one message event per Lex
+    message, a state event with the recognized intent and slots, and done.
+    """
+    session_id = request.session_id or new_session_id()
+
+    async def events():
+        yield sse_event("start", {"session_id": session_id})
+        response, source = await converse(request.message, session_id, request.playlist_size, request.user_id)
+        for message in response.get("messages", []):
+            yield sse_event("message", message)
+        yield sse_event("state", {"session_id": session_id, **dialog_state(response, source)})
+        yield sse_event("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/chat/batch", dependencies=[Depends(admission_check)])
+async def chat_batch(request: BatchChatRequest):
+    """
+    Answers many messages in one call, returning results in input order
+
+    Items sharing a session_id are turns of one conversation and run in
+    order; everything else runs concurrently up to BATCH_CONCURRENCY.
+    Identical session-less messages are only answered once.
+    """
+    limiter = asyncio.Semaphore(BATCH_CONCURRENCY)
+    results = [None] * len(request.items)
+
+    async def answer_item(item):
+        async with limiter:
+            try:
+                return await answer(item.message, item.session_id)
+            except Exception as e:
+                return {"error": str(e)}
+
+    # Group positions into independent units of work
+    stateless = {}
+    sessions = {}
+    for position, item in enumerate(request.items):
+        if item.session_id is None:
+            stateless.setdefault(item.message, []).append(position)
+        else:
+            sessions.setdefault(item.session_id, []).append(position)
+
+    async def run_stateless(positions):
+        result = await answer_item(request.items[positions[0]])
+        results[positions[0]] = result
+        if len(positions) == 1 or "session_id" not in result:
+            for position in positions[1:]:
+                results[position] = result
+            return
+        # Each duplicate is its own conversation: same reply, own session
+        state = session_store.get(result["session_id"])
+        for position in positions[1:]:
+            session_id = new_session_id()
+            if state is not None:
+                session_store.put(session_id, state)
+            results[position] = {**result, "session_id": session_id}
+
+    async def run_session(positions):
+        for position in positions:
+            results[position] = await answer_item(request.items[position])
+
+    await asyncio.gather(
+        *(run_stateless(positions) for positions in stateless.values()),
+        *(run_session(positions) for positions in sessions.values()),
+    )
+    return {
+        "results": results,
+        "deduplicated": sum(len(positions) - 1 for positions in stateless.values()),
+    }
+
+# GET /recommendations is deterministic for a catalog build, so browsers and
+# CloudFront may cache it; s-maxage applies to the edge only
+RECOMMENDATIONS_MAX_LIMIT = int(os.environ.get("RECOMMENDATIONS_MAX_LIMIT", "20"))
+RECOMMENDATIONS_CACHE_CONTROL = (
+    f"public, max-age={os.environ.get('RECOMMENDATIONS_MAX_AGE', '300')}, "
+    f"s-maxage={os.environ.get('RECOMMENDATIONS_EDGE_MAX_AGE', '3600')}"
+)
+
+@functools.lru_cache(maxsize=512)
+def recommendation_document(mood, genre, limit):
+    """
+    Ranks the tracks for a normalized query and returns (body, etag)
+
+    The ETag is a hash of the exact bytes, so it is strong and identical in
+    every container serving the same catalog.
+    """
+    engine = get_recommender()
+    catalog = engine.catalog
+    tracks = [
+        {
+            "id": int(catalog.track_ids[row]),
+            "title": catalog.titles[row],
+            "artist": catalog.artists[row],
+            "song": catalog.describe(row),
+        }
+        for row in engine.top_k(mood, genre, k=limit).tolist()
+    ]
+    body = dump_json({"mood": mood, "genre": genre, "limit": limit, "tracks": tracks})
+    return body, '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match comparison, which ignores the weak W/ prefix."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+@app.get("/recommendations")
+def recommendations(
+    mood: str,
+    genre: Optional[str] = None,
+    limit: int = Query(1, ge=1, le=RECOMMENDATIONS_MAX_LIMIT),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Best tracks for a mood and optional genre, without a conversation
+
+    Unknown tags are rejected rather than ranked by popularity, so junk
+    query strings do not fill the edge cache with copies of one answer.
+    """
+    from recommender.catalog import normalize_tag
+
+    catalog = get_recommender().catalog
+    mood = normalize_tag(mood)
+    genre = normalize_tag(genre) if genre else None
+    if mood not in catalog.mood_index:
+        raise HTTPException(422, f"Unknown mood, expected one of: {', '.join(catalog.moods)}")
+    if genre is not None and genre not in catalog.genre_index:
+        raise HTTPException(422, f"Unknown genre, expected one of: {', '.join(catalog.genres)}")
+
+    body, etag = recommendation_document(mood, genre, limit)
+    headers = {"ETag": etag, "Cache-Control": RECOMMENDATIONS_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        metrics.count("NotModified")
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/playlists")
+def playlists(
+    mood: Optional[str] = None,
+    genre: Optional[str] = None,
+    size: int = Query(10, ge=1, le=PLAYLIST_MAX_SIZE),
+    cursor: Optional[str] = None,
+):
+    """
+    One page of a playlist for a mood and optional genre
+
+    The first page is asked for by mood (free text is resolved like a chat
+    message); later pages by passing back next_cursor, which also carries
+    the query. Pages are sliced from a ranking sorted only as far as read.
+    """
+    pager = get_playlist_pager()
+    if cursor is not None:
+        try:
+            page = pager.resume(cursor, size=size, limit=None)
+        except ValueError as e:
+            raise HTTPException(422, str(e))
+    elif mood:
+        page = pager.page(mood, genre, size, limit=None)
+    else:
+        raise HTTPException(422, "mood or cursor is required")
+
+    catalog = pager.recommender.catalog
+    tracks = [
+        {
+            "position": position,
+            "id": int(catalog.track_ids[row]),
+            "title": catalog.titles[row],
+            "artist": catalog.artists[row],
+            "song": catalog.describe(row),
+        }
+        for position, row in enumerate(page.rows.tolist(), start=page.offset + 1)
+    ]
+    return {"offset": page.offset, "tracks": tracks, "next_cursor": page.cursor}
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/cache/stats")
+def cache_stats():
+    return lex_cache.stats()
+
+@app.get("/transcripts/stats")
+def transcript_stats():
+    return transcript_log.stats() if transcript_log is not None else {"enabled": False}
+
+@app.get("/resilience/stats")
+def resilience_stats():
+    return {"breaker": lex_breaker.stats(), "admission": admission.stats()}
+
+def warm_up():
+    """Builds everything a chat request needs, without calling Lex."""
+    get_lex_client()
+    get_recommender()
+    get_local_matcher()
+    return {"warmed": True}
+
+if os.environ.get("EAGER_INIT", "false").lower() == "true":
+    warm_up()
+
 # Create the Lambda handler
-handler = Mangum(app)
\ No newline at end of file
+asgi_handler = Mangum(app)
+
+@contextlib.contextmanager
+def invocation(context, path):
+    """Metrics and transcript housekeeping around one request, whichever entry point took it."""
+    with metrics.invocation(RequestId=getattr(context, "aws_request_id", None), Path=path):
+        if transcript_log is not None:
+            # Transcripts that outlived a freeze are written before this request's
+            # work, as a reaped container would lose them; leftovers go to the worker
+            with metrics.stage("TranscriptFlush"):
+                transcript_log.flush(TRANSCRIPT_STALE_FLUSH_SECONDS, max_age=transcript_log.flush_seconds)
+            transcript_log.wake()
+            metrics.count("TranscriptsDropped", transcript_log.new_losses())
+        yield
+
+def handler(event, context):
+    # Scheduled warm-up ping from the stack's EventBridge rule
+    if event.get("warmup"):
+        return warm_up()
+    # Handler time minus Turn and Serialize is what Mangum and FastAPI spend
+    with invocation(context, event.get("path") or event.get("rawPath")):
+        return asgi_handler(event, context)
+
+# Lean entry point for Lambda Function URLs. The hot routes are answered
+# straight from the payload v2 event: no ASGI translation, routing or
+# pydantic models, and orjson when it is installed. Every other request,
+# including API Gateway proxy events, falls through to the FastAPI app.
+SESSION_ID = re.compile(SESSION_ID_PATTERN)
+JSON_HEADERS = {"content-type": "application/json"}
+
+# One event loop per container, reused by every raw request
+url_loop = None
+
+def run_async(awaitable):
+    global url_loop
+    if url_loop is None:
+        url_loop = asyncio.new_event_loop()
+    return url_loop.run_until_complete(awaitable)
+
+def url_response(status, data):
+    return {"statusCode": status, "headers": JSON_HEADERS, "body": dump_json(data)}
+
+def chat_request_error(payload):
+    """The checks ChatRequest makes, by hand. Returns a message, or None when valid."""
+    if not isinstance(payload, dict):
+        return "Body must be a JSON object"
+    if not isinstance(payload.get("message"), str):
+        return "message must be a string"
+    session_id = payload.get("session_id")
+    if session_id is not None and not (isinstance(session_id, str) and SESSION_ID.match(session_id)):
+        return "session_id must be 2-100 characters of letters, digits and ._:-"
+    playlist_size = payload.get("playlist_size")
+    if playlist_size is not None and not (
+        type(playlist_size) is int and 1 <= playlist_size <= PLAYLIST_MAX_SIZE
+    ):
+        return f"playlist_size must be an integer from 1 to {PLAYLIST_MAX_SIZE}"
+    user_id = payload.get("user_id")
+    if user_id is not None and not (
+        isinstance(user_id, str) and 1 <= len(user_id) <= USER_ID_MAX_LENGTH and "\n" not in user_id
+    ):
+        return f"user_id must be 1-{USER_ID_MAX_LENGTH} characters without line breaks"
+    return None
+
+def url_chat(event):
+    http = event["requestContext"]["http"]
+    wait = admission_wait(http.get("sourceIp"))
+    if wait:
+        response = url_response(429, {"detail": "Too many requests"})
+        response["headers"] = {**JSON_HEADERS, "retry-after": AdmissionControl.retry_after(wait)}
+        return response
+    body = event.get("body") or ""
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    try:
+        # A missing body is a validation error, as it is for ChatRequest
+        payload = load_json(body) if body else None
+    except ValueError:
+        return url_response(400, {"detail": "Body is not valid JSON"})
+    error = chat_request_error(payload)
+    if error is not None:
+        return url_response(422, {"detail": error})
+    result = run_async(answer(
+        payload["message"], payload.get("session_id"), payload.get("playlist_size"), payload.get("user_id")
+    ))
+    with metrics.stage("Serialize"):
+        return url_response(200, result)
+
+def url_health(event):
+    return url_response(200, health_check())
+
+URL_ROUTES = {
+    ("POST", "/chat/"): url_chat,
+    ("POST", "/chat"): url_chat,
+    ("GET", "/health"): url_health,
+}
+
+def url_handler(event, context):
+    """Function URL handler; set as lambda_function.url_handler."""
+    if event.get("warmup"):
+        return warm_up()
+    http = (event.get("requestContext") or {}).get("http") or {}
+    route = URL_ROUTES.get((http.get("method"), event.get("rawPath")))
+    if route is None:
+        return handler(event, context)
+    # Handler time minus Turn is what this path spends on parsing and encoding
+    with invocation(context, event.get("rawPath")):
+        return route(event)
@@ -0,0 +1,103 @@
+"""Tuned Lex runtime client and a bounded async runner for its blocking calls."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+
+class LexOverloaded(Exception):
+    """Raised when too many Lex calls are already queued."""
+
+
+def env_number(name, default, cast=float):
+    return cast(os.environ.get(name, default))
+
+
+def client_config():
+    """
+    Builds the botocore config for lexv2-runtime from the environment
+
+    LEX_MAX_CONNECTIONS    HTTP connection pool size (default 32)
+    LEX_CONNECT_TIMEOUT    seconds to establish a connection (default 2)
+    LEX_READ_TIMEOUT       seconds to wait for a response (default 5)
+    LEX_MAX_ATTEMPTS       total attempts including retries (default 3)
+    LEX_RETRY_MODE         botocore retry mode (default adaptive)
+    """
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=env_number("LEX_MAX_CONNECTIONS", 32, int),
+        connect_timeout=env_number("LEX_CONNECT_TIMEOUT", 2),
+        read_timeout=env_number("LEX_READ_TIMEOUT", 5),
+        retries={
+            "mode": os.environ.get("LEX_RETRY_MODE", "adaptive"),
+            "total_max_attempts": env_number("LEX_MAX_ATTEMPTS", 3, int),
+        },
+        tcp_keepalive=True,
+    )
+
+
+def create_client():
+    # boto3 is imported here rather than at module level; it is the largest
+    # import of the API and is not needed for /health or local answers
+    import boto3
+
+    return boto3.client("lexv2-runtime", config=client_config())
+
+
+class LexRunner:
+    """
+    Runs blocking Lex calls off the event loop with bounded concurrency.
+
+    Calls execute on a dedicated thread pool sized to the connection pool,
+    so at most max_concurrency requests are in flight and the default
+    threadpool stays free. At most max_queue further calls may wait; beyond
+    that, and whenever a call misses its deadline, the caller gets an
+    exception straight away and can answer with a fallback.
+
+    Arguments:-
+        max_concurrency: worker threads, i.e. concurrent Lex calls
+        max_queue: calls allowed to wait for a worker
+        timeout: overall deadline per call in seconds, queueing included
+    """
+
+    def __init__(self, max_concurrency=32, max_queue=64, timeout=6.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="lex")
+        self._lock = threading.Lock()
+        self.pending = 0
+
+    @classmethod
+    def from_env(cls):
+        max_concurrency = env_number("LEX_MAX_CONCURRENCY", env_number("LEX_MAX_CONNECTIONS", 32, int), int)
+        return cls(
+            max_concurrency=max_concurrency,
+            max_queue=env_number("LEX_MAX_QUEUE", 2 * max_concurrency, int),
+            timeout=env_number("LEX_TIMEOUT_SECONDS", 6),
+        )
+
+    def _admit(self):
+        with self._lock:
+            if self.pending >= self.max_concurrency + self.max_queue:
+                raise LexOverloaded(f"{self.pending} Lex calls already pending")
+            self.pending += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, function, **kwargs):
+        """
+        Awaits function(**kwargs) on the Lex thread pool
+
+        Raises:-
+            LexOverloaded: the queue is full
+            asyncio.TimeoutError: the deadline passed; a call that had not
+                                  started yet is dropped from the queue
+        """
+        self._admit()
+        future = self._executor.submit(function, **kwargs)
+        future.add_done_callback(self._release)
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
@@ -0,0 +1,125 @@
+"""Local pattern matcher that answers common utterances without calling Lex."""
+from collections import namedtuple
+import json
+import os
+import re
+
+INTENT_NAME = "GetMusicRecommendation"
+SLOT_PATTERN = r"[\w'-]+"
+
+LocalIntent = namedtuple("LocalIntent", ["intent", "slots"])
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+_NOISE = re.compile(r"[^\w\s'-]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text):
+    """Lower-cases text and strips punctuation so templates and input line up."""
+    return _SPACES.sub(" ", _NOISE.sub(" ", text.lower())).strip()
+
+
+def bot_definition_path():
+    """
+    Locates bot_definition.json
+
+    It sits next to this module inside the Lambda bundle and one level up
+    in the source tree. BOT_DEFINITION_PATH overrides both.
+    """
+    if os.environ.get("BOT_DEFINITION_PATH"):
+        return os.environ["BOT_DEFINITION_PATH"]
+    here = os.path.dirname(os.path.abspath(__file__))
+    for directory in (here, os.path.dirname(here)):
+        path = os.path.join(directory, "bot_definition.json")
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError("bot_definition.json not found")
+
+
+def load_bot_definition(path=None):
+    with open(path or bot_definition_path(), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compile_templates(templates):
+    """
+    Compiles utterance templates into one anchored regex over normalized text
+
+    Returns:-
+        (pattern, slot_groups) where a match's lastgroup is "t<index>" of the
+        template that matched and slot_groups[index] maps each slot name to
+        the regex group holding its value
+    """
+    alternatives = []
+    slot_groups = []
+    for index, template in enumerate(templates):
+        parts = []
+        groups = {}
+        for i, piece in enumerate(_PLACEHOLDER.split(template)):
+            if i % 2:
+                group = f"t{index}_{piece}"
+                groups[piece] = group
+                parts.append(f"(?P<{group}>{SLOT_PATTERN})")
+            elif normalize(piece):
+                parts.append(re.escape(normalize(piece)))
+        alternatives.append(f"(?P<t{index}>{' '.join(parts)})")
+        slot_groups.append(groups)
+    return re.compile("^(?:" + "|".join(alternatives) + ")$"), slot_groups
+
+
+class LocalMatcher:
+    """
+    Matches messages against the bot's sample utterance templates.
+
+    All templates are compiled into a single anchored regex. A message is
+    only answered locally when it fully matches a template, fills the
+    required mood slot and every slot value is a tag the catalog knows;
+    anything else (no mood yet, unknown words, free text) is left to Lex,
+    which owns slot elicitation and multi-turn dialogs.
+
+    Arguments:-
+        templates: sample utterances with {slot} placeholders
+        moods: mood vocabulary accepted for the mood slot
+        genres: genre vocabulary accepted for the genre slot
+    """
+
+    def __init__(self, templates, moods, genres):
+        self.vocabulary = {"mood": frozenset(moods), "genre": frozenset(genres)}
+        self.templates = [t for t in templates if "{mood}" in t]
+        self.pattern, self.slot_groups = compile_templates(self.templates)
+
+    @classmethod
+    def from_bot_definition(cls, catalog, definition=None):
+        definition = definition or load_bot_definition()
+        templates = definition["intents"][INTENT_NAME]["sample_utterances"]
+        return cls(templates, catalog.moods, catalog.genres)
+
+    def match(self, message):
+        """
+        Returns a LocalIntent for messages safe to answer locally, else None
+
+        Arguments:-
+            message: raw user message
+        """
+        found = self.pattern.match(normalize(message))
+        if not found:
+            return None
+        groups = self.slot_groups[int(found.lastgroup[1:])]
+        slots = {slot: found.group(group) for slot, group in groups.items()}
+        for slot, value in slots.items():
+            if value not in self.vocabulary[slot]:
+                return None
+        return LocalIntent(INTENT_NAME, slots)
+
+    def spot(self, message):
+        """
+        Picks known mood and genre tags out of free text, first one per slot
+
+        Looser than match(); only meant for answering when Lex is unavailable.
+        """
+        slots = {}
+        for word in normalize(message).split():
+            for slot, vocabulary in self.vocabulary.items():
+                if word in vocabulary:
+                    slots.setdefault(slot, word)
+        return slots
@@ -0,0 +1,231 @@
+"""Circuit breaker around Lex and per-client admission control."""
+from collections import OrderedDict, deque
+import math
+import threading
+import time
+
+from lex_runtime import env_number
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency that is failing or slow, and probes for recovery.
+
+    Closed, the outcomes of the last `window` calls are kept. Once at least
+    `min_calls` are recorded and the share of failures reaches
+    `failure_rate`, or the share of calls slower than `slow_call_seconds`
+    reaches `slow_call_rate`, the breaker opens: allow() answers False, so
+    callers skip the dependency instead of waiting out its timeout. After
+    `open_seconds` it goes half-open and lets `probes` calls through. If all
+    of them succeed in time it closes again, and any failure reopens it.
+
+    Arguments:-
+        window: outcomes considered while closed
+        min_calls: outcomes needed before the breaker may open
+        failure_rate: failure share that opens it, 0-1
+        slow_call_seconds: calls at least this slow count as slow
+        slow_call_rate: slow share that opens it, 0-1
+        open_seconds: time spent open before probing
+        probes: trial calls allowed while half-open
+        clock: time source, monotonic seconds
+    """
+
+    def __init__(self, window=20, min_calls=5, failure_rate=0.5, slow_call_seconds=2.0,
+                 slow_call_rate=0.5, open_seconds=10.0, probes=2, clock=time.monotonic):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        # (failed, slow) per call
+        self._outcomes = deque(maxlen=window)
+        self._probes_started = 0
+        self._probes_passed = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            window=env_number("LEX_BREAKER_WINDOW", 20, int),
+            min_calls=env_number("LEX_BREAKER_MIN_CALLS", 5, int),
+            failure_rate=env_number("LEX_BREAKER_FAILURE_RATE", 0.5),
+            slow_call_seconds=env_number("LEX_BREAKER_SLOW_SECONDS", 2.0),
+            slow_call_rate=env_number("LEX_BREAKER_SLOW_RATE", 0.5),
+            open_seconds=env_number("LEX_BREAKER_OPEN_SECONDS", 10.0),
+            probes=env_number("LEX_BREAKER_PROBES", 2, int),
+        )
+
+    def allow(self):
+        """Returns True when a call may go ahead; every allowed call must be record()ed or cancel()led."""
+        with self._lock:
+            if self.state == OPEN:
+                if self.clock() - self.opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probes_started = self._probes_passed = 0
+            if self.state == HALF_OPEN:
+                if self._probes_started >= self.probes:
+                    self.rejected += 1
+                    return False
+                self._probes_started += 1
+            return True
+
+    def record(self, failed, seconds):
+        """
+        Records the outcome of an allowed call
+
+        Arguments:-
+            failed: the call raised, or answered with an error
+            seconds: how long it took
+        """
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed or slow:
+                    self._open()
+                else:
+                    self._probes_passed += 1
+                    if self._probes_passed >= self.probes:
+                        self.state = CLOSED
+                        self._outcomes.clear()
+                return
+            if self.state == OPEN:
+                # A call allowed before the breaker opened, finishing late
+                return
+            self._outcomes.append((failed, slow))
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            failures = sum(f for f, _ in self._outcomes)
+            slow_calls = sum(s for _, s in self._outcomes)
+            if failures >= self.failure_rate * calls or slow_calls >= self.slow_call_rate * calls:
+                self._open()
+
+    def cancel(self):
+        """Hands back an allowed call that never reached the dependency, recording nothing."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes_started:
+                self._probes_started -= 1
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self.times_opened += 1
+        self._outcomes.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": sum(f for f, _ in self._outcomes),
+                "recent_slow_calls": sum(s for _, s in self._outcomes),
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+class AdmissionControl:
+    """
+    Token bucket per client, kept per warm container.
+
+    Each client gets `burst` tokens, refilled at `rate` per second; a
+    request spends one. Buckets of the least recently seen clients are
+    dropped beyond `max_clients`, which only ever lets a forgotten client
+    start again with a full bucket.
+
+    Off unless a rate is set: behind a proxy or load balancer every client
+    shares one address. The CDK stack enables it for API Gateway.
+
+    Arguments:-
+        rate: tokens added per second; 0 or less disables admission control
+        burst: bucket size
+        max_clients: buckets kept
+        clock: time source, monotonic seconds
+    """
+
+    def __init__(self, rate=0.0, burst=20, max_clients=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        self.admitted = 0
+        self.throttled = 0
+        # client -> (tokens, last refill)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            rate=env_number("ADMISSION_RATE", 0.0),
+            burst=env_number("ADMISSION_BURST", 20, int),
+            max_clients=env_number("ADMISSION_MAX_CLIENTS", 10000, int),
+        )
+
+    def admit(self, client):
+        """
+        Spends a token of client's bucket
+
+        Returns:-
+            0 when admitted, else the seconds until a token is available
+        """
+        if self.rate <= 0:
+            return 0
+        now = self.clock()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            admitted = tokens >= 1
+            if admitted:
+                tokens -= 1
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            if admitted:
+                self.admitted += 1
+                return 0
+            self.throttled += 1
+            return (1 - tokens) / self.rate
+
+    @staticmethod
+    def retry_after(wait):
+        """Retry-After header value, whole seconds rounded up."""
+        return str(max(1, math.ceil(wait)))
+
+    def stats(self):
+        with self._lock:
+            clients = len(self._buckets)
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "clients": clients,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+        }
+
+
+def is_lex_fault(error):
+    """
+    True when an exception from recognize_text says Lex itself is unhealthy
+
+    Client errors such as a rejected request are the caller's fault and do
+    not count against the breaker; throttling (429) and 5xx errors do.
+    """
+    response = getattr(error, "response", None)
+    if not isinstance(response, dict):
+        return True
+    status = (response.get("ResponseMetadata") or {}).get("HTTPStatusCode") or 500
+    return status == 429 or status >= 500
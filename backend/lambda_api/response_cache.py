@@ -0,0 +1,113 @@
+"""
+Bounded LRU + TTL cache for Lex recognize_text responses.
+
+A sessionState sent with a message replaces Lex's own, so the reply depends
+only on the message and that state: the dialog (intent, slots, what Lex is
+asking for) and the session attributes (songs already heard, playlist
+size, user). Both make up the key. Sessions that send the same message in
+the same state, such as every new session confirming a "happy" request,
+share an entry.
+"""
+from collections import OrderedDict
+import json
+import threading
+import time
+
+from local_nlu import normalize
+
+# Dialog actions that continue a conversation. Their replies depend on the
+# session they were produced in, so they are never reused.
+MULTI_TURN_ACTIONS = frozenset({"ElicitSlot", "ConfirmIntent", "ElicitIntent"})
+
+
+class ResponseCache:
+    """
+    In-process LRU cache with per-entry time-to-live.
+
+    Entries are kept in an OrderedDict in recency order, so lookups,
+    inserts and evictions are all O(1) and memory is capped at max_entries.
+
+    Arguments:-
+        max_entries: capacity; 0 disables caching
+        ttl_seconds: how long an entry may be served
+        clock: monotonic time source, replaceable in tests
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def key(text, bot_id, bot_alias_id, locale_id, session_state=None):
+        """
+        Arguments:-
+            text: message, normalized so spacing, case and punctuation do not matter
+            session_state: the sessionState sent to Lex with it, if any
+        """
+        state = json.dumps(session_state or {}, sort_keys=True, separators=(",", ":"))
+        return (bot_id, bot_alias_id, locale_id, normalize(text), state)
+
+    @staticmethod
+    def cacheable(response):
+        """
+        Only responses that end the dialog are replayed; the session
+        attributes they carry follow from the state in the key.
+        """
+        session_state = response.get("sessionState", {})
+        action = session_state.get("dialogAction", {}).get("type")
+        return action not in MULTI_TURN_ACTIONS
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
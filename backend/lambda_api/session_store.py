@@ -0,0 +1,108 @@
+"""Pluggable per-session dialog state stores with idle expiry."""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from response_cache import ResponseCache
+
+
+class MemorySessionStore:
+    """
+    Sessions kept in process memory, LRU-bounded with an idle TTL.
+
+    Suits a single warm Lambda container or one uvicorn worker; state is
+    lost when the process goes away.
+
+    Arguments:-
+        ttl_seconds: idle time after which a session is forgotten
+        max_entries: number of sessions kept before the least recent is evicted
+    """
+
+    def __init__(self, ttl_seconds=300.0, max_entries=10000, clock=time.monotonic):
+        self._entries = ResponseCache(max_entries=max_entries, ttl_seconds=ttl_seconds, clock=clock)
+
+    def get(self, session_id):
+        return self._entries.get(session_id)
+
+    def put(self, session_id, state):
+        # Writing refreshes the TTL, so it measures idle time
+        self._entries.put(session_id, state)
+
+    def delete(self, session_id):
+        self._entries.discard(session_id)
+
+    def stats(self):
+        return self._entries.stats()
+
+
+class SqliteSessionStore:
+    """
+    Sessions kept in a local SQLite file, shared by every process on the host.
+
+    On Lambda the file lives in /tmp, so it survives across invocations of a
+    warm container; under uvicorn it is shared between workers.
+
+    Arguments:-
+        path: database file, created if missing
+        ttl_seconds: idle time after which a session is forgotten
+    """
+
+    def __init__(self, path, ttl_seconds=300.0, clock=time.time):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions "
+            "(id TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at)")
+
+    def get(self, session_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state FROM sessions WHERE id = ? AND expires_at > ?", (session_id, self.clock())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id, state):
+        now = self.clock()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (id, state, expires_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(state), now + self.ttl_seconds),
+            )
+            self._db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+
+    def delete(self, session_id):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._db.execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (self.clock(),)
+            ).fetchone()
+        return {"entries": entries, "ttl_seconds": self.ttl_seconds}
+
+
+def create_session_store(default_ttl):
+    """
+    Builds the store selected by the environment
+
+    SESSION_STORE          memory (default) or sqlite
+    SESSION_TTL_SECONDS    idle expiry, defaults to the bot's idle session TTL
+    SESSION_MAX_ENTRIES    memory store capacity (default 10000)
+    SESSION_DB_PATH        sqlite file (default /tmp/chat_sessions.sqlite3)
+    """
+    ttl = float(os.environ.get("SESSION_TTL_SECONDS", default_ttl))
+    backend = os.environ.get("SESSION_STORE", "memory").lower()
+    if backend == "sqlite":
+        return SqliteSessionStore(os.environ.get("SESSION_DB_PATH", "/tmp/chat_sessions.sqlite3"), ttl)
+    if backend == "memory":
+        return MemorySessionStore(ttl, int(os.environ.get("SESSION_MAX_ENTRIES", "10000")))
+    raise ValueError(f"Unknown SESSION_STORE {backend!r}, expected memory or sqlite")
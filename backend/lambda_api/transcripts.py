@@ -0,0 +1,256 @@
+"""
+Conversation transcripts, written in batches off the request path.
+
+Handlers call TranscriptLogger.log(), which only appends to a bounded
+in-memory queue. A background thread hands full batches (or whatever has
+waited flush_seconds) to a sink: stdout for CloudWatch, local JSONL or
+Parquet files, or S3 objects.
+
+On Lambda the worker only runs while an invocation does. Records still
+queued when the container freezes are written at the start of the next
+invocation, before its own work, with flush(max_age=...) bounded by a
+timeout; anything left over goes to the worker (wake). Records dropped on a
+full queue or lost to a failing sink are counted, and new_losses() reports
+them once each so every invocation can emit the count as a metric.
+"""
+from collections import deque
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+
+class StdoutSink:
+    """One JSON line per turn on stdout, picked up by CloudWatch Logs."""
+
+    def write(self, records):
+        sys.stdout.write("".join(json.dumps(r) + "\n" for r in records))
+        sys.stdout.flush()
+
+
+class JsonlSink:
+    """Appends turns to a local JSON-lines file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, records):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+
+
+class ParquetSink:
+    """Writes each batch as a Parquet file in a directory. Needs pyarrow."""
+
+    def __init__(self, directory):
+        import pyarrow.parquet  # noqa: F401  fail at startup, not in the worker
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, records):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        # Nested values are stored as JSON text so every file has the same schema
+        rows = [{k: json.dumps(v) if isinstance(v, dict) else v for k, v in r.items()} for r in records]
+        pq.write_table(pa.Table.from_pylist(rows), os.path.join(self.directory, object_name("parquet")))
+
+
+class S3Sink:
+    """Uploads each batch as one JSON-lines object under a date prefix."""
+
+    def __init__(self, bucket, prefix="transcripts/", client=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client
+
+    def write(self, records):
+        if self.client is None:
+            import boto3
+            self.client = boto3.client("s3")
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + datetime.datetime.now(datetime.timezone.utc).strftime("%Y/%m/%d/") + object_name("jsonl"),
+            Body="".join(json.dumps(r) + "\n" for r in records).encode("utf-8"),
+            ContentType="application/x-ndjson",
+        )
+
+
+def object_name(suffix):
+    return f"{time.strftime('%H%M%S', time.gmtime())}-{uuid.uuid4().hex}.{suffix}"
+
+
+class TranscriptLogger:
+    """
+    Bounded queue drained in batches by a background thread.
+
+    log() never blocks and never does I/O. When the queue is full a record is
+    dropped instead: the oldest queued one by default, or the incoming one
+    with drop_policy="newest". As soon as a full batch is queued (or the
+    queue is half full) the worker is woken rather than waiting for
+    flush_seconds.
+
+    Arguments:-
+        sink: object with write(records)
+        max_queue: records held before dropping
+        batch_size: records per sink write
+        flush_seconds: longest a record waits in the queue while the process runs
+        drop_policy: "oldest" or "newest"
+    """
+
+    def __init__(self, sink, max_queue=10000, batch_size=500, flush_seconds=1.0, drop_policy="oldest"):
+        if drop_policy not in ("oldest", "newest"):
+            raise ValueError(f"Unknown drop policy {drop_policy!r}, expected oldest or newest")
+        self.sink = sink
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.drop_policy = drop_policy
+        self._queue = deque()
+        self._lock = threading.Lock()
+        # Serializes sink writes between the worker and flush()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = None
+        self.logged = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._reported_losses = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds the logger selected by the environment, or None when disabled
+
+        TRANSCRIPT_SINK           stdout (default), jsonl, parquet, s3 or off
+        TRANSCRIPT_PATH           jsonl file or parquet directory
+        TRANSCRIPT_BUCKET         s3 bucket, with TRANSCRIPT_PREFIX (default transcripts/)
+        TRANSCRIPT_QUEUE_SIZE     queued records before dropping (default 10000)
+        TRANSCRIPT_BATCH_SIZE     records per write (default 500)
+        TRANSCRIPT_FLUSH_SECONDS  longest wait before a write (default 1)
+        TRANSCRIPT_DROP_POLICY    oldest (default) or newest
+        """
+        kind = os.environ.get("TRANSCRIPT_SINK", "stdout").lower()
+        if kind == "off":
+            return None
+        if kind == "stdout":
+            sink = StdoutSink()
+        elif kind == "jsonl":
+            sink = JsonlSink(os.environ.get("TRANSCRIPT_PATH", "/tmp/transcripts.jsonl"))
+        elif kind == "parquet":
+            sink = ParquetSink(os.environ.get("TRANSCRIPT_PATH", "/tmp/transcripts"))
+        elif kind == "s3":
+            sink = S3Sink(os.environ["TRANSCRIPT_BUCKET"], os.environ.get("TRANSCRIPT_PREFIX", "transcripts/"))
+        else:
+            raise ValueError(f"Unknown TRANSCRIPT_SINK {kind!r}, expected stdout, jsonl, parquet, s3 or off")
+        return cls(
+            sink,
+            max_queue=int(os.environ.get("TRANSCRIPT_QUEUE_SIZE", "10000")),
+            batch_size=int(os.environ.get("TRANSCRIPT_BATCH_SIZE", "500")),
+            flush_seconds=float(os.environ.get("TRANSCRIPT_FLUSH_SECONDS", "1")),
+            drop_policy=os.environ.get("TRANSCRIPT_DROP_POLICY", "oldest").lower(),
+        )
+
+    def __len__(self):
+        return len(self._queue)
+
+    def log(self, record):
+        """Queues one record; returns False when it had to be dropped."""
+        with self._lock:
+            self.logged += 1
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                if self.drop_policy == "newest":
+                    return False
+                self._queue.popleft()
+            self._queue.append((time.time(), record))
+            pressure = len(self._queue) >= min(self.batch_size, self.max_queue // 2)
+        if self._worker is None:
+            self._start()
+        if pressure:
+            self._wake.set()
+        return True
+
+    def wake(self):
+        """
+        Lets the worker write records that have outstayed flush_seconds
+
+        That only happens when the worker could not run on time, e.g. while
+        the Lambda container was frozen, so a busy container never pays a
+        thread switch per request. Never blocks.
+        """
+        if self._oldest_age() >= self.flush_seconds:
+            if self._worker is None:
+                self._start()
+            self._wake.set()
+
+    def flush(self, timeout=None, max_age=0.0):
+        """
+        Writes everything queued so far from the calling thread
+
+        With max_age set to flush_seconds it only writes after the worker
+        could not run, i.e. at the start of an invocation that follows a
+        freeze, so a busy container does not pay for it.
+
+        Arguments:-
+            timeout: seconds after which the remaining records stay queued
+            max_age: only flush when the oldest record has waited this long
+        Returns:-
+            number of records still queued
+        """
+        if self._oldest_age() < max_age or not self._queue:
+            return len(self._queue)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue and (deadline is None or time.monotonic() < deadline):
+            self._write_batch()
+        return len(self._queue)
+
+    def new_losses(self):
+        """Records dropped or lost to sink failures since the previous call."""
+        with self._lock:
+            lost = self.dropped + self.failed
+            new, self._reported_losses = lost - self._reported_losses, lost
+        return new
+
+    def stats(self):
+        return {
+            "queued": len(self._queue),
+            "logged": self.logged,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+    def _oldest_age(self):
+        with self._lock:
+            return time.time() - self._queue[0][0] if self._queue else -1.0
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="transcripts", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            while self._queue:
+                self._write_batch()
+
+    def _write_batch(self):
+        with self._write_lock:
+            with self._lock:
+                batch = [self._queue.popleft()[1] for _ in range(min(self.batch_size, len(self._queue)))]
+            if not batch:
+                return
+            try:
+                self.sink.write(batch)
+                self.written += len(batch)
+            except Exception as e:
+                # A failing sink must not take requests down; the batch is lost
+                self.failed += len(batch)
+                print(f"Transcript sink failed, dropped {len(batch)} records: {e!r}")
@@ -1,39 +1,90 @@
 """Fulfillment function for the chatbot"""
+from metrics import Metrics
+from recommender import Recommender, load_catalog
+from recommender.engine import REPLY_TEMPLATE, TRACKS_ATTRIBUTE, served_tracks
+from recommender.mood_vectors import load_mood_vectors
+from recommender.playlist import PlaylistPager, turn_page
+from recommender.profiles import create_profile_store, profile_user
+from recommender.seen import SEEN_ATTRIBUTE, SeenSet
+
+# Per-stage timings, printed as one CloudWatch EMF line per invocation
+metrics = Metrics.from_env("fulfillment")
+
+# Load the catalog once per container so warm invocations only pay for scoring.
+# The mood vector table maps slot values like "pumped" onto catalog moods.
+recommender = Recommender(load_catalog(), load_mood_vectors())
+# Per-user preference vectors, updated after every recommendation
+profiles = create_profile_store(recommender.catalog.dimensions)
+# Rankings of recent playlists, so later pages are slices of a sorted prefix
+playlists = PlaylistPager(recommender)
+
+
+def slot_value(slots, name):
+    """Returns the lower-cased interpreted value of a slot, or ''."""
+    slot = slots.get(name) or {}
+    value = slot.get('value') or {}
+    return (value.get('interpretedValue') or '').lower()
+
+
+def user_id(event):
+    """A userId session attribute set by the client wins over the Lex session."""
+    return profile_user(event['sessionState'].get('sessionAttributes'), event.get('sessionId'))
+
 
 # This function handles the fulfillment of the chatbot's intent based on user input.
 def handler(event, context):
-    genre = None
-    slots = event['sessionState']['intent']['slots'] 
-    mood = slots.get('mood', {}) \
-            .get('value', {}) \
-                .get('interpretedValue', '') \
-                    .lower()
-    if slots["genre"]:
-        genre = slots.get('genre', {}) \
-                .get('value', {}) \
-                    .get('interpretedValue', '') \
-                        .lower()
-
-    # Simple hardcoded recommendations
-    suggestions = {
-        'happy': '🎵 "Happy" by Pharrell Williams',
-        'sad': '🎵 "Someone Like You" by Adele',
-        'energetic': '🎵 "Eye of the Tiger" by Survivor',
-    }
+    # Scheduled warm-up ping: touch the catalog pages a real request reads
+    if event.get('warmup'):
+        recommender.top_k('happy')
+        return {'warmed': True}
+    with metrics.invocation(RequestId=getattr(context, 'aws_request_id', None),
+                            Intent=event['sessionState']['intent']['name']):
+        return fulfill(event)
+
+
+def fulfill(event):
+    slots = event['sessionState']['intent']['slots'] or {}
+    mood = slot_value(slots, 'mood')
+    genre = slot_value(slots, 'genre') or None
+    # Lex replaces the session attributes with the ones returned here
+    attributes = dict(event['sessionState'].get('sessionAttributes') or {})
+
+    user = user_id(event) if profiles is not None else None
+    with metrics.stage('Playlist'):
+        # "Give me 10 more" reaches this Lambda as FallbackIntent
+        more = (event.get('inputTranscript') or '') if event['sessionState']['intent']['name'] == 'FallbackIntent' else None
+        page = turn_page(playlists, attributes, mood, genre, more)
+    if page is not None:
+        return close(event, attributes, page.message)
+
+    profile = profiles.get(user) if user else None
+    with metrics.stage('Rank'):
+        # Skip tracks already served in this session
+        seen = SeenSet.decode(attributes.get(SEEN_ATTRIBUTE), len(recommender.catalog))
+        row = recommender.pick(mood, genre, profile=profile, seen=seen)
+        seen.add(row)
+        attributes[SEEN_ATTRIBUTE] = seen.encode()
+        attributes[TRACKS_ATTRIBUTE] = served_tracks(recommender.catalog, [row])
+    if user:
+        with metrics.stage('Profile'):
+            profiles.update(user, recommender.preference_signal(row))
+    return close(event, attributes, REPLY_TEMPLATE.format(song=recommender.catalog.describe(row)))
 
-    song = suggestions.get(mood, '🎵 "Here Comes the Sun" by The Beatles')
 
+def close(event, attributes, content):
+    """Builds the Lex response fulfilling the intent with one message."""
     response = {
         "sessionState": {
             "dialogAction": {"type": "Close"},
             "intent": {
                 "name": event["sessionState"]["intent"]["name"],
                 "state": "Fulfilled"
-            }
+            },
+            "sessionAttributes": attributes
         },
         "messages": [{
             "contentType": "PlainText",
-            "content": f"Based on your mood, I recommend: {song}"
+            "content": content
         }]
     }
 
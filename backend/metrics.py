@@ -0,0 +1,155 @@
+"""
+Per-invocation stage timings written as CloudWatch Embedded Metric Format.
+
+Shared by both Lambdas (the bundling step copies this file next to each
+handler). A handler wraps its work in metrics.invocation(); code inside it
+times stages with metrics.stage(name) and counts events with
+metrics.count(name). When the invocation ends one EMF JSON line is printed,
+which CloudWatch Logs turns into metrics without any API calls. A stage
+timed more than once per invocation (e.g. Lex calls in a batch) is emitted
+as a list of values, which CloudWatch keeps as a distribution.
+
+METRICS_ENABLED=false turns every call into a no-op and prints nothing.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import time
+
+NAMESPACE = "MoodMusicChatbot"
+# CloudWatch accepts at most 100 values per metric in one EMF document
+MAX_VALUES = 100
+
+
+class Span:
+    """Times one stage and adds it to an invocation."""
+
+    __slots__ = ("invocation", "name", "started")
+
+    def __init__(self, invocation, name):
+        self.invocation = invocation
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.invocation.add(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+class Invocation:
+    """Timings, counters and properties collected during one invocation."""
+
+    __slots__ = ("timings", "counts", "properties")
+
+    def __init__(self, properties):
+        self.timings = {}
+        self.counts = {}
+        self.properties = properties
+
+    def add(self, name, milliseconds):
+        values = self.timings.get(name)
+        if values is None:
+            self.timings[name] = [milliseconds]
+        elif len(values) < MAX_VALUES:
+            values.append(milliseconds)
+
+
+NO_SPAN = contextlib.nullcontext()
+
+
+class Metrics:
+    """
+    Stage timers for one Lambda.
+
+    Arguments:-
+        service: value of the Service dimension, e.g. "api"
+        namespace: CloudWatch namespace
+        enabled: False makes every method a no-op
+        stream: where EMF lines are written, stdout by default
+    """
+
+    def __init__(self, service, namespace=NAMESPACE, enabled=True, stream=None):
+        self.service = service
+        self.namespace = namespace
+        self.enabled = enabled
+        self.stream = stream
+        self.cold_start = True
+        self._current = contextvars.ContextVar(f"metrics_{service}", default=None)
+
+    @classmethod
+    def from_env(cls, service):
+        """METRICS_ENABLED (default true) and METRICS_NAMESPACE configure it."""
+        return cls(
+            service,
+            namespace=os.environ.get("METRICS_NAMESPACE", NAMESPACE),
+            enabled=os.environ.get("METRICS_ENABLED", "true").lower() == "true",
+        )
+
+    @contextlib.contextmanager
+    def invocation(self, **properties):
+        """
+        Collects metrics for one invocation and prints them when it ends
+
+        Arguments:-
+            properties: extra fields for the log line (request id, path...),
+                        searchable in Logs Insights but not metrics
+        """
+        if not self.enabled:
+            yield None
+            return
+        invocation = Invocation(properties)
+        invocation.counts["ColdStart"] = int(self.cold_start)
+        self.cold_start = False
+        token = self._current.set(invocation)
+        span = Span(invocation, "Handler").__enter__()
+        try:
+            yield invocation
+        finally:
+            span.__exit__(None, None, None)
+            self._current.reset(token)
+            self.emit(invocation)
+
+    def stage(self, name):
+        """Context manager timing one stage of the current invocation."""
+        invocation = self._current.get() if self.enabled else None
+        return NO_SPAN if invocation is None else Span(invocation, name)
+
+    def count(self, name, value=1):
+        invocation = self._current.get() if self.enabled else None
+        if invocation is not None:
+            invocation.counts[name] = invocation.counts.get(name, 0) + value
+
+    def set_property(self, name, value):
+        invocation = self._current.get() if self.enabled else None
+        if invocation is not None:
+            invocation.properties[name] = value
+
+    def document(self, invocation):
+        """Builds the EMF document for an invocation."""
+        metrics = [{"Name": f"{name}Ms", "Unit": "Milliseconds"} for name in invocation.timings]
+        metrics += [{"Name": name, "Unit": "Count"} for name in invocation.counts]
+        document = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [["Service"]],
+                    "Metrics": metrics,
+                }],
+            },
+            "Service": self.service,
+        }
+        document.update(invocation.properties)
+        for name, values in invocation.timings.items():
+            document[f"{name}Ms"] = round(values[0], 3) if len(values) == 1 else [round(v, 3) for v in values]
+        document.update(invocation.counts)
+        return document
+
+    def emit(self, invocation):
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps(self.document(invocation)) + "\n")
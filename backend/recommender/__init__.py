@@ -0,0 +1,6 @@
+"""Catalog and ranking code shared by the chatbot Lambdas."""
+from .catalog import Catalog, load_catalog
+from .engine import Recommender
+from .profiles import ProfileStore
+
+__all__ = ["Catalog", "ProfileStore", "Recommender", "load_catalog"]
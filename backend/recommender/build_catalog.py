@@ -0,0 +1,179 @@
+"""
+Converts a CSV or JSON-lines track dump into the binary catalog format.
+
+Usage:
+    python -m recommender.build_catalog tracks.csv catalog.mcat
+    python -m recommender.build_catalog catalog.mcat catalog.mcat --delta changes.csv
+
+CSV files need id, title, artist, moods and genres columns (tags separated
+by "|" or ";") and may have a popularity column. JSON-lines files hold one
+track dict per line with the same keys, tags given as lists.
+
+Delta files use the same format as the ingest deltas (see recommender.ingest):
+each row replaces its track, or adds it, and rows with a true "deleted" field
+or column remove it. --delta merges them into an existing catalog, so adding
+tracks does not need the full dump again.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+
+import numpy as np
+
+from .catalog import Catalog, load_catalog, normalize_tag
+from .catalog_file import write_catalog
+
+TAG_SEPARATOR = re.compile(r"[|;]")
+TRUE_VALUES = {"1", "true", "yes"}
+
+
+def read_records(path):
+    """Yields track dicts from a .csv or .jsonl file."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield {
+                    "id": int(row["id"]),
+                    "title": row["title"],
+                    "artist": row["artist"],
+                    "moods": [t for t in TAG_SEPARATOR.split(row.get("moods") or "") if t.strip()],
+                    "genres": [t for t in TAG_SEPARATOR.split(row.get("genres") or "") if t.strip()],
+                    "popularity": float(row.get("popularity") or 0.0),
+                    # Only meaningful in delta files, see recommender.ingest
+                    "deleted": row.get("deleted") or "",
+                }
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def is_deleted(record):
+    """True for a delta row that removes its track."""
+    deleted = record.get("deleted")
+    if isinstance(deleted, str):
+        return deleted.strip().lower() in TRUE_VALUES
+    return bool(deleted)
+
+
+def record_tags(record, field):
+    return {normalize_tag(t) for t in record.get(field) or () if t.strip()}
+
+
+def merge_delta(catalog, records):
+    """
+    Applies upserts and deletions to a catalog
+
+    Updated tracks keep their rows, deleted ones are dropped and new ones are
+    appended. Tags first seen in the delta extend the vocabulary. Only the
+    delta rows are parsed; the rest of the catalog is copied column-wise.
+
+    Arguments:-
+        catalog: Catalog to update, left unchanged
+        records: delta track dicts, later rows for a track win
+    Returns:-
+        (new Catalog, number of tracks changed)
+    """
+    latest = {}
+    for record in records:
+        latest[int(record["id"])] = record
+    if not latest:
+        return catalog, 0
+    upserts = {track_id: r for track_id, r in latest.items() if not is_deleted(r)}
+
+    moods = catalog.moods + sorted(set().union(*(record_tags(r, "moods") for r in upserts.values())) - set(catalog.moods))
+    genres = catalog.genres + sorted(set().union(*(record_tags(r, "genres") for r in upserts.values())) - set(catalog.genres))
+
+    ids = catalog.track_ids
+    upsert_ids = np.array(sorted(upserts), dtype=np.int64)
+    removed_ids = np.array([i for i in latest if i not in upserts], dtype=np.int64)
+    kept = np.flatnonzero(~np.isin(ids, removed_ids))
+    added = np.setdiff1d(upsert_ids, ids)
+
+    # Old columns keep their order; new mood columns go before the genres
+    old = catalog.features
+    features = np.zeros((len(kept) + len(added), len(moods) + len(genres) + 1), dtype=np.float32)
+    features[:len(kept), :len(catalog.moods)] = old[kept, :len(catalog.moods)]
+    features[:len(kept), len(moods):len(moods) + len(catalog.genres)] = old[kept, len(catalog.moods):-1]
+    features[:len(kept), -1] = old[kept, -1]
+
+    track_ids = np.concatenate([ids[kept], added])
+    titles = [catalog.titles[row] for row in kept.tolist()]
+    artists = [catalog.artists[row] for row in kept.tolist()]
+    titles.extend(upserts[track_id]["title"] for track_id in added.tolist())
+    artists.extend(upserts[track_id]["artist"] for track_id in added.tolist())
+
+    mood_index = {mood: i for i, mood in enumerate(moods)}
+    genre_index = {genre: len(moods) + i for i, genre in enumerate(genres)}
+    rows = np.flatnonzero(np.isin(track_ids, upsert_ids))
+    for row, track_id in zip(rows.tolist(), track_ids[rows].tolist()):
+        record = upserts[track_id]
+        features[row] = 0.0
+        features[row, [mood_index[t] for t in record_tags(record, "moods")]] = 1.0
+        features[row, [genre_index[t] for t in record_tags(record, "genres")]] = 1.0
+        features[row, -1] = float(record.get("popularity") or 0.0)
+        titles[row] = record["title"]
+        artists[row] = record["artist"]
+
+    merged = Catalog(track_ids, titles, artists, features, moods, genres)
+    return merged, len(latest)
+
+
+def build(source, destination):
+    """
+    Builds a binary catalog from a track dump
+
+    Arguments:-
+        source: .csv or .jsonl input path
+        destination: output .mcat path
+    Returns:-
+        (number of tracks, bytes written)
+    """
+    catalog = Catalog.from_records(read_records(source))
+    return len(catalog), write_catalog(catalog, destination)
+
+
+def update(source, destination, deltas):
+    """
+    Merges delta files into an existing catalog and writes the result
+
+    The output is written to a temporary file and moved into place, so
+    destination may be source and readers never see a partial file.
+
+    Arguments:-
+        source: existing .mcat (or .jsonl) catalog
+        destination: output .mcat path
+        deltas: delta .csv or .jsonl paths, applied in order
+    Returns:-
+        (number of tracks, tracks changed, bytes written)
+    """
+    catalog = load_catalog(source)
+    changed = 0
+    for delta in deltas:
+        catalog, count = merge_delta(catalog, read_records(delta))
+        changed += count
+    temporary = destination + ".tmp"
+    size = write_catalog(catalog, temporary)
+    os.replace(temporary, destination)
+    return len(catalog), changed, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="input .csv or .jsonl dump, or the catalog to update with --delta")
+    parser.add_argument("destination", help="output .mcat file")
+    parser.add_argument("--delta", action="append", default=[], help="delta file to merge, repeatable")
+    args = parser.parse_args(argv)
+
+    if args.delta:
+        tracks, changed, size = update(args.source, args.destination, args.delta)
+        print(f"Merged {changed} changes, wrote {tracks} tracks ({size / 1024:.1f} KiB) to {args.destination}")
+        return
+    tracks, size = build(args.source, args.destination)
+    print(f"Wrote {tracks} tracks ({size / 1024:.1f} KiB) to {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
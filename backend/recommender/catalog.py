@@ -0,0 +1,157 @@
+"""Column-oriented track catalog backed by NumPy arrays."""
+import json
+import os
+
+import numpy as np
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(__file__), "data", "catalog.jsonl")
+BINARY_SUFFIX = ".mcat"
+
+
+class Catalog:
+    """
+    Track catalog stored as columns rather than per-track dicts.
+
+    The feature matrix has one row per track and one column per mood tag,
+    one column per genre tag and a final popularity column, so a mood/genre
+    query is a single matrix-vector product.
+
+    Arguments:-
+        track_ids: int array of catalog ids, shape (n,)
+        titles: sequence of track titles, length n
+        artists: sequence of artist names, length n
+        features: float32 matrix, shape (n, len(moods) + len(genres) + 1)
+        moods: ordered mood vocabulary
+        genres: ordered genre vocabulary
+    """
+
+    def __init__(self, track_ids, titles, artists, features, moods, genres):
+        self.track_ids = np.asarray(track_ids, dtype=np.int64)
+        self.titles = titles
+        self.artists = artists
+        self.features = np.asarray(features, dtype=np.float32)
+        self.moods = list(moods)
+        self.genres = list(genres)
+        self.mood_index = {mood: i for i, mood in enumerate(self.moods)}
+        self.genre_index = {genre: len(self.moods) + i for i, genre in enumerate(self.genres)}
+        self.popularity_column = len(self.moods) + len(self.genres)
+        # Set when the columns are views over a memory-mapped catalog file
+        self.mapping = None
+
+        if self.features.shape != (len(self.track_ids), self.popularity_column + 1):
+            raise ValueError(
+                f"feature matrix shape {self.features.shape} does not match "
+                f"{len(self.track_ids)} tracks x {self.popularity_column + 1} columns"
+            )
+
+    def __len__(self):
+        return len(self.track_ids)
+
+    @property
+    def dimensions(self):
+        return self.features.shape[1]
+
+    def describe(self, row):
+        """Formats a catalog row the way the bot presents a song."""
+        return f'🎵 "{self.titles[row]}" by {self.artists[row]}'
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds a catalog from track dicts
+
+        Arguments:-
+            records: iterable of dicts with id, title, artist, moods, genres
+                     and an optional popularity in [0, 1]
+        Returns:-
+            Catalog
+        """
+        records = list(records)
+        moods = sorted({normalize_tag(m) for r in records for m in r.get("moods", [])})
+        genres = sorted({normalize_tag(g) for r in records for g in r.get("genres", [])})
+        mood_index = {m: i for i, m in enumerate(moods)}
+        genre_index = {g: len(moods) + i for i, g in enumerate(genres)}
+
+        features = np.zeros((len(records), len(moods) + len(genres) + 1), dtype=np.float32)
+        for row, record in enumerate(records):
+            for mood in record.get("moods", []):
+                features[row, mood_index[normalize_tag(mood)]] = 1.0
+            for genre in record.get("genres", []):
+                features[row, genre_index[normalize_tag(genre)]] = 1.0
+            features[row, -1] = float(record.get("popularity", 0.0))
+
+        return cls(
+            track_ids=[int(r["id"]) for r in records],
+            titles=[r["title"] for r in records],
+            artists=[r["artist"] for r in records],
+            features=features,
+            moods=moods,
+            genres=genres,
+        )
+
+    @classmethod
+    def from_jsonl(cls, path):
+        """Loads a catalog from a JSON-lines file, one track per line."""
+        with open(path, encoding="utf-8") as f:
+            return cls.from_records(json.loads(line) for line in f if line.strip())
+
+    @classmethod
+    def synthetic(cls, size, moods=None, genres=None, seed=0):
+        """
+        Generates a random catalog, used by benchmarks and tests
+
+        Arguments:-
+            size: number of tracks
+            moods: mood vocabulary, defaults to the bundled catalog's moods
+            genres: genre vocabulary, defaults to the bundled catalog's genres
+            seed: random seed
+        Returns:-
+            Catalog
+        """
+        if moods is None or genres is None:
+            base = load_catalog()
+            moods = base.moods if moods is None else moods
+            genres = base.genres if genres is None else genres
+
+        rng = np.random.default_rng(seed)
+        features = np.zeros((size, len(moods) + len(genres) + 1), dtype=np.float32)
+        # Every track gets one to three moods and exactly one genre
+        mood_hits = rng.random((size, len(moods))) < (2.0 / len(moods))
+        mood_hits[np.arange(size), rng.integers(0, len(moods), size)] = True
+        features[:, :len(moods)] = mood_hits
+        features[np.arange(size), len(moods) + rng.integers(0, len(genres), size)] = 1.0
+        features[:, -1] = rng.random(size, dtype=np.float32)
+
+        ids = np.arange(1, size + 1)
+        return cls(
+            track_ids=ids,
+            titles=[f"Track {i}" for i in ids],
+            artists=[f"Artist {i % 997}" for i in ids],
+            features=features,
+            moods=moods,
+            genres=genres,
+        )
+
+
+def normalize_tag(tag):
+    """Lower-cases and trims a mood/genre tag."""
+    return tag.strip().lower()
+
+
+def load_catalog(path=None):
+    """
+    Loads the catalog named by CATALOG_PATH, falling back to the bundled one
+
+    Binary catalogs (see catalog_file) are memory-mapped, anything else is
+    parsed as JSON lines.
+
+    Arguments:-
+        path: optional explicit path
+    Returns:-
+        Catalog
+    """
+    path = path or os.environ.get("CATALOG_PATH") or DEFAULT_CATALOG_PATH
+    if path.endswith(BINARY_SUFFIX):
+        from .catalog_file import open_catalog
+        return open_catalog(path)
+    return Catalog.from_jsonl(path)
@@ -0,0 +1,169 @@
+"""
+Compact binary catalog format, memory-mapped at load time.
+
+Layout (little endian, every section aligned to 64 bytes):
+
+    header        magic, version, counts and section offsets (HEADER struct)
+    vocab         UTF-8 JSON {"moods": [...], "genres": [...]}
+    track_ids     int64[n]
+    features      float32[n, moods + genres + 1], row-major
+    title_refs    uint32[n]    index into the string table
+    artist_refs   uint32[n]    index into the string table
+    str_offsets   uint64[s + 1]
+    str_blob      UTF-8 bytes of the s interned strings
+
+Loading maps the file read-only and wraps each section with np.frombuffer, so
+nothing is parsed or copied up front and only the pages a query touches are
+read from disk.
+"""
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from .catalog import Catalog
+
+MAGIC = b"MOODCAT\x00"
+VERSION = 1
+ALIGNMENT = 64
+
+# magic, version, n_tracks, n_strings, then (offset, length) of each section
+SECTIONS = ("vocab", "track_ids", "features", "title_refs", "artist_refs", "str_offsets", "str_blob")
+HEADER = struct.Struct("<8sIQQ" + "QQ" * len(SECTIONS))
+
+
+class StringTable:
+    """Interned UTF-8 strings addressed by index, decoded on access."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return bytes(self.blob[start:end]).decode("utf-8")
+
+
+class StringColumn:
+    """Per-track view over a StringTable through an array of references."""
+
+    def __init__(self, table, refs):
+        self.table = table
+        self.refs = refs
+
+    def __len__(self):
+        return len(self.refs)
+
+    def __getitem__(self, row):
+        return self.table[int(self.refs[row])]
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _intern(columns):
+    """Returns (strings, refs per column) with every distinct string stored once."""
+    index = {}
+    strings = []
+    refs = []
+    for column in columns:
+        column_refs = np.empty(len(column), dtype=np.uint32)
+        for row, value in enumerate(column):
+            ref = index.get(value)
+            if ref is None:
+                ref = index[value] = len(strings)
+                strings.append(value)
+            column_refs[row] = ref
+        refs.append(column_refs)
+    return strings, refs
+
+
+def write_catalog(catalog, path):
+    """
+    Serializes a Catalog into the binary format
+
+    Arguments:-
+        catalog: Catalog to write
+        path: output file path
+    Returns:-
+        number of bytes written
+    """
+    strings, (title_refs, artist_refs) = _intern([catalog.titles, catalog.artists])
+    encoded = [s.encode("utf-8") for s in strings]
+    str_offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(s) for s in encoded], out=str_offsets[1:])
+
+    payloads = {
+        "vocab": json.dumps({"moods": catalog.moods, "genres": catalog.genres}).encode("utf-8"),
+        "track_ids": np.ascontiguousarray(catalog.track_ids, dtype=np.int64).tobytes(),
+        "features": np.ascontiguousarray(catalog.features, dtype=np.float32).tobytes(),
+        "title_refs": title_refs.tobytes(),
+        "artist_refs": artist_refs.tobytes(),
+        "str_offsets": str_offsets.tobytes(),
+        "str_blob": b"".join(encoded),
+    }
+
+    layout = []
+    offset = _align(HEADER.size)
+    for name in SECTIONS:
+        layout.extend((offset, len(payloads[name])))
+        offset = _align(offset + len(payloads[name]))
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(catalog), len(strings), *layout))
+        for name, section_offset in zip(SECTIONS, layout[::2]):
+            f.seek(section_offset)
+            f.write(payloads[name])
+        f.truncate(offset)
+    return offset
+
+
+def open_catalog(path):
+    """
+    Memory-maps a binary catalog without copying any column
+
+    Arguments:-
+        path: file written by write_catalog
+    Returns:-
+        Catalog whose arrays are views over the mapping
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, n_tracks, n_strings, *layout = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a binary catalog")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported catalog version {version}")
+    sections = dict(zip(SECTIONS, zip(layout[::2], layout[1::2])))
+
+    def array(name, dtype, count):
+        offset, _ = sections[name]
+        return np.frombuffer(mapped, dtype=dtype, count=count, offset=offset)
+
+    vocab_offset, vocab_length = sections["vocab"]
+    vocab = json.loads(bytes(mapped[vocab_offset:vocab_offset + vocab_length]))
+    dimensions = len(vocab["moods"]) + len(vocab["genres"]) + 1
+
+    blob_offset, blob_length = sections["str_blob"]
+    table = StringTable(
+        array("str_offsets", np.uint64, n_strings + 1),
+        memoryview(mapped)[blob_offset:blob_offset + blob_length],
+    )
+
+    catalog = Catalog(
+        track_ids=array("track_ids", np.int64, n_tracks),
+        titles=StringColumn(table, array("title_refs", np.uint32, n_tracks)),
+        artists=StringColumn(table, array("artist_refs", np.uint32, n_tracks)),
+        features=array("features", np.float32, n_tracks * dimensions).reshape(n_tracks, dimensions),
+        moods=vocab["moods"],
+        genres=vocab["genres"],
+    )
+    # Keep the mapping alive for as long as the catalog's views are
+    catalog.mapping = mapped
+    return catalog
@@ -0,0 +1,140 @@
+"""Vectorized mood/genre scoring over a Catalog."""
+import numpy as np
+
+from .catalog import normalize_tag
+
+# Query weights. A mood match dominates, a genre match refines the ranking
+# and popularity only breaks ties between otherwise equal tracks.
+MOOD_WEIGHT = 1.0
+GENRE_WEIGHT = 0.5
+POPULARITY_WEIGHT = 0.01
+# A user's preference vector nudges the ranking between tracks that match the
+# request about equally; it is small enough never to outweigh a mood match.
+HISTORY_WEIGHT = 0.1
+
+REPLY_TEMPLATE = "Based on your mood, I recommend: {song}"
+# Session attribute naming the catalog track ids the last reply served,
+# comma-separated, so transcripts can log tracks rather than reply text
+TRACKS_ATTRIBUTE = "tracks"
+
+
+def served_tracks(catalog, rows):
+    """Value of TRACKS_ATTRIBUTE for the rows a reply served."""
+    return ",".join(str(int(catalog.track_ids[row])) for row in rows)
+
+
+def best_rows(scores, k):
+    """Returns the rows of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    # Only the k survivors are fully sorted
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class Recommender:
+    """
+    Ranks catalog tracks against a mood and an optional genre.
+
+    Arguments:-
+        catalog: Catalog to rank
+        mood_vectors: optional MoodVectors mapping free-text moods onto
+                      the catalog's mood tags
+    """
+
+    def __init__(self, catalog, mood_vectors=None):
+        self.catalog = catalog
+        self.mood_vectors = mood_vectors
+
+    def mood_column(self, mood):
+        """Feature column for a mood slot value, resolved semantically when it is not a catalog tag."""
+        tag = normalize_tag(mood)
+        column = self.catalog.mood_index.get(tag)
+        if column is None and self.mood_vectors is not None:
+            column = self.catalog.mood_index.get(self.mood_vectors.resolve(tag))
+        return column
+
+    def query_vector(self, mood=None, genre=None, profile=None):
+        """
+        Builds the query vector for a mood/genre pair
+
+        Moods outside the catalog vocabulary go through mood_vectors first.
+        Tags that still match nothing contribute nothing, so an unrecognised
+        mood falls back to the most popular tracks. A user profile is blended in
+        here, so personalised ranking still costs one matrix-vector product.
+        """
+        catalog = self.catalog
+        if profile is None:
+            query = np.zeros(catalog.dimensions, dtype=np.float32)
+        else:
+            query = np.multiply(profile, HISTORY_WEIGHT, dtype=np.float32)
+        if mood:
+            column = self.mood_column(mood)
+            if column is not None:
+                query[column] += MOOD_WEIGHT
+        if genre:
+            column = catalog.genre_index.get(normalize_tag(genre))
+            if column is not None:
+                query[column] += GENRE_WEIGHT
+        query[catalog.popularity_column] = POPULARITY_WEIGHT
+        return query
+
+    def scores(self, mood=None, genre=None, profile=None):
+        """Scores every track in the catalog, shape (n,)."""
+        return self.catalog.features @ self.query_vector(mood, genre, profile)
+
+    def preference_signal(self, row):
+        """Returns a track's tags as a profile update, without popularity."""
+        signal = np.array(self.catalog.features[row], dtype=np.float32)
+        signal[self.catalog.popularity_column] = 0.0
+        return signal
+
+    def top_k(self, mood=None, genre=None, k=1, profile=None):
+        """
+        Returns the catalog rows of the k best tracks, best first
+
+        Arguments:-
+            mood: mood slot value
+            genre: optional genre slot value
+            k: number of tracks to return
+            profile: optional user preference vector
+        Returns:-
+            int array of catalog rows
+        """
+        return best_rows(self.scores(mood, genre, profile), k)
+
+    def pick(self, mood=None, genre=None, profile=None, seen=None):
+        """
+        Returns the catalog row of the best track the session has not heard
+
+        Arguments:-
+            seen: optional SeenSet of rows already served; when every track
+                  has been served the best one is returned again
+        Returns:-
+            int catalog row
+        """
+        scores = self.scores(mood, genre, profile)
+        if not seen:
+            return best_rows(scores, 1)[0]
+        # Widen the candidate list until one of them is new
+        k = len(seen) + 1
+        while True:
+            rows = best_rows(scores, k)
+            fresh = rows[~seen.contains(rows)]
+            if len(fresh):
+                return fresh[0]
+            if k >= len(scores):
+                return rows[0]
+            k *= 4
+
+    def recommend(self, mood=None, genre=None, k=1, profile=None):
+        """Returns the k best tracks formatted for the bot reply."""
+        return [self.catalog.describe(row) for row in self.top_k(mood, genre, k, profile)]
+
+    def reply(self, mood=None, genre=None, profile=None):
+        """Returns the bot's answer for a mood/genre pair."""
+        return REPLY_TEMPLATE.format(song=self.recommend(mood, genre, k=1, profile=profile)[0])
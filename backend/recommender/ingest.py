@@ -0,0 +1,182 @@
+"""
+Streaming ingestion of track dumps into mood and genre inverted indexes.
+
+Usage:
+    python -m recommender.ingest index.npz tracks.csv            # full build
+    python -m recommender.ingest index.npz --delta changes.jsonl  # apply a delta
+
+Rows are read one at a time and never held, so memory grows with the index
+being built rather than with the size of the dump. Each posting list is a
+sorted, duplicate-free int64 array of track IDs.
+
+A delta file has the same format as a dump. Each row replaces the tags of its
+track, and rows with a true "deleted" field (JSON) or column (CSV) remove the
+track. Only the posting lists of tags that gain or lose a track are rewritten.
+"""
+import argparse
+import array
+import os
+import time
+
+import numpy as np
+
+from .build_catalog import is_deleted, read_records, record_tags
+from .catalog import normalize_tag
+
+FIELDS = ("moods", "genres")
+
+
+def normalized(records):
+    """Yields (track id, deleted, {field: set of tags}) for each record."""
+    for record in records:
+        tags = {field: record_tags(record, field) for field in FIELDS}
+        yield int(record["id"]), is_deleted(record), tags
+
+
+class InvertedIndex:
+    """
+    Tag to track ID posting lists for moods and genres.
+
+    Arguments:-
+        postings: {field: {tag: sorted int64 array}}, empty when omitted
+    """
+
+    def __init__(self, postings=None):
+        self.postings = {field: dict((postings or {}).get(field, {})) for field in FIELDS}
+
+    def tracks(self, field, tag):
+        """Returns the sorted track IDs carrying a tag."""
+        return self.postings[field].get(normalize_tag(tag), np.empty(0, dtype=np.int64))
+
+    def query(self, mood=None, genre=None):
+        """Returns the sorted IDs of tracks matching every given tag."""
+        result = None
+        for field, tag in (("moods", mood), ("genres", genre)):
+            if tag:
+                ids = self.tracks(field, tag)
+                result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+        return np.empty(0, dtype=np.int64) if result is None else result
+
+    @property
+    def nbytes(self):
+        return sum(ids.nbytes for field in FIELDS for ids in self.postings[field].values())
+
+    @classmethod
+    def build(cls, rows):
+        """
+        Builds an index from normalized rows in one pass
+
+        Postings are appended to typed arrays (8 bytes per entry) while the
+        rows stream past, then sorted once at the end.
+
+        Arguments:-
+            rows: iterable from normalized(); track IDs are assumed unique
+        Returns:-
+            (InvertedIndex, number of rows read)
+        """
+        buffers = {field: {} for field in FIELDS}
+        count = 0
+        for track_id, deleted, tags in rows:
+            count += 1
+            if deleted:
+                continue
+            for field in FIELDS:
+                field_buffers = buffers[field]
+                for tag in tags[field]:
+                    ids = field_buffers.get(tag)
+                    if ids is None:
+                        ids = field_buffers[tag] = array.array("q")
+                    ids.append(track_id)
+        postings = {field: {} for field in FIELDS}
+        for field in FIELDS:
+            for tag in list(buffers[field]):
+                # Drop each buffer as soon as its posting list exists
+                postings[field][tag] = np.unique(np.frombuffer(buffers[field].pop(tag), dtype=np.int64))
+        return cls(postings), count
+
+    def apply_delta(self, rows):
+        """
+        Applies upserts and deletions, rewriting only the affected postings
+
+        Arguments:-
+            rows: iterable from normalized()
+        Returns:-
+            (rows applied, posting lists rewritten)
+        """
+        latest = {}
+        for track_id, deleted, tags in rows:
+            latest[track_id] = (deleted, tags)
+        if not latest:
+            return 0, 0
+        changed = np.array(sorted(latest), dtype=np.int64)
+
+        touched = 0
+        for field in FIELDS:
+            postings = self.postings[field]
+            wanted = {}
+            for track_id, (deleted, tags) in latest.items():
+                if not deleted:
+                    for tag in tags[field]:
+                        wanted.setdefault(tag, []).append(track_id)
+            for tag in set(postings) | set(wanted):
+                ids = postings.get(tag, np.empty(0, dtype=np.int64))
+                # Changed tracks currently in this posting list
+                positions = np.searchsorted(ids, changed)
+                present = positions < len(ids)
+                present[present] = ids[positions[present]] == changed[present]
+                current = changed[present]
+                target = np.array(sorted(wanted.get(tag, ())), dtype=np.int64)
+                if np.array_equal(current, target):
+                    continue
+                ids = np.delete(ids, positions[present])
+                ids = np.insert(ids, np.searchsorted(ids, target), target)
+                touched += 1
+                if len(ids):
+                    postings[tag] = ids
+                else:
+                    postings.pop(tag, None)
+        return len(latest), touched
+
+    def save(self, path):
+        arrays = {f"{field}/{tag}": ids for field in FIELDS for tag, ids in self.postings[field].items()}
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        postings = {field: {} for field in FIELDS}
+        with np.load(path) as arrays:
+            for key in arrays.files:
+                field, tag = key.split("/", 1)
+                postings[field][tag] = arrays[key]
+        return cls(postings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("index", help="index file (.npz), created or updated")
+    parser.add_argument("source", nargs="?", help="full .csv or .jsonl dump to build from")
+    parser.add_argument("--delta", action="append", default=[], help="delta file to apply, repeatable")
+    args = parser.parse_args(argv)
+    if not args.source and not args.delta:
+        parser.error("give a source dump, --delta files, or both")
+
+    if args.source:
+        start = time.perf_counter()
+        index, count = InvertedIndex.build(normalized(read_records(args.source)))
+        elapsed = time.perf_counter() - start
+        print(f"Indexed {count} tracks in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f} rows/s)")
+    elif os.path.exists(args.index):
+        index = InvertedIndex.load(args.index)
+    else:
+        parser.error(f"{args.index} does not exist; build it from a source dump first")
+
+    for delta in args.delta:
+        applied, touched = index.apply_delta(normalized(read_records(delta)))
+        print(f"Applied {applied} changes from {delta}, rewrote {touched} posting lists")
+
+    index.save(args.index)
+
+
+if __name__ == "__main__":
+    main()
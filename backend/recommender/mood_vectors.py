@@ -0,0 +1,304 @@
+"""
+Semantic mood resolution over a quantized, memory-mapped word-vector table.
+
+The mood slot accepts free text, so users say "pumped", "chill" or "bummed
+out" rather than one of the catalog's mood tags. Those words are mapped to
+the closest catalog mood by cosine similarity against per-mood centroids.
+
+The table is built offline from data/mood_lexicon.json, which lists words
+and phrases for every mood (a word may belong to several). Each vector
+has one dimension per mood and holds the word's normalized memberships. A
+mood's centroid is the mean of its words' vectors, so words shared between
+moods pull related centroids together. Words outside the lexicon
+("chillin", "stressful") get a fastText-style subword vector: the mean of
+the vectors of their character n-grams, fitted so that the n-grams of
+lexicon words reproduce those words' vectors. A word is only resolved
+when most of its n-grams occur in the lexicon, so unrelated words
+("banana") are left alone.
+
+File layout (little endian, every section aligned to 64 bytes, same scheme
+as catalog_file):
+
+    header        magic, version, counts and section offsets (HEADER struct)
+    vocab         UTF-8 JSON {"moods": [...], "terms": [...]}
+    term_q        int8[terms, moods]      lexicon word vectors
+    term_scale    float32[terms]          per-row dequantization scale
+    ngram_keys    uint32[ngrams]          sorted CRC-32 of each n-gram
+    ngram_q       int8[ngrams, moods]     n-gram vectors
+    ngram_scale   float32[ngrams]
+    centroids     float32[moods, moods]   unit length
+
+Usage:
+    python -m recommender.mood_vectors data/mood_lexicon.json mood_vectors.mvec
+"""
+import argparse
+import functools
+import json
+import mmap
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from .catalog import normalize_tag
+from .catalog_file import _align
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_LEXICON_PATH = os.path.join(DATA_DIR, "mood_lexicon.json")
+
+MAGIC = b"MOODVEC\x00"
+VERSION = 1
+SECTIONS = ("vocab", "term_q", "term_scale", "ngram_keys", "ngram_q", "ngram_scale", "centroids")
+# magic, version, n_terms, n_ngrams, n_moods, then (offset, length) of each section
+HEADER = struct.Struct("<8sIIII" + "QQ" * len(SECTIONS))
+
+NGRAM_SIZES = (3, 4, 5)
+# Ridge term of the n-gram fit; larger values shrink vectors of rare n-grams
+RIDGE = 0.5
+# Lowest cosine similarity accepted as a match
+MIN_SIMILARITY = 0.7
+# Share of an unknown word's n-grams that must occur in the lexicon
+MIN_COVERAGE = 0.4
+CACHE_SIZE = 4096
+
+
+def ngram_keys(token):
+    """CRC-32 of the character n-grams of one token, with boundary markers."""
+    marked = f"<{token}>"
+    return [
+        zlib.crc32(marked[i:i + n].encode("utf-8"))
+        for n in NGRAM_SIZES
+        for i in range(len(marked) - n + 1)
+    ]
+
+
+def quantize(matrix):
+    """Symmetric int8 quantization per row; returns (int8 matrix, float32 scales)."""
+    scale = np.abs(matrix).max(axis=1) / 127
+    safe = np.where(scale > 0, scale, 1)
+    q = np.rint(matrix / safe[:, None]).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def unit(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1)
+
+
+class MoodVectors:
+    """
+    Word vectors and mood centroids, usually views over a mapped file.
+
+    Arguments:-
+        moods: mood names, one per vector dimension and centroid
+        terms: lexicon words, one per term_q row
+        term_q, term_scale: quantized word vectors
+        ngram_keys: sorted uint32 n-gram hashes, one per ngram_q row
+        ngram_q, ngram_scale: quantized n-gram vectors
+        centroids: float32 unit vectors, shape (moods, moods)
+    """
+
+    def __init__(self, moods, terms, term_q, term_scale, ngram_keys, ngram_q, ngram_scale, centroids):
+        self.moods = list(moods)
+        self.term_index = {term: i for i, term in enumerate(terms)}
+        self.term_q = term_q
+        self.term_scale = term_scale
+        self.ngram_keys = ngram_keys
+        self.ngram_q = ngram_q
+        self.ngram_scale = ngram_scale
+        self.centroids = centroids
+        # Set when the arrays are views over a memory-mapped file
+        self.mapping = None
+        self.resolve = functools.lru_cache(maxsize=CACHE_SIZE)(self._resolve)
+
+    @classmethod
+    def from_lexicon(cls, lexicon, ridge=RIDGE):
+        """
+        Builds the table from {mood: [words]}
+
+        Arguments:-
+            lexicon: dict of mood to the words and phrases that express it
+            ridge: regularization of the n-gram fit
+        Returns:-
+            MoodVectors
+        """
+        moods = sorted(normalize_tag(mood) for mood in lexicon)
+        mood_index = {mood: i for i, mood in enumerate(moods)}
+        members = {}
+        for mood, words in lexicon.items():
+            for word in [mood, *words]:
+                members.setdefault(normalize_tag(word), set()).add(mood_index[normalize_tag(mood)])
+        terms = sorted(members)
+
+        targets = np.zeros((len(terms), len(moods)), dtype=np.float64)
+        for row, term in enumerate(terms):
+            targets[row, list(members[term])] = 1.0
+        targets = unit(targets)
+
+        centroids = np.zeros((len(moods), len(moods)), dtype=np.float64)
+        for row, term in enumerate(terms):
+            centroids[list(members[term])] += targets[row]
+        centroids = unit(centroids)
+
+        # Single words are the mean of their n-gram vectors; phrases are only
+        # matched whole, so filler like "in the" teaches the n-grams nothing.
+        # With more n-grams than words the minimum-norm ridge solution is
+        # G = A^T (A A^T + rI)^-1 T.
+        words = [row for row, term in enumerate(terms) if " " not in term]
+        hashed = [ngram_keys(terms[row]) for row in words]
+        keys = np.unique(np.concatenate([np.array(h, dtype=np.uint32) for h in hashed]))
+        features = np.zeros((len(words), len(keys)), dtype=np.float64)
+        for i, row_keys in enumerate(hashed):
+            np.add.at(features[i], np.searchsorted(keys, np.array(row_keys, dtype=np.uint32)), 1.0 / len(row_keys))
+        gram = features @ features.T + ridge * np.eye(len(words))
+        ngram_vectors = features.T @ np.linalg.solve(gram, targets[words])
+
+        term_q, term_scale = quantize(targets)
+        ngram_q, ngram_scale = quantize(ngram_vectors)
+        return cls(moods, terms, term_q, term_scale, keys, ngram_q, ngram_scale, centroids.astype(np.float32))
+
+    @property
+    def nbytes(self):
+        """Size of the vector arrays."""
+        arrays = (self.term_q, self.term_scale, self.ngram_keys, self.ngram_q, self.ngram_scale, self.centroids)
+        return sum(a.nbytes for a in arrays)
+
+    def token_vector(self, token):
+        """
+        Dequantized vector of one word, from the lexicon or its n-grams
+
+        Returns None for a word outside the lexicon whose n-grams are mostly
+        unknown.
+        """
+        row = self.term_index.get(token)
+        if row is not None:
+            return self.term_q[row] * self.term_scale[row]
+        keys = np.array(ngram_keys(token), dtype=np.uint32)
+        rows = np.searchsorted(self.ngram_keys, keys).clip(max=len(self.ngram_keys) - 1)
+        rows = rows[self.ngram_keys[rows] == keys]
+        if len(rows) < MIN_COVERAGE * len(keys):
+            return None
+        return (self.ngram_q[rows] * self.ngram_scale[rows, None]).mean(axis=0)
+
+    def vector(self, text):
+        """
+        Vector of a word or phrase, None when nothing in it is recognised
+
+        Phrases outside the lexicon average the vectors of their recognised
+        words, so "kinda down" is as sad as "down".
+        """
+        text = normalize_tag(text)
+        row = self.term_index.get(text)
+        if row is not None:
+            return self.term_q[row] * self.term_scale[row]
+        vectors = [v for v in map(self.token_vector, text.replace("-", " ").split()) if v is not None]
+        return np.mean(vectors, axis=0) if vectors else None
+
+    def similarities(self, text):
+        """Cosine similarity of text to every mood centroid, shape (moods,)."""
+        vector = self.vector(text)
+        norm = 0 if vector is None else np.linalg.norm(vector)
+        if norm == 0:
+            return np.zeros(len(self.moods), dtype=np.float32)
+        return self.centroids @ (vector / norm)
+
+    def _resolve(self, text, min_similarity=MIN_SIMILARITY):
+        similarities = self.similarities(text)
+        best = int(np.argmax(similarities))
+        return self.moods[best] if similarities[best] >= min_similarity else None
+
+
+def write_vectors(vectors, path):
+    """
+    Serializes MoodVectors into the binary format
+
+    Returns:-
+        number of bytes written
+    """
+    terms = sorted(vectors.term_index, key=vectors.term_index.get)
+    payloads = {
+        "vocab": json.dumps({"moods": vectors.moods, "terms": terms}).encode("utf-8"),
+        "term_q": np.ascontiguousarray(vectors.term_q, dtype=np.int8).tobytes(),
+        "term_scale": np.ascontiguousarray(vectors.term_scale, dtype=np.float32).tobytes(),
+        "ngram_keys": np.ascontiguousarray(vectors.ngram_keys, dtype=np.uint32).tobytes(),
+        "ngram_q": np.ascontiguousarray(vectors.ngram_q, dtype=np.int8).tobytes(),
+        "ngram_scale": np.ascontiguousarray(vectors.ngram_scale, dtype=np.float32).tobytes(),
+        "centroids": np.ascontiguousarray(vectors.centroids, dtype=np.float32).tobytes(),
+    }
+    layout = []
+    offset = _align(HEADER.size)
+    for name in SECTIONS:
+        layout.extend((offset, len(payloads[name])))
+        offset = _align(offset + len(payloads[name]))
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(terms), len(vectors.ngram_keys), len(vectors.moods), *layout))
+        for name, section_offset in zip(SECTIONS, layout[::2]):
+            f.seek(section_offset)
+            f.write(payloads[name])
+        f.truncate(offset)
+    return offset
+
+
+def open_vectors(path):
+    """Memory-maps a file written by write_vectors without copying any array."""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, n_terms, n_ngrams, n_moods, *layout = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a mood vector table")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported mood vector version {version}")
+    sections = dict(zip(SECTIONS, zip(layout[::2], layout[1::2])))
+
+    def array(name, dtype, shape):
+        offset, _ = sections[name]
+        return np.frombuffer(mapped, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+
+    vocab_offset, vocab_length = sections["vocab"]
+    vocab = json.loads(bytes(mapped[vocab_offset:vocab_offset + vocab_length]))
+    vectors = MoodVectors(
+        vocab["moods"],
+        vocab["terms"],
+        array("term_q", np.int8, (n_terms, n_moods)),
+        array("term_scale", np.float32, (n_terms,)),
+        array("ngram_keys", np.uint32, (n_ngrams,)),
+        array("ngram_q", np.int8, (n_ngrams, n_moods)),
+        array("ngram_scale", np.float32, (n_ngrams,)),
+        array("centroids", np.float32, (n_moods, n_moods)),
+    )
+    vectors.mapping = mapped
+    return vectors
+
+
+def load_mood_vectors(path=None):
+    """
+    Opens the table named by MOOD_VECTORS_PATH, else builds it from the lexicon
+
+    The Lambda bundles ship a prebuilt table, so only local runs pay for
+    the build (tens of milliseconds).
+    """
+    path = path or os.environ.get("MOOD_VECTORS_PATH")
+    if path and os.path.exists(path):
+        return open_vectors(path)
+    with open(DEFAULT_LEXICON_PATH, encoding="utf-8") as f:
+        return MoodVectors.from_lexicon(json.load(f))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("lexicon", help="input JSON {mood: [words]}")
+    parser.add_argument("destination", help="output .mvec file")
+    args = parser.parse_args(argv)
+
+    with open(args.lexicon, encoding="utf-8") as f:
+        vectors = MoodVectors.from_lexicon(json.load(f))
+    size = write_vectors(vectors, args.destination)
+    print(f"{len(vectors.term_index)} terms, {len(vectors.moods)} moods, {len(vectors.ngram_keys)} n-grams, "
+          f"{size} bytes -> {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Paginated playlists with lazily sorted rankings and opaque cursors.
+
+A playlist ranks the catalog once for a mood/genre pair and is read page by
+page. The ranking is a total order (score descending, then catalog row), so
+every container produces the same pages. It is sorted lazily: LazyRanking
+keeps a sorted prefix and extends it by selecting the next best rows with a
+linear-time partition, so page k costs O(n) once plus O(k log k), never a
+full sort. Warm containers keep recent rankings, so later pages are slices
+of the prefix.
+
+Cursors are opaque strings carried in the `playlist` session attribute (or
+returned by the API). They encode the query, the next offset and the
+catalog size, and a cursor for another catalog is rejected.
+
+Pages are formatted into one plain-text message that fits Lex's message
+length limit. A page whose tracks would not fit is shortened, and the cursor
+resumes right after the last track shown.
+"""
+import base64
+import binascii
+from collections import OrderedDict
+import json
+import re
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .catalog import normalize_tag
+from .engine import TRACKS_ATTRIBUTE, served_tracks
+from .seen import SEEN_ATTRIBUTE, SeenSet
+
+PLAYLIST_ATTRIBUTE = "playlist"
+PLAYLIST_SIZE_ATTRIBUTE = "playlistSize"
+CURSOR_VERSION = 1
+MAX_PAGE_SIZE = 25
+# Lex V2 accepts plain-text messages of up to 1000 characters
+LEX_MESSAGE_LIMIT = 1000
+# Rows added to a ranking's sorted prefix at least, per extension
+MIN_CHUNK = 64
+
+# An explicit grammar rather than any sentence containing "more", so "no
+# more", "stop" or "more sad songs" (a new query) do not turn the page:
+# "more", "next page please", "give me 10 more", "can i get some more songs"...
+MORE_REQUEST = re.compile(
+    r"^(?:(?:ok|okay|yes|yeah|please)\s+)?"
+    r"(?:(?:give|show|send|play|get)\s+me\s+|i\s+want\s+|can\s+i\s+(?:have|get)\s+)?"
+    r"(?:(\d+)\s+|some\s+)?(?:more|next)"
+    r"(?:\s+(?:one|ones|song|songs|track|tracks|page|please))*$"
+)
+
+
+def requested_more(text):
+    """
+    Recognises a request for the next page
+
+    Returns:-
+        None when text is not one, 0 for "more" without a count, else the count
+    """
+    found = MORE_REQUEST.match(re.sub(r"[^\w\s]+", " ", (text or "").lower()).strip())
+    if not found:
+        return None
+    return int(found.group(1) or 0)
+
+
+def playlist_size(attributes):
+    """Page size asked for in the session attributes, 1 (single songs) by default."""
+    try:
+        size = int((attributes or {}).get(PLAYLIST_SIZE_ATTRIBUTE) or 1)
+    except ValueError:
+        return 1
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(mood, genre, offset, size, catalog_size):
+    payload = json.dumps([CURSOR_VERSION, mood, genre, offset, size, catalog_size], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, catalog_size):
+    """
+    Reads a cursor written by encode_cursor
+
+    Returns:-
+        (mood, genre, offset, size)
+    Raises:-
+        ValueError: the cursor is malformed or was made for another catalog
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        version, mood, genre, offset, size, size_of_catalog = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError("Malformed playlist cursor") from None
+    if version != CURSOR_VERSION or size_of_catalog != catalog_size:
+        raise ValueError("Playlist cursor is from another catalog")
+    if not all(tag is None or isinstance(tag, str) for tag in (mood, genre)):
+        raise ValueError("Malformed playlist cursor")
+    if not (type(offset) is int and type(size) is int and 1 <= size <= MAX_PAGE_SIZE):
+        raise ValueError("Malformed playlist cursor")
+    if not 0 <= offset < catalog_size:
+        raise ValueError("Playlist cursor is past the end of the playlist")
+    return mood, genre, offset, size
+
+
+class LazyRanking:
+    """
+    Rows of a score vector in (score desc, row asc) order, sorted on demand.
+
+    Arguments:-
+        scores: float array, one score per catalog row
+    """
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.order = np.empty(0, dtype=np.intp)
+
+    def _after_prefix(self):
+        """Rows that come after the sorted prefix, in row order."""
+        if not len(self.order):
+            return np.arange(len(self.scores))
+        last = self.order[-1]
+        boundary = self.scores[last]
+        return np.flatnonzero((self.scores < boundary) | ((self.scores == boundary) & (np.arange(len(self.scores)) > last)))
+
+    def _extend(self, count):
+        rest = self._after_prefix()
+        take = min(count, len(rest))
+        scores = self.scores[rest]
+        if take < len(rest):
+            # Everything above the take-th best score, then ties by row
+            threshold = -np.partition(-scores, take - 1)[take - 1]
+            above = rest[scores > threshold]
+            ties = rest[scores == threshold][:take - len(above)]
+            chosen = np.concatenate([above, ties])
+        else:
+            chosen = rest
+        chosen = chosen[np.lexsort((chosen, -self.scores[chosen]))]
+        self.order = np.concatenate([self.order, chosen])
+
+    def rows(self, start, stop):
+        """Rows ranked start..stop-1, sorting only as far as stop."""
+        stop = min(stop, len(self.scores))
+        if stop > len(self.order):
+            # Grow geometrically so paging through n rows costs O(n log n) overall
+            self._extend(max(stop - len(self.order), len(self.order), MIN_CHUNK))
+        return self.order[start:stop]
+
+
+def format_page(catalog, rows, offset, limit=LEX_MESSAGE_LIMIT):
+    """
+    Formats a page as one numbered message of at most limit characters
+
+    Returns:-
+        (text, number of rows that fit)
+    """
+    header = "Here is your playlist:" if offset == 0 else "Here are more songs:"
+    footer = 'Say "more" for the next songs.'
+    lines = [header]
+    length = len(header) + 1 + len(footer)
+    used = 0
+    for position, row in enumerate(rows, start=offset + 1):
+        line = f"{position}. {catalog.describe(row)}"
+        if length + len(line) + 1 > limit:
+            break
+        lines.append(line)
+        length += len(line) + 1
+        used += 1
+    lines.append(footer)
+    return "\n".join(lines), used
+
+
+class PlaylistPage(NamedTuple):
+    """One page of a playlist: its first rank, catalog rows, message and next cursor."""
+    offset: int
+    rows: np.ndarray
+    message: str
+    cursor: Optional[str]
+
+
+class PlaylistPager:
+    """
+    Serves playlist pages, keeping the rankings of recent queries.
+
+    Arguments:-
+        recommender: Recommender whose scores are paged
+        cache_size: rankings kept; each holds one float per catalog row
+    """
+
+    def __init__(self, recommender, cache_size=8):
+        self.recommender = recommender
+        self.cache_size = cache_size
+        self._rankings = OrderedDict()
+
+    def ranking(self, mood, genre):
+        key = (mood, genre)
+        ranking = self._rankings.pop(key, None)
+        if ranking is None:
+            ranking = LazyRanking(self.recommender.scores(mood, genre))
+        self._rankings[key] = ranking
+        while len(self._rankings) > self.cache_size:
+            self._rankings.popitem(last=False)
+        return ranking
+
+    def page(self, mood=None, genre=None, size=10, offset=0, limit=LEX_MESSAGE_LIMIT):
+        """
+        One page of a playlist
+
+        Arguments:-
+            mood, genre: query, as for Recommender.scores
+            size: tracks wanted, at most MAX_PAGE_SIZE
+            offset: rank of the first track
+            limit: longest message allowed, None for no limit
+        Returns:-
+            PlaylistPage; its cursor is None at the end of the catalog
+        """
+        mood = normalize_tag(mood) if mood else None
+        genre = normalize_tag(genre) if genre else None
+        size = max(1, min(size, MAX_PAGE_SIZE))
+        catalog = self.recommender.catalog
+        rows = self.ranking(mood, genre).rows(offset, offset + size)
+        message, used = format_page(catalog, rows, offset, limit or float("inf"))
+        rows = rows[:used]
+        following = offset + used
+        cursor = encode_cursor(mood, genre, following, size, len(catalog)) if following < len(catalog) else None
+        return PlaylistPage(offset, rows, message, cursor)
+
+    def resume(self, cursor, size=None, limit=LEX_MESSAGE_LIMIT):
+        """
+        The page after a cursor, optionally with another page size
+
+        Raises:-
+            ValueError: see decode_cursor
+        """
+        mood, genre, offset, cursor_size = decode_cursor(cursor, len(self.recommender.catalog))
+        return self.page(mood, genre, size or cursor_size, offset, limit)
+
+
+def turn_page(pager, attributes, mood=None, genre=None, text=None):
+    """
+    Serves the playlist page a conversational turn asks for, if any
+
+    With text, the turn is a request for more ("give me 10 more") that
+    continues the cursor in attributes. Otherwise a playlistSize attribute
+    above 1 starts a playlist for mood and genre. The page is recorded in
+    attributes.
+
+    Returns:-
+        PlaylistPage, or None when the turn is not about a playlist
+    """
+    if text is not None:
+        cursor = attributes.get(PLAYLIST_ATTRIBUTE)
+        more = requested_more(text)
+        if not cursor or more is None:
+            return None
+        try:
+            page = pager.resume(cursor, size=more or None)
+        except ValueError:
+            # A cursor from an older catalog: the playlist cannot continue
+            attributes.pop(PLAYLIST_ATTRIBUTE, None)
+            return None
+    else:
+        size = playlist_size(attributes)
+        if size == 1:
+            return None
+        page = pager.page(mood, genre, size)
+    remember_page(attributes, page, pager.recommender.catalog)
+    return page
+
+
+def remember_page(attributes, page, catalog):
+    """Records a served page in Lex session attributes: its tracks, seen tracks and the cursor."""
+    seen = SeenSet.decode(attributes.get(SEEN_ATTRIBUTE), len(catalog))
+    for row in page.rows:
+        seen.add(row)
+    attributes[SEEN_ATTRIBUTE] = seen.encode()
+    attributes[TRACKS_ATTRIBUTE] = served_tracks(catalog, page.rows)
+    if page.cursor:
+        attributes[PLAYLIST_ATTRIBUTE] = page.cursor
+    else:
+        attributes.pop(PLAYLIST_ATTRIBUTE, None)
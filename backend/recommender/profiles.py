@@ -0,0 +1,226 @@
+"""
+Per-user preference vectors kept in one fixed-width float32 matrix.
+
+Each user owns one row of a (capacity, dimensions) matrix laid out like the
+catalog's feature columns, and a dict maps user IDs to rows. Updating a
+profile is an exponential moving average over that single row, so the cost
+does not depend on how many users or tracks there are.
+
+With a path the matrix is a memory-mapped file and updates are written in
+place:
+
+    <path>        64-byte header (PROFILE_HEADER) then float32[capacity, dims]
+    <path>.ids    one user ID per line, line i owns row i
+
+New users are appended to the ID file, and the matrix file doubles in size
+when it runs out of rows.
+
+With max_users the store is bounded. The index is kept in least recently
+updated order, and once it is full the oldest EVICT_SHARE of the users are
+dropped together: the remaining rows are compacted to the front of the
+matrix and the ID file is rewritten, so evicting costs O(1) per new user
+on average.
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"MOODPRF\x00"
+VERSION = 1
+HEADER_SIZE = 64
+# magic, version, dimensions, capacity
+PROFILE_HEADER = struct.Struct("<8sIIQ")
+
+LEARNING_RATE = 0.2
+# Share of the users dropped at once when a bounded store is full
+EVICT_SHARE = 0.125
+
+# Session attribute a client sets to tie sessions to one user
+USER_ATTRIBUTE = "userId"
+# Update weight of a feedback event; recommendations themselves count as 1.0
+FEEDBACK_WEIGHTS = {True: 1.0, False: -1.0}
+
+
+def profile_user(attributes, session_id):
+    """A userId session attribute set by the client wins over the session."""
+    return (attributes or {}).get(USER_ATTRIBUTE) or session_id
+
+
+class ProfileStore:
+    """
+    Preference vectors for every known user.
+
+    Arguments:-
+        dimensions: vector width, normally catalog.dimensions
+        path: matrix file; omitted keeps the profiles in memory only
+        learning_rate: share of each new event in the moving average
+        capacity: rows allocated up front
+        max_users: users kept, least recently updated evicted first; None keeps all
+    """
+
+    def __init__(self, dimensions, path=None, learning_rate=LEARNING_RATE, capacity=1024, max_users=None):
+        if max_users is not None and max_users < 1:
+            raise ValueError("max_users must be at least 1")
+        self.dimensions = dimensions
+        self.path = path
+        self.learning_rate = learning_rate
+        self.max_users = max_users
+        self.evicted = 0
+        if max_users is not None:
+            capacity = min(capacity, max_users)
+        self.index = {}
+        self._ids_file = None
+        if path is None:
+            self._vectors = np.zeros((max(capacity, 1), dimensions), dtype=np.float32)
+        elif os.path.exists(path):
+            self._open_file(path)
+        else:
+            self._create_file(path, max(capacity, 1))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, user_id):
+        return user_id in self.index
+
+    @property
+    def capacity(self):
+        return len(self._vectors)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the vector rows currently in use."""
+        return len(self.index) * self.dimensions * 4
+
+    def get(self, user_id):
+        """Returns the user's preference vector, or None for a new user."""
+        row = self.index.get(user_id)
+        return None if row is None else self._vectors[row]
+
+    def update(self, user_id, signal, weight=1.0):
+        """
+        Moves a user's preferences towards (or, with a negative weight,
+        away from) a feature vector
+
+        Arguments:-
+            user_id: user the event belongs to
+            signal: float array of length dimensions, e.g. a track's features
+            weight: 1.0 for a recommendation or like, negative for a dislike
+        Returns:-
+            the updated preference vector
+        """
+        row = self.index.pop(user_id, None)
+        if row is None:
+            row = self._add(user_id)
+        # Most recently updated users stay at the end of the index
+        self.index[user_id] = row
+        vector = self._vectors[row]
+        vector *= 1.0 - self.learning_rate
+        vector += (self.learning_rate * weight) * np.asarray(signal, dtype=np.float32)
+        return vector
+
+    def flush(self):
+        if self.path is not None:
+            self._vectors.flush()
+            self._ids_file.flush()
+
+    def close(self):
+        if self.path is not None:
+            self.flush()
+            self._ids_file.close()
+
+    def _add(self, user_id):
+        if self.path is not None and "\n" in user_id:
+            raise ValueError("User IDs cannot contain line breaks")
+        if self.max_users is not None and len(self.index) >= self.max_users:
+            # More than max_users when a file written with a larger bound was reopened
+            self._evict(len(self.index) - self.max_users + max(1, int(self.max_users * EVICT_SHARE)))
+        row = len(self.index)
+        if row == self.capacity:
+            self._grow(min(self.capacity * 2, self.max_users or self.capacity * 2))
+        self.index[user_id] = row
+        if self._ids_file is not None:
+            self._ids_file.write(user_id + "\n")
+        return row
+
+    def _evict(self, count):
+        """Drops the count least recently updated users and compacts the rest."""
+        kept = list(self.index)[count:]
+        rows = [self.index[user_id] for user_id in kept]
+        self._vectors[:len(rows)] = self._vectors[rows]
+        self._vectors[len(rows):] = 0
+        self.index = {user_id: row for row, user_id in enumerate(kept)}
+        self.evicted += count
+        if self.path is not None:
+            self._vectors.flush()
+            self._ids_file.close()
+            with open(self.path + ".ids.tmp", "w", encoding="utf-8") as f:
+                f.writelines(user_id + "\n" for user_id in kept)
+            os.replace(self.path + ".ids.tmp", self.path + ".ids")
+            self._ids_file = open(self.path + ".ids", "a", encoding="utf-8")
+
+    def _grow(self, capacity):
+        if self.path is None:
+            vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            vectors[:len(self._vectors)] = self._vectors
+            self._vectors = vectors
+            return
+        self._vectors.flush()
+        del self._vectors
+        self._resize_file(capacity)
+        self._map(capacity)
+
+    def _create_file(self, path, capacity):
+        with open(path, "wb"):
+            pass
+        self._resize_file(capacity)
+        self._map(capacity)
+        self._ids_file = open(path + ".ids", "w", encoding="utf-8")
+
+    def _open_file(self, path):
+        with open(path, "rb") as f:
+            magic, version, dimensions, capacity = PROFILE_HEADER.unpack(f.read(PROFILE_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a profile file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported profile file version {version}")
+        if dimensions != self.dimensions:
+            raise ValueError(f"{path} holds {dimensions}-dimensional profiles, expected {self.dimensions}")
+        ids_path = path + ".ids"
+        if os.path.exists(ids_path):
+            with open(ids_path, encoding="utf-8") as f:
+                self.index = {user_id: row for row, user_id in enumerate(f.read().splitlines())}
+        if len(self.index) > capacity:
+            raise ValueError(f"{ids_path} lists more users than {path} holds")
+        self._map(capacity)
+        self._ids_file = open(ids_path, "a", encoding="utf-8")
+
+    def _resize_file(self, capacity):
+        with open(self.path, "r+b") as f:
+            f.write(PROFILE_HEADER.pack(MAGIC, VERSION, self.dimensions, capacity))
+            f.truncate(HEADER_SIZE + capacity * self.dimensions * 4)
+
+    def _map(self, capacity):
+        self._vectors = np.memmap(self.path, dtype=np.float32, mode="r+",
+                                  offset=HEADER_SIZE, shape=(capacity, self.dimensions))
+
+
+def create_profile_store(dimensions):
+    """
+    Builds the store selected by the environment
+
+    PROFILE_STORE       memory (default), file or off
+    PROFILE_PATH        matrix file for the file store (default /tmp/profiles.prf)
+    PROFILE_MAX_USERS   users kept before the least recently updated are evicted
+                        (default 100000, 0 for no limit)
+    """
+    backend = os.environ.get("PROFILE_STORE", "memory").lower()
+    max_users = int(os.environ.get("PROFILE_MAX_USERS", "100000")) or None
+    if backend == "off":
+        return None
+    if backend == "file":
+        return ProfileStore(dimensions, os.environ.get("PROFILE_PATH", "/tmp/profiles.prf"), max_users=max_users)
+    if backend == "memory":
+        return ProfileStore(dimensions, max_users=max_users)
+    raise ValueError(f"Unknown PROFILE_STORE {backend!r}, expected memory, file or off")
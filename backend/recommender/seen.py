@@ -0,0 +1,101 @@
+"""
+Compact set of catalog rows already served in a session.
+
+The set travels in a Lex session attribute, so it is encoded as a short
+string:
+
+    b<count>:<base64 bitset>    one bit per catalog row, exact
+    f<count>:<base64 filter>    Bloom filter, for catalogs too large for a bitset
+
+Catalogs of up to BITSET_MAX_ROWS rows use the exact bitset. Larger ones use a
+BLOOM_BITS-bit Bloom filter, whose false positives only make the session skip
+a track it has not heard. Either way the value stays below MAX_ENCODED_LENGTH
+characters, far inside Lex's session attribute limits.
+"""
+import base64
+import binascii
+import re
+
+import numpy as np
+
+SEEN_ATTRIBUTE = "seen"
+BITSET_MAX_ROWS = 4096
+BLOOM_BITS = 4096
+BLOOM_HASHES = 7
+MAX_ENCODED_LENGTH = 1024
+
+ENCODED = re.compile(r"^([bf])(\d+):([A-Za-z0-9_-]*={0,2})$")
+
+
+def mix(values, seed):
+    """splitmix64 finalizer over a uint64 array."""
+    z = values.astype(np.uint64) + np.uint64(seed)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class SeenSet:
+    """
+    Rows served so far, as a bitset or a Bloom filter over a fixed bit array.
+
+    Arguments:-
+        catalog_size: number of catalog rows
+        bits: packed uint8 bit array, empty when omitted
+        count: rows added so far
+    """
+
+    def __init__(self, catalog_size, bits=None, count=0):
+        self.exact = catalog_size <= BITSET_MAX_ROWS
+        self.size = catalog_size if self.exact else BLOOM_BITS
+        nbytes = (self.size + 7) // 8
+        self.bits = np.zeros(nbytes, dtype=np.uint8) if bits is None else bits
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def _positions(self, rows):
+        """Bit positions for each row, shape (len(rows), hashes)."""
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.uint64))
+        if self.exact:
+            return rows[:, None]
+        # Double hashing: position_i = h1 + i * h2
+        h1 = mix(rows, 0x9E3779B97F4A7C15)[:, None]
+        h2 = mix(rows, 0xD1B54A32D192ED03)[:, None] | np.uint64(1)
+        return (h1 + np.arange(BLOOM_HASHES, dtype=np.uint64) * h2) % np.uint64(self.size)
+
+    def add(self, row):
+        positions = self._positions(row).ravel()
+        np.bitwise_or.at(self.bits, positions // 8, (1 << (positions % 8)).astype(np.uint8))
+        self.count += 1
+
+    def contains(self, rows):
+        """Returns a bool array, True where a row (probably) was served."""
+        positions = self._positions(rows)
+        hits = (self.bits[positions // 8] >> (positions % 8).astype(np.uint8)) & 1
+        return hits.all(axis=1)
+
+    def encode(self):
+        payload = base64.urlsafe_b64encode(self.bits.tobytes()).decode("ascii")
+        return f"{'b' if self.exact else 'f'}{self.count}:{payload}"
+
+    @classmethod
+    def decode(cls, value, catalog_size):
+        """
+        Rebuilds a set from encode() output
+
+        Anything malformed, or encoded for a catalog of another shape, gives
+        an empty set: at worst a session hears a song again.
+        """
+        seen = cls(catalog_size)
+        found = ENCODED.match(value or "")
+        if not found or (found.group(1) == "b") != seen.exact:
+            return seen
+        try:
+            raw = base64.urlsafe_b64decode(found.group(3))
+        except (binascii.Error, ValueError):
+            return seen
+        if len(raw) != len(seen.bits):
+            return seen
+        return cls(catalog_size, np.frombuffer(raw, dtype=np.uint8).copy(), int(found.group(2)))
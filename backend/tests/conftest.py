@@ -0,0 +1,85 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# tools/harness puts backend/ and backend/lambda_api/ on sys.path; the API's
+# helper modules are imported top-level, as they are in its bundle
+sys.path.insert(0, os.path.join(BACKEND_DIR, "tools"))
+
+from harness import load_lambda  # noqa: E402
+
+
+def lex_event(mood=None, genre=None, intent="GetMusicRecommendation"):
+    """Builds a minimal Lex V2 fulfillment event."""
+    def slot(value):
+        if value is None:
+            return None
+        return {"value": {"originalValue": value, "interpretedValue": value}}
+
+    return {
+        "sessionState": {
+            "intent": {
+                "name": intent,
+                "slots": {"mood": slot(mood), "genre": slot(genre)},
+            }
+        }
+    }
+
+
+class RecordingLex:
+    """Stands in for the lexv2-runtime client and records every call."""
+
+    def __init__(self, content="What is your current mood?", dialog_action="ElicitSlot"):
+        self.content = content
+        self.dialog_action = dialog_action
+        self.calls = []
+
+    def recognize_text(self, **kwargs):
+        self.calls.append(kwargs)
+        return {
+            "sessionState": {"dialogAction": {"type": self.dialog_action}},
+            "messages": [{"contentType": "PlainText", "content": self.content}],
+        }
+
+
+@pytest.fixture(scope="session")
+def fulfillment():
+    return load_lambda("lambda_fulfillment")
+
+
+@pytest.fixture(scope="session")
+def api_module():
+    os.environ.setdefault("LEX_BOT_ID", "TESTBOT")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-1")
+    os.environ.setdefault("TRANSCRIPT_SINK", "jsonl")
+    os.environ.setdefault("TRANSCRIPT_PATH", os.devnull)
+    os.environ.setdefault("ADMISSION_RATE", "0")
+    return load_lambda("lambda_api")
+
+
+@pytest.fixture
+def lex(api_module, monkeypatch):
+    fake = RecordingLex()
+    monkeypatch.setattr(api_module, "lex_client", fake)
+    monkeypatch.setattr(api_module, "lex_breaker", api_module.CircuitBreaker())
+    api_module.lex_cache.clear()
+    return fake
+
+
+@pytest.fixture
+def client(api_module, lex):
+    from fastapi.testclient import TestClient
+    return TestClient(api_module.app)
+
+
+@pytest.fixture
+def local_lex(api_module, monkeypatch):
+    from local_lex import LocalLex
+
+    fake = LocalLex()
+    monkeypatch.setattr(api_module, "lex_client", fake)
+    monkeypatch.setattr(api_module, "lex_breaker", api_module.CircuitBreaker())
+    api_module.lex_cache.clear()
+    return fake
@@ -0,0 +1,104 @@
+import json
+
+import numpy as np
+import pytest
+
+from conftest import lex_event
+from recommender import Catalog, Recommender, load_catalog
+from recommender.build_catalog import build, main as build_catalog_main, merge_delta
+from recommender.catalog_file import open_catalog, write_catalog
+
+
+def test_round_trip_is_zero_copy(tmp_path):
+    catalog = load_catalog()
+    path = str(tmp_path / "catalog.mcat")
+    write_catalog(catalog, path)
+
+    mapped = load_catalog(path)
+    assert mapped.moods == catalog.moods and mapped.genres == catalog.genres
+    np.testing.assert_array_equal(mapped.track_ids, catalog.track_ids)
+    np.testing.assert_array_equal(mapped.features, catalog.features)
+    assert [mapped.describe(r) for r in range(len(mapped))] == \
+        [catalog.describe(r) for r in range(len(catalog))]
+    # Columns are read-only views over the mapping, not copies
+    assert not mapped.features.flags.owndata
+    assert not mapped.features.flags.writeable
+    assert Recommender(mapped).recommend("sad") == ['🎵 "Someone Like You" by Adele']
+
+
+def test_strings_are_interned(tmp_path):
+    catalog = Catalog.synthetic(2000, seed=5)
+    path = str(tmp_path / "catalog.mcat")
+    write_catalog(catalog, path)
+    mapped = open_catalog(path)
+    # 2000 titles plus 997 distinct artists
+    assert len(mapped.titles.table) == 2000 + 997
+    assert mapped.artists[1500] == catalog.artists[1500]
+
+
+def test_rejects_foreign_files(tmp_path):
+    path = tmp_path / "bogus.mcat"
+    path.write_bytes(b"\x00" * 512)
+    with pytest.raises(ValueError):
+        open_catalog(str(path))
+
+
+def test_build_from_csv(tmp_path):
+    source = tmp_path / "tracks.csv"
+    source.write_text(
+        "id,title,artist,moods,genres,popularity\n"
+        "7,Song A,Band,Happy|calm,rock,0.5\n"
+        "9,Song B,Band,sad;melancholic,jazz,0.9\n",
+        encoding="utf-8",
+    )
+    destination = str(tmp_path / "tracks.mcat")
+    assert build(str(source), destination)[0] == 2
+
+    catalog = open_catalog(destination)
+    assert catalog.moods == ["calm", "happy", "melancholic", "sad"]
+    assert Recommender(catalog).recommend("sad") == ['🎵 "Song B" by Band']
+
+
+def test_merge_delta_updates_deletes_and_adds():
+    catalog = Catalog.from_records([
+        {"id": 1, "title": "A", "artist": "X", "moods": ["happy"], "genres": ["pop"], "popularity": 0.5},
+        {"id": 2, "title": "B", "artist": "Y", "moods": ["sad"], "genres": ["rock"], "popularity": 0.4},
+        {"id": 3, "title": "C", "artist": "Z", "moods": ["calm"], "genres": ["jazz"], "popularity": 0.3},
+    ])
+    merged, changed = merge_delta(catalog, [
+        {"id": 2, "title": "B2", "artist": "Y", "moods": ["happy", "Dreamy"], "genres": ["rock"]},
+        {"id": 3, "deleted": "true"},
+        {"id": 7, "title": "N", "artist": "W", "moods": ["sad"], "genres": ["Folk"], "popularity": 1.0},
+    ])
+    assert changed == 3 and len(catalog) == 3
+    assert merged.track_ids.tolist() == [1, 2, 7]
+    assert merged.moods == catalog.moods + ["dreamy"] and merged.genres == catalog.genres + ["folk"]
+    expected = Catalog.from_records([
+        {"id": 1, "title": "A", "artist": "X", "moods": ["happy"], "genres": ["pop"], "popularity": 0.5},
+        {"id": 2, "title": "B2", "artist": "Y", "moods": ["happy", "dreamy"], "genres": ["rock"]},
+        {"id": 7, "title": "N", "artist": "W", "moods": ["sad"], "genres": ["folk"], "popularity": 1.0},
+    ])
+    for row in range(3):
+        assert merged.describe(row) == expected.describe(row)
+        for tag, column in {**merged.mood_index, **merged.genre_index}.items():
+            other = {**expected.mood_index, **expected.genre_index}.get(tag)
+            assert merged.features[row, column] == (expected.features[row, other] if other is not None else 0)
+        assert merged.features[row, -1] == expected.features[row, -1]
+
+
+def test_track_added_by_delta_gets_recommended(tmp_path, fulfillment, monkeypatch):
+    path = str(tmp_path / "catalog.mcat")
+    write_catalog(load_catalog(), path)
+    delta = tmp_path / "changes.jsonl"
+    delta.write_text(json.dumps(
+        {"id": 1000, "title": "Brand New Day", "artist": "Newcomer", "moods": ["happy"], "genres": ["pop"],
+         "popularity": 1.0}
+    ) + "\n")
+    build_catalog_main([path, path, "--delta", str(delta)])
+
+    recommender = Recommender(load_catalog(path))
+    assert len(recommender.catalog) == 37
+    monkeypatch.setattr(fulfillment, "recommender", recommender)
+    monkeypatch.setattr(fulfillment, "profiles", None)
+    response = fulfillment.handler(lex_event("happy", "pop"), None)
+    assert response["messages"][0]["content"].endswith('"Brand New Day" by Newcomer')
@@ -0,0 +1,49 @@
+def test_batch_preserves_order_and_dedupes(client, lex):
+    items = [
+        {"message": "Recommend a song"},
+        {"message": "I am in a sad mood"},
+        {"message": "Recommend a song"},
+        {"message": "hello", "session_id": "s1"},
+        {"message": "happy", "session_id": "s1"},
+    ]
+    body = client.post("/chat/batch", json={"items": items}).json()
+    results = body["results"]
+    assert [r["source"] for r in results] == ["lex", "local", "lex", "lex", "lex"]
+    assert results[1]["response"].endswith('"Someone Like You" by Adele')
+    assert body["deduplicated"] == 1
+    # Duplicates share the reply, not the conversation
+    assert results[0]["response"] == results[2]["response"]
+    assert results[0]["session_id"] != results[2]["session_id"]
+    # One call for the duplicated message, two turns for session s1
+    assert len(lex.calls) == 3
+    session_turns = [c["text"] for c in lex.calls if c["sessionId"] == "s1"]
+    assert session_turns == ["hello", "happy"]
+
+
+def test_batch_reports_item_errors(client, lex, api_module, monkeypatch):
+    async def flaky(message, session_id=None):
+        if message == "boom":
+            raise RuntimeError("exploded")
+        return {"response": message, "source": "lex"}
+
+    monkeypatch.setattr(api_module, "answer", flaky)
+    items = [{"message": "a"}, {"message": "boom"}, {"message": "b"}]
+    results = client.post("/chat/batch", json={"items": items}).json()["results"]
+    assert results == [
+        {"response": "a", "source": "lex"},
+        {"error": "exploded"},
+        {"response": "b", "source": "lex"},
+    ]
+
+
+def test_batch_rejects_empty_payload(client):
+    assert client.post("/chat/batch", json={"items": []}).status_code == 422
+
+
+def test_batch_size_fits_the_deadline(client, api_module):
+    # One wave of Lex deadlines, plus the fallback margin, inside the default 10 s timeout
+    assert api_module.BATCH_MAX_ITEMS == api_module.BATCH_CONCURRENCY == 16
+    items = [{"message": f"hello {n}"} for n in range(api_module.BATCH_MAX_ITEMS + 1)]
+    response = client.post("/chat/batch", json={"items": items})
+    assert response.status_code == 422
+    assert "16" in response.text
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import time
+
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def first_and_last_chunk(app, path, payload):
+    """Drives the ASGI app directly and timestamps each body chunk."""
+    body = json.dumps(payload).encode()
+    sent = False
+    stamps = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            stamps.append(time.perf_counter())
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"content-type", b"application/json")],
+    }
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return stamps[0] - start, stamps[-1] - start
+
+
+def test_stream_emits_every_message_and_state(client, lex):
+    lex.content = "What is your current mood?"
+    body = client.post("/chat/stream", json={"message": "Recommend a song"}).text
+    events = parse_sse(body)
+    assert [name for name, _ in events] == ["start", "message", "state", "done"]
+    assert events[1][1]["content"] == "What is your current mood?"
+    assert events[2][1]["dialogAction"] == "ElicitSlot"
+
+
+def test_stream_local_answer_reports_slots(client, lex):
+    body = client.post("/chat/stream", json={"message": "I am in a calm mood. Suggest me some jazz music"}).text
+    state = dict(parse_sse(body))["state"]
+    assert state.pop("session_id")
+    assert state == {
+        "source": "local", "dialogAction": "Close", "intent": "GetMusicRecommendation",
+        "intentState": "Fulfilled", "slots": {"mood": "calm", "genre": "jazz"},
+    }
+    assert lex.calls == []
+
+
+def test_time_to_first_event_beats_buffered_endpoint(api_module, lex, monkeypatch):
+    original = lex.recognize_text
+
+    def slow(**kwargs):
+        time.sleep(0.2)
+        return original(**kwargs)
+
+    monkeypatch.setattr(lex, "recognize_text", slow)
+    payload = {"message": "Recommend a song"}
+    stream_first, stream_last = asyncio.run(first_and_last_chunk(api_module.app, "/chat/stream", payload))
+    buffered_first, _ = asyncio.run(first_and_last_chunk(api_module.app, "/chat/", payload))
+    assert stream_first < 0.1 <= buffered_first
+    assert stream_last >= 0.2
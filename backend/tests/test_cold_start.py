@@ -0,0 +1,32 @@
+from profile_cold_start import main, profile, summarize_imports
+
+
+def test_health_does_not_load_boto3_or_numpy():
+    summary, packages = profile("lambda_api")
+    assert summary["loaded"] == {"boto3": False, "botocore": False, "numpy": False}
+    assert summary["first_request"] is not None
+    assert "fastapi" in dict(packages)
+
+
+def test_summarize_imports_groups_by_package():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        100 |     numpy.core\n"
+        "import time:        50 |        150 |   numpy\n"
+        "import time:        20 |         20 | json\n"
+    )
+    assert summarize_imports(stderr) == [("numpy", 150), ("json", 20)]
+
+
+def test_budget_gate(capsys):
+    assert main(["--lambda", "lambda_fulfillment", "--budget-ms", "0.001"]) == 1
+    assert "OVER budget" in capsys.readouterr().out
+
+
+def test_warmup_ping_skips_lex(api_module, lex, fulfillment, capsys):
+    assert api_module.handler({"warmup": True}, None) == {"warmed": True}
+    assert fulfillment.handler({"warmup": True}, None) == {"warmed": True}
+    assert api_module.local_matcher is not None
+    assert lex.calls == []
+    # Pings are not reported as requests
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+
+from recommender.build_catalog import read_records
+from recommender.catalog import DEFAULT_CATALOG_PATH
+from recommender.ingest import InvertedIndex, main, normalized
+
+TRACKS = [
+    {"id": 5, "title": "A", "artist": "X", "moods": ["Happy "], "genres": ["pop"]},
+    {"id": 2, "title": "B", "artist": "Y", "moods": ["happy", "calm"], "genres": ["Jazz"]},
+    {"id": 9, "title": "C", "artist": "Z", "moods": ["sad"], "genres": ["pop"]},
+]
+
+
+def assert_same(index, other):
+    for field in ("moods", "genres"):
+        assert index.postings[field].keys() == other.postings[field].keys()
+        for tag, ids in index.postings[field].items():
+            np.testing.assert_array_equal(ids, other.postings[field][tag])
+
+
+def test_build_normalizes_and_sorts():
+    index, count = InvertedIndex.build(normalized(TRACKS))
+    assert count == 3
+    np.testing.assert_array_equal(index.tracks("moods", "HAPPY"), [2, 5])
+    assert index.tracks("genres", "jazz").dtype == np.int64
+    np.testing.assert_array_equal(index.query("happy", "pop"), [5])
+    assert len(index.query("metal")) == 0
+
+
+def test_bundled_catalog():
+    index, count = InvertedIndex.build(normalized(read_records(DEFAULT_CATALOG_PATH)))
+    assert count == 36
+    assert 2 in index.query("happy", "pop")
+
+
+def test_delta_matches_rebuild():
+    index, _ = InvertedIndex.build(normalized(TRACKS))
+    delta = [
+        {"id": 2, "title": "B", "artist": "Y", "moods": ["calm"], "genres": ["jazz"]},
+        {"id": 9, "deleted": True},
+        {"id": 11, "title": "D", "artist": "W", "moods": ["energetic"], "genres": ["rock"]},
+    ]
+    applied, touched = index.apply_delta(normalized(delta))
+    # happy loses 2, sad and pop lose 9, energetic and rock gain 11
+    assert (applied, touched) == (3, 5)
+
+    expected, _ = InvertedIndex.build(normalized([TRACKS[0], delta[0], delta[2]]))
+    assert_same(index, expected)
+    assert "sad" not in index.postings["moods"]
+
+
+def test_cli_applies_csv_delta(tmp_path):
+    source = tmp_path / "tracks.jsonl"
+    source.write_text("".join(json.dumps(t) + "\n" for t in TRACKS))
+    delta = tmp_path / "delta.csv"
+    delta.write_text("id,title,artist,moods,genres,deleted\n5,A,X,,,true\n7,E,V,happy|sad,pop,\n")
+    path = str(tmp_path / "index.npz")
+
+    main([path, str(source)])
+    main([path, "--delta", str(delta)])
+    index = InvertedIndex.load(path)
+    np.testing.assert_array_equal(index.tracks("moods", "happy"), [2, 7])
+    np.testing.assert_array_equal(index.tracks("genres", "pop"), [7, 9])
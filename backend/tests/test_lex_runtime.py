@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import lex_runtime
+from lex_runtime import LexOverloaded, LexRunner
+
+
+def test_client_config_from_env(monkeypatch):
+    monkeypatch.setenv("LEX_MAX_CONNECTIONS", "8")
+    monkeypatch.setenv("LEX_READ_TIMEOUT", "1.5")
+    monkeypatch.setenv("LEX_RETRY_MODE", "standard")
+    config = lex_runtime.client_config()
+    assert config.max_pool_connections == 8
+    assert config.read_timeout == 1.5
+    assert config.retries == {"mode": "standard", "total_max_attempts": 3}
+    assert config.tcp_keepalive
+
+
+def test_concurrency_is_bounded():
+    runner = LexRunner(max_concurrency=3, max_queue=100, timeout=5)
+    active = peak = 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return "ok"
+
+    async def main():
+        return await asyncio.gather(*(runner.run(call) for _ in range(12)))
+
+    assert asyncio.run(main()) == ["ok"] * 12
+    assert peak == 3
+    assert runner.pending == 0
+
+
+def test_timeout_and_overload():
+    runner = LexRunner(max_concurrency=1, max_queue=1, timeout=0.05)
+    release = threading.Event()
+
+    async def main():
+        slow = asyncio.ensure_future(runner.run(release.wait))
+        queued = asyncio.ensure_future(runner.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(LexOverloaded):
+            await runner.run(release.wait)
+        with pytest.raises(asyncio.TimeoutError):
+            await slow
+        with pytest.raises(asyncio.TimeoutError):
+            await queued
+
+    asyncio.run(main())
+    release.set()
+
+
+def test_slow_lex_degrades_to_fallback(client, lex, api_module, monkeypatch):
+    monkeypatch.setattr(api_module, "lex_runner", LexRunner(max_concurrency=1, timeout=0.05))
+    original = lex.recognize_text
+
+    def slow(**kwargs):
+        time.sleep(0.3)
+        return original(**kwargs)
+
+    monkeypatch.setattr(lex, "recognize_text", slow)
+    body = client.post("/chat/", json={"message": "Recommend a song"}).json()
+    assert body["source"] == "fallback"
+    assert body["response"].startswith(api_module.FALLBACK_TEMPLATE.format(song=""))
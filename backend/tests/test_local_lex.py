@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from load_test import main as load_test_main
+from local_lex import LocalLex
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def lex():
+    return LocalLex(clock=Clock())
+
+
+def say(lex, text, session="s1"):
+    return lex.recognize_text(botId="B", botAliasId="A", localeId="en_US", sessionId=session, text=text)
+
+
+def contents(response):
+    return [m["content"] for m in response["messages"]]
+
+
+def test_full_dialog_runs_fulfillment(lex):
+    response = say(lex, "Recommend a song")
+    assert response["sessionState"]["dialogAction"] == {"type": "ElicitSlot", "slotToElicit": "mood"}
+    assert contents(response) == ["What is your current mood?"]
+
+    response = say(lex, "happy")
+    assert response["sessionState"]["dialogAction"]["type"] == "ConfirmIntent"
+    assert response["sessionState"]["intent"]["slots"]["mood"]["value"]["interpretedValue"] == "happy"
+
+    response = say(lex, "yes")
+    assert response["sessionState"]["intent"]["state"] == "Fulfilled"
+    assert contents(response) == [
+        'Based on your mood, I recommend: 🎵 "Happy" by Pharrell Williams',
+        "Do you need any more recommendations?",
+    ]
+
+
+def test_template_slots_skip_elicitation(lex):
+    response = say(lex, "I am in a sad mood. Suggest me some jazz music")
+    assert response["sessionState"]["dialogAction"]["type"] == "ConfirmIntent"
+    assert contents(say(lex, "no")) == ["Okay, let me know if you need anything else."]
+
+
+def test_builtins_and_fallback(lex):
+    say(lex, "Recommend a song")
+    assert say(lex, "cancel")["sessionState"]["intent"]["name"] == "CancelIntent"
+    # Session was reset, so free text reaches the fallback code hook
+    response = say(lex, "what's the weather")
+    assert response["sessionState"]["intent"]["name"] == "FallbackIntent"
+    assert contents(response)[0].startswith("Based on your mood")
+
+
+def test_idle_sessions_expire(lex):
+    say(lex, "Recommend a song")
+    lex.clock.now = 301
+    assert say(lex, "happy")["sessionState"]["intent"]["name"] == "FallbackIntent"
+
+
+def test_load_test_report(capsys):
+    assert load_test_main(["--requests", "200", "--warmup", "5", "--json", "--max-p99-ms", "1000"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["requests"] == 200 and report["failures"] == []
+    assert sum(report["sources"].values()) == 200
+    assert {"p50_ms", "p95_ms", "p99_ms", "throughput_rps", "rss_peak_mb"} <= set(report)
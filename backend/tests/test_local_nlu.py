@@ -0,0 +1,55 @@
+import pytest
+
+from local_nlu import LocalMatcher, load_bot_definition, normalize
+from recommender import load_catalog
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return LocalMatcher.from_bot_definition(load_catalog())
+
+
+@pytest.mark.parametrize("message, slots", [
+    ("I am in a happy mood", {"mood": "happy"}),
+    ("i'm", None),
+    ("I am feeling SAD, what do you suggest?", {"mood": "sad"}),
+    ("I am in a calm mood. Suggest me some jazz music", {"mood": "calm", "genre": "jazz"}),
+    ("Feeling energetic , what hip-hop music do you suggest?", {"mood": "energetic", "genre": "hip-hop"}),
+])
+def test_matches_templates(matcher, message, slots):
+    found = matcher.match(message)
+    assert (found.slots if found else None) == slots
+
+
+@pytest.mark.parametrize("message", [
+    "Recommend a song",                   # Lex has to elicit the mood
+    "I want to listen to jazz music",     # genre only, mood still missing
+    "I am in a grumpy mood",              # not a catalog mood
+    "I am in a happy mood. Suggest me some polka music",
+    "hello there",
+])
+def test_falls_back_to_lex(matcher, message):
+    assert matcher.match(message) is None
+
+
+def test_templates_come_from_bot_definition():
+    templates = load_bot_definition()["intents"]["GetMusicRecommendation"]["sample_utterances"]
+    assert "I am in a {mood} mood" in templates
+    assert normalize("Feeling {mood} , what?") == "feeling mood what"
+
+
+def test_local_path_skips_lex(client, lex):
+    body = client.post("/chat/", json={"message": "I am in a happy mood"}).json()
+    assert body.pop("session_id")
+    assert body == {
+        "response": 'Based on your mood, I recommend: 🎵 "Happy" by Pharrell Williams',
+        "source": "local",
+    }
+    assert lex.calls == []
+
+
+def test_other_messages_go_to_lex(client, lex):
+    body = client.post("/chat/", json={"message": "Recommend a song"}).json()
+    assert body.pop("session_id")
+    assert body == {"response": "What is your current mood?", "source": "lex"}
+    assert len(lex.calls) == 1
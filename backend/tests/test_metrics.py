@@ -0,0 +1,68 @@
+import io
+import json
+
+from conftest import lex_event
+from harness import api_gateway_event
+from metrics import Metrics
+
+
+def emf_lines(text):
+    return [json.loads(line) for line in text.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_invocation_emits_valid_emf():
+    stream = io.StringIO()
+    metrics = Metrics("test", stream=stream)
+    for _ in range(2):
+        with metrics.invocation(RequestId="r1"):
+            with metrics.stage("Lex"):
+                pass
+            with metrics.stage("Lex"):
+                pass
+            metrics.count("CacheHit")
+
+    first, second = emf_lines(stream.getvalue())
+    (directive,) = first["_aws"]["CloudWatchMetrics"]
+    assert directive["Dimensions"] == [["Service"]]
+    # Every declared metric has a value at the top level
+    assert all(metric["Name"] in first for metric in directive["Metrics"])
+    assert first["Service"] == "test" and first["RequestId"] == "r1"
+    assert len(first["LexMs"]) == 2 and first["HandlerMs"] >= 0
+    assert (first["ColdStart"], second["ColdStart"]) == (1, 0)
+    assert first["CacheHit"] == 1
+
+
+def test_disabled_metrics_print_nothing():
+    stream = io.StringIO()
+    metrics = Metrics("test", enabled=False, stream=stream)
+    with metrics.invocation():
+        with metrics.stage("Lex"):
+            metrics.count("CacheHit")
+    assert stream.getvalue() == ""
+
+
+def test_stage_outside_invocation_is_a_no_op():
+    stream = io.StringIO()
+    metrics = Metrics("test", stream=stream)
+    with metrics.stage("Lex"):
+        metrics.set_property("Source", "lex")
+    assert stream.getvalue() == ""
+
+
+def test_api_handler_reports_stages(api_module, lex, capsys):
+    api_module.handler(api_gateway_event("POST", "/chat/", {"message": "I am in a happy mood"}), None)
+    api_module.handler(api_gateway_event("POST", "/chat/", {"message": "hello"}), None)
+    local, remote = emf_lines(capsys.readouterr().out)
+
+    assert local["Service"] == "api" and local["Path"] == "/chat/"
+    assert local["SourceLocal"] == 1 and "LexMs" not in local
+    assert {"HandlerMs", "TurnMs", "LocalNLUMs", "SerializeMs"} <= local.keys()
+    assert remote["SourceLex"] == 1 and remote["LexMs"] <= remote["TurnMs"] <= remote["HandlerMs"]
+
+
+def test_fulfillment_handler_reports_ranking(fulfillment, capsys):
+    fulfillment.handler(lex_event(mood="sad"), None)
+    (line,) = emf_lines(capsys.readouterr().out)
+    assert line["Service"] == "fulfillment"
+    assert line["Intent"] == "GetMusicRecommendation"
+    assert "RankMs" in line
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+
+from conftest import lex_event
+from recommender import Recommender, load_catalog
+from recommender.mood_vectors import DEFAULT_LEXICON_PATH, MoodVectors, load_mood_vectors, open_vectors, write_vectors
+
+
+def test_every_lexicon_word_resolves_to_one_of_its_moods():
+    vectors = load_mood_vectors()
+    with open(DEFAULT_LEXICON_PATH, encoding="utf-8") as f:
+        lexicon = json.load(f)
+    for mood, words in lexicon.items():
+        for word in [mood, *words]:
+            assert vectors.resolve(word) in {m for m, ws in lexicon.items() if word in [m, *ws]}, word
+
+
+def test_unseen_words_resolve_through_subwords():
+    vectors = load_mood_vectors()
+    assert vectors.resolve("chillin") == "relaxed"
+    assert vectors.resolve("nervy") == "anxious"
+    assert vectors.resolve("Kinda DOWN") == "sad"
+    for word in ("banana", "the", "music", "xyzzy", ""):
+        assert vectors.resolve(word) is None, word
+
+
+def test_table_round_trip_is_zero_copy(tmp_path):
+    built = load_mood_vectors()
+    path = str(tmp_path / "mood_vectors.mvec")
+    write_vectors(built, path)
+    mapped = open_vectors(path)
+    assert mapped.term_q.dtype == np.int8 and not mapped.term_q.flags.owndata
+    assert mapped.nbytes == built.nbytes
+    for word in ("pumped", "chilling", "bummed out"):
+        np.testing.assert_array_equal(mapped.similarities(word), built.similarities(word))
+    assert load_mood_vectors(path).mapping is not None
+
+
+def test_resolutions_are_cached():
+    vectors = MoodVectors.from_lexicon({"happy": ["glad"], "sad": ["down"]})
+    vectors.resolve("glad")
+    vectors.resolve("glad")
+    assert vectors.resolve.cache_info().hits == 1
+
+
+def test_recommender_uses_resolved_moods():
+    catalog = load_catalog()
+    plain = Recommender(catalog)
+    semantic = Recommender(catalog, load_mood_vectors())
+    assert plain.recommend("pumped") != plain.recommend("energetic")
+    assert semantic.recommend("pumped") == semantic.recommend("energetic")
+
+
+def test_handler_understands_free_text_moods(fulfillment):
+    chill = fulfillment.handler(lex_event(mood="chill"), None)["messages"][0]["content"]
+    relaxed = fulfillment.handler(lex_event(mood="relaxed"), None)["messages"][0]["content"]
+    assert chill == relaxed
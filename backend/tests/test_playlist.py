@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from conftest import lex_event
+from recommender import Catalog, Recommender
+from recommender.playlist import (
+    LEX_MESSAGE_LIMIT, PLAYLIST_ATTRIBUTE, PLAYLIST_SIZE_ATTRIBUTE, LazyRanking, PlaylistPager,
+    decode_cursor, encode_cursor, requested_more,
+)
+
+
+def full_order(scores):
+    return np.lexsort((np.arange(len(scores)), -scores))
+
+
+def test_lazy_ranking_pages_match_a_full_sort():
+    # Coarse scores, so many ties straddle the page and chunk boundaries
+    scores = np.random.default_rng(3).integers(0, 20, 5000).astype(np.float32)
+    ranking = LazyRanking(scores)
+    pages = [ranking.rows(start, start + 30) for start in range(0, 3000, 30)]
+    assert np.array_equal(np.concatenate(pages), full_order(scores)[:3000])
+    # Sorted only as far as read, plus geometric slack
+    assert len(ranking.order) < 5000
+    assert np.array_equal(LazyRanking(scores).rows(4990, 5010), full_order(scores)[4990:])
+
+
+def test_cursor_round_trip_and_rejection():
+    cursor = encode_cursor("happy", None, 20, 10, 36)
+    assert decode_cursor(cursor, 36) == ("happy", None, 20, 10)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 37)
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor!", 36)
+    for bad in (
+        encode_cursor("happy", None, -1, 10, 36),
+        encode_cursor("happy", None, 36, 10, 36),
+        encode_cursor(5, None, 0, 5, 36),
+        encode_cursor("happy", ["pop"], 0, 5, 36),
+        encode_cursor("happy", None, True, 5, 36),
+    ):
+        with pytest.raises(ValueError):
+            decode_cursor(bad, 36)
+
+
+def test_requested_more():
+    assert requested_more("more") == 0
+    assert requested_more("Give me 10 more!") == 10
+    assert requested_more("next page please") == 0
+    assert requested_more("can I get some more songs") == 0
+    assert requested_more("I am in a happy mood") is None
+    for declined in ("no more", "stop, no more", "nothing more", "no more songs please", "don't give me more"):
+        assert requested_more(declined) is None
+    # A new query, not the next page of the old one
+    assert requested_more("more sad songs") is None
+    assert requested_more(None) is None
+
+
+def test_pages_are_contiguous_and_resume_across_pagers():
+    recommender = Recommender(Catalog.synthetic(2000, seed=4))
+    page = PlaylistPager(recommender).page("happy", "pop", 10)
+    assert page.offset == 0 and len(page.rows) == 10
+    # A cold container continues from the cursor alone
+    following = PlaylistPager(recommender).resume(page.cursor)
+    assert following.offset == 10
+    expected = full_order(recommender.scores("happy", "pop"))[:20]
+    assert np.concatenate([page.rows, following.rows]).tolist() == expected.tolist()
+
+
+def test_long_titles_shorten_the_page_to_fit_lex():
+    catalog = Catalog.synthetic(100, seed=5)
+    catalog.titles = ["x" * 200] * 100
+    pager = PlaylistPager(Recommender(catalog))
+    page = pager.page("happy", size=10)
+    assert len(page.message) <= LEX_MESSAGE_LIMIT
+    assert 0 < len(page.rows) < 10
+    assert pager.resume(page.cursor).offset == len(page.rows)
+
+
+def test_last_page_has_no_cursor():
+    pager = PlaylistPager(Recommender(Catalog.synthetic(12, seed=6)))
+    page = pager.page("happy", size=10)
+    assert pager.resume(page.cursor).cursor is None
+
+
+def test_fulfillment_pages_through_a_playlist(fulfillment):
+    event = lex_event("happy")
+    event["sessionState"]["sessionAttributes"] = {PLAYLIST_SIZE_ATTRIBUTE: "5"}
+    response = fulfillment.handler(event, None)
+    attributes = response["sessionState"]["sessionAttributes"]
+    lines = response["messages"][0]["content"].splitlines()
+    assert lines[1].startswith("1. 🎵") and lines[5].startswith("5. 🎵")
+
+    more = lex_event(intent="FallbackIntent")
+    more["inputTranscript"] = "give me 3 more"
+    more["sessionState"]["sessionAttributes"] = attributes
+    response = fulfillment.handler(more, None)
+    lines = response["messages"][0]["content"].splitlines()
+    assert [line.split(".")[0] for line in lines[1:-1]] == ["6", "7", "8"]
+    assert response["sessionState"]["sessionAttributes"][PLAYLIST_ATTRIBUTE] != attributes[PLAYLIST_ATTRIBUTE]
+
+
+def test_playlists_endpoint(client, api_module):
+    first = client.get("/playlists", params={"mood": "happy", "size": 4}).json()
+    assert [track["position"] for track in first["tracks"]] == [1, 2, 3, 4]
+    second = client.get("/playlists", params={"cursor": first["next_cursor"], "size": 4}).json()
+    assert [track["position"] for track in second["tracks"]] == [5, 6, 7, 8]
+    assert client.get("/playlists", params={"cursor": "junk"}).status_code == 422
+    assert client.get("/playlists").status_code == 422
+    size = len(api_module.get_recommender().catalog)
+    for bad in (encode_cursor(5, None, 0, 5, size), encode_cursor("happy", None, size, 5, size)):
+        assert client.get("/playlists", params={"cursor": bad}).status_code == 422
+
+
+def test_chat_continues_a_playlist_without_lex(client, lex):
+    first = client.post("/chat/", json={"message": "I am in a happy mood", "playlist_size": 3}).json()
+    assert first["source"] == "local"
+    assert first["response"].startswith("Here is your playlist:")
+    more = client.post("/chat/", json={"message": "more", "session_id": first["session_id"]}).json()
+    assert more["source"] == "local"
+    assert more["response"].splitlines()[1].startswith("4. ")
+    assert lex.calls == []
+
+
+def test_playlist_through_the_lex_dialog(client, local_lex):
+    session = {"session_id": "playlist-dialog", "playlist_size": 4}
+    client.post("/chat/", json={"message": "Recommend a song", **session})
+    client.post("/chat/", json={"message": "sad", **session})
+    reply = client.post("/chat/", json={"message": "yes", **session}).json()
+    assert reply["source"] == "lex"
+    assert reply["response"].splitlines()[4].startswith("4. ")
+    more = client.post("/chat/", json={"message": "2 more", "session_id": "playlist-dialog"}).json()
+    assert [line.split(".")[0] for line in more["response"].splitlines()[1:-1]] == ["5", "6"]
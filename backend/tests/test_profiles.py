@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+from conftest import lex_event
+from recommender import Catalog, ProfileStore, Recommender
+
+TRACKS = [
+    {"id": 1, "title": "Sunny Rock", "artist": "A", "moods": ["happy"], "genres": ["rock"], "popularity": 0.9},
+    {"id": 2, "title": "Sunny Jazz", "artist": "B", "moods": ["happy"], "genres": ["jazz"], "popularity": 0.5},
+    {"id": 3, "title": "Blue Jazz", "artist": "C", "moods": ["sad"], "genres": ["jazz"], "popularity": 1.0},
+]
+
+
+def test_update_is_a_moving_average():
+    store = ProfileStore(3, learning_rate=0.5)
+    assert store.get("u1") is None
+    store.update("u1", [1.0, 0.0, 0.0])
+    store.update("u1", [0.0, 1.0, 0.0])
+    np.testing.assert_allclose(store.get("u1"), [0.25, 0.5, 0.0])
+    store.update("u1", [0.0, 1.0, 0.0], weight=-1.0)
+    np.testing.assert_allclose(store.get("u1"), [0.125, -0.25, 0.0])
+
+
+def test_in_memory_store_grows():
+    store = ProfileStore(2, capacity=2)
+    for i in range(5):
+        store.update(f"u{i}", [i, 1.0])
+    assert len(store) == 5 and store.capacity >= 5
+    np.testing.assert_allclose(store.get("u3"), [0.6, 0.2])
+
+
+def test_bounded_store_evicts_least_recently_updated(tmp_path):
+    for path in (None, str(tmp_path / "profiles.prf")):
+        store = ProfileStore(2, path=path, capacity=2, max_users=8)
+        for i in range(8):
+            store.update(f"u{i}", [i, 1.0])
+        store.update("u0", [0.0, 1.0])
+        store.update("new", [5.0, 5.0])
+        # u1, the least recently updated, made room; nobody else moved
+        assert len(store) == 8 and store.capacity == 8 and store.evicted == 1
+        assert "u1" not in store and "u0" in store
+        np.testing.assert_allclose(store.get("u7"), [1.4, 0.2])
+        np.testing.assert_allclose(store.get("new"), [1.0, 1.0])
+        store.close()
+    reopened = ProfileStore(2, path=path)
+    assert "u1" not in reopened and len(reopened) == 8
+    np.testing.assert_allclose(reopened.get("u7"), [1.4, 0.2], rtol=1e-6)
+
+
+def test_history_breaks_ties_but_not_mood():
+    recommender = Recommender(Catalog.from_records(TRACKS))
+    assert recommender.recommend("happy") == ['🎵 "Sunny Rock" by A']
+
+    profiles = ProfileStore(recommender.catalog.dimensions)
+    for _ in range(5):
+        profiles.update("jazz fan", recommender.preference_signal(2))
+    profile = profiles.get("jazz fan")
+    assert recommender.recommend("happy", profile=profile) == ['🎵 "Sunny Jazz" by B']
+    assert recommender.recommend("sad", profile=profile) == ['🎵 "Blue Jazz" by C']
+
+
+def test_file_store_persists_and_grows(tmp_path):
+    path = str(tmp_path / "profiles.prf")
+    store = ProfileStore(4, path=path, capacity=2)
+    for i in range(3):
+        store.update(f"user-{i}", np.full(4, i, dtype=np.float32))
+    store.close()
+
+    reopened = ProfileStore(4, path=path)
+    assert len(reopened) == 3 and reopened.capacity == 4
+    np.testing.assert_allclose(reopened.get("user-2"), np.full(4, 0.4))
+    reopened.update("user-3", np.ones(4))
+    reopened.close()
+    assert "user-3" in ProfileStore(4, path=path)
+
+
+def test_file_store_rejects_other_dimensions(tmp_path):
+    path = str(tmp_path / "profiles.prf")
+    ProfileStore(4, path=path).close()
+    with pytest.raises(ValueError):
+        ProfileStore(5, path=path)
+
+
+def test_handler_learns_per_user(fulfillment):
+    event = lex_event(mood="happy")
+    event["sessionState"]["sessionAttributes"] = {"userId": "test-handler-user"}
+    fulfillment.handler(event, None)
+    profile = fulfillment.profiles.get("test-handler-user")
+    happy = fulfillment.recommender.catalog.mood_index["happy"]
+    assert profile[happy] > 0
+
+
+def test_local_path_learns_per_session(client, api_module):
+    body = client.post("/chat/", json={"message": "I am in a happy mood"}).json()
+    assert body["source"] == "local"
+    profile = api_module.get_profile_store().get(body["session_id"])
+    happy = api_module.get_recommender().catalog.mood_index["happy"]
+    assert profile[happy] > 0
+
+
+def test_feedback_moves_the_profile(client, api_module):
+    catalog = api_module.get_recommender().catalog
+    track = int(catalog.track_ids[0])
+    liked = client.post("/feedback", json={"track_id": track, "liked": True, "user_id": "fan"}).json()
+    assert liked == {"user": "fan", "updated": True}
+    store = api_module.get_profile_store()
+    before = store.get("fan").copy()
+    client.post("/feedback", json={"track_id": track, "liked": False, "user_id": "fan"})
+    column = api_module.get_recommender().preference_signal(0).argmax()
+    assert store.get("fan")[column] < before[column]
+    assert client.post("/feedback", json={"track_id": -1, "liked": True, "user_id": "fan"}).status_code == 404
+    assert client.post("/feedback", json={"track_id": track, "liked": True}).status_code == 422
+
+
+def test_feedback_follows_the_user_into_new_sessions(client, lex):
+    def relaxed(user, session):
+        body = client.post("/chat/", json={"message": "I am in a relaxed mood", "session_id": session, "user_id": user})
+        assert body.json()["source"] == "local"
+        return body.json()["response"]
+
+    assert "Three Little Birds" in relaxed("someone-else", "session-0")
+    for _ in range(3):
+        client.post("/feedback", json={"track_id": 21, "liked": True, "user_id": "jazz-fan"})
+    # A brand new session for the same user gets the jazz the user liked
+    assert "Take Five" in relaxed("jazz-fan", "session-1")
+
+
+def test_user_id_reaches_lex(client, lex):
+    client.post("/chat/", json={"message": "hello", "user_id": "listener-7"})
+    assert lex.calls[-1]["sessionState"]["sessionAttributes"]["userId"] == "listener-7"
+    assert client.post("/chat/", json={"message": "hello", "user_id": "a\nb"}).status_code == 422
@@ -0,0 +1,46 @@
+from harness import api_gateway_event
+
+
+def test_recommendations_are_cacheable(client, api_module):
+    response = client.get("/recommendations", params={"mood": "Happy", "genre": "pop", "limit": 3})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["mood"], body["genre"], len(body["tracks"])) == ("happy", "pop", 3)
+    assert body["tracks"][0]["song"] == '🎵 "Happy" by Pharrell Williams'
+    assert response.headers["cache-control"] == api_module.RECOMMENDATIONS_CACHE_CONTROL
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    # Same normalized query, same strong ETag
+    again = client.get("/recommendations", params={"mood": "happy", "genre": "POP", "limit": 3})
+    assert again.headers["etag"] == etag
+    assert client.get("/recommendations", params={"mood": "sad"}).headers["etag"] != etag
+
+
+def test_matching_etag_answers_304(client):
+    etag = client.get("/recommendations", params={"mood": "calm"}).headers["etag"]
+    for if_none_match in (etag, f'"other", W/{etag}', "*"):
+        response = client.get("/recommendations", params={"mood": "calm"}, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304 and response.content == b""
+        assert response.headers["etag"] == etag
+    stale = client.get("/recommendations", params={"mood": "calm"}, headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+
+def test_invalid_queries_are_rejected(client):
+    assert client.get("/recommendations").status_code == 422
+    assert client.get("/recommendations", params={"mood": "grumpy"}).status_code == 422
+    assert client.get("/recommendations", params={"mood": "happy", "genre": "polka"}).status_code == 422
+    assert client.get("/recommendations", params={"mood": "happy", "limit": 0}).status_code == 422
+    assert client.get("/recommendations", params={"mood": "happy", "limit": 500}).status_code == 422
+
+
+def test_recommendations_through_the_lambda_handler(api_module, lex):
+    event = api_gateway_event("GET", "/recommendations", query={"mood": "sad", "limit": "2"})
+    response = api_module.handler(event, None)
+    assert response["statusCode"] == 200
+    headers = {name.lower(): value for name, value in response["headers"].items()}
+    event["headers"]["If-None-Match"] = headers["etag"]
+    event["multiValueHeaders"]["If-None-Match"] = [headers["etag"]]
+    assert api_module.handler(event, None)["statusCode"] == 304
+    assert lex.calls == []
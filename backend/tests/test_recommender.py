@@ -0,0 +1,40 @@
+import numpy as np
+
+from conftest import lex_event
+from recommender import Catalog, Recommender, load_catalog
+
+
+def test_bundled_catalog_keeps_original_suggestions():
+    recommender = Recommender(load_catalog())
+    assert recommender.recommend("happy") == ['🎵 "Happy" by Pharrell Williams']
+    assert recommender.recommend("Sad") == ['🎵 "Someone Like You" by Adele']
+    assert recommender.recommend("energetic") == ['🎵 "Eye of the Tiger" by Survivor']
+    assert recommender.recommend("unknown") == ['🎵 "Here Comes the Sun" by The Beatles']
+
+
+def test_genre_refines_mood():
+    recommender = Recommender(load_catalog())
+    assert recommender.recommend("energetic", "hip-hop") == ['🎵 "Lose Yourself" by Eminem']
+
+
+def test_top_k_matches_full_sort():
+    catalog = Catalog.synthetic(5000, seed=3)
+    recommender = Recommender(catalog)
+    mood, genre = catalog.moods[2], catalog.genres[1]
+    scores = recommender.scores(mood, genre)
+    top = recommender.top_k(mood, genre, k=10)
+    assert len(top) == 10
+    np.testing.assert_allclose(scores[top], np.sort(scores)[::-1][:10])
+
+
+def test_top_k_larger_than_catalog():
+    catalog = Catalog.synthetic(5, seed=1)
+    assert len(Recommender(catalog).top_k("happy", k=50)) == 5
+
+
+def test_handler_response(fulfillment):
+    response = fulfillment.handler(lex_event(mood="Happy"), None)
+    assert response["sessionState"]["intent"]["state"] == "Fulfilled"
+    assert response["messages"][0]["content"] == (
+        'Based on your mood, I recommend: 🎵 "Happy" by Pharrell Williams'
+    )
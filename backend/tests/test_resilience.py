@@ -0,0 +1,155 @@
+import json
+
+import pytest
+
+from harness import function_url_event
+from local_lex import FaultyLex
+from resilience import CLOSED, HALF_OPEN, OPEN, AdmissionControl, CircuitBreaker, is_lex_fault
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_on_failures_and_recovers():
+    clock = Clock()
+    breaker = CircuitBreaker(window=10, min_calls=4, failure_rate=0.5, open_seconds=5, probes=2, clock=clock)
+    for failed in (False, True, False, True):
+        assert breaker.allow()
+        breaker.record(failed, 0.01)
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now = 5
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert breaker.allow() and not breaker.allow()
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_breaker_opens_on_slow_calls_and_failed_probes_reopen_it():
+    clock = Clock()
+    breaker = CircuitBreaker(window=2, min_calls=2, slow_call_seconds=1, slow_call_rate=1.0,
+                             open_seconds=5, clock=clock)
+    breaker.record(False, 0.1)
+    breaker.record(False, 3)
+    assert breaker.state == CLOSED
+    # The fast call has left the window
+    breaker.record(False, 3)
+    assert breaker.state == OPEN
+
+    clock.now = 5
+    assert breaker.allow()
+    breaker.record(True, 0.01)
+    assert breaker.state == OPEN and breaker.stats()["times_opened"] == 2
+
+
+def test_cancelled_probe_is_handed_back():
+    clock = Clock()
+    breaker = CircuitBreaker(window=2, min_calls=1, open_seconds=5, probes=1, clock=clock)
+    breaker.allow()
+    breaker.record(True, 0.0)
+    clock.now = 5
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    breaker.cancel()
+    assert breaker.allow()
+    breaker.record(False, 0.0)
+    assert breaker.state == CLOSED
+
+
+def test_token_bucket_refills():
+    clock = Clock()
+    admission = AdmissionControl(rate=2, burst=3, max_clients=2, clock=clock)
+    assert [admission.admit("a") for _ in range(3)] == [0, 0, 0]
+    assert admission.admit("a") == 0.5
+    assert admission.admit("b") == 0
+    clock.now = 0.5
+    assert admission.admit("a") == 0
+    # Least recently seen bucket is dropped beyond max_clients
+    admission.admit("c")
+    assert admission.stats()["clients"] == 2
+    assert AdmissionControl(rate=0).admit("a") == 0
+
+
+def test_client_errors_do_not_count_as_lex_faults():
+    lex = FaultyLex(error_rate=1.0, error_code=("ValidationException", 400))
+    with pytest.raises(Exception) as raised:
+        lex.recognize_text(botId="b", botAliasId="a", localeId="en_US", sessionId="s1", text="hi")
+    assert not is_lex_fault(raised.value)
+    assert is_lex_fault(TimeoutError())
+
+
+def test_open_breaker_serves_local_recommendations(client, api_module, monkeypatch):
+    faulty = FaultyLex(error_rate=1.0)
+    monkeypatch.setattr(api_module, "lex_client", faulty)
+    monkeypatch.setattr(api_module, "lex_breaker", CircuitBreaker(min_calls=3, open_seconds=60))
+
+    sources = []
+    for _ in range(6):
+        body = client.post("/chat/", json={"message": "something sad with some rock please"}).json()
+        sources.append(body["source"])
+        assert body["response"].startswith("Based on your mood, I recommend:")
+    # Three calls reach Lex and fail, then the breaker skips it
+    assert sources == ["fallback"] * 6 and faulty.calls == 3
+    assert client.get("/resilience/stats").json()["breaker"]["state"] == OPEN
+
+    body = client.post("/chat/", json={"message": "hello"}).json()
+    assert body["response"].startswith(api_module.FALLBACK_TEMPLATE.format(song=""))
+
+
+def test_fallbacks_do_not_repeat_songs(client, api_module, monkeypatch):
+    monkeypatch.setattr(api_module, "lex_client", FaultyLex(error_rate=1.0))
+    first = client.post("/chat/", json={"message": "play something"}).json()
+    replies = {first["response"]}
+    for _ in range(3):
+        replies.add(client.post("/chat/", json={"message": "play something", "session_id": first["session_id"]}).json()["response"])
+    assert len(replies) == 4
+
+
+def test_full_local_queue_does_not_trip_the_breaker(client, api_module, monkeypatch):
+    from lex_runtime import LexOverloaded
+
+    async def overloaded(function, **kwargs):
+        raise LexOverloaded("queue full")
+
+    monkeypatch.setattr(api_module.lex_runner, "run", overloaded)
+    monkeypatch.setattr(api_module, "lex_breaker", CircuitBreaker(min_calls=3))
+    for _ in range(5):
+        body = client.post("/chat/", json={"message": "something sad please"}).json()
+        assert body["source"] == "fallback"
+    assert api_module.lex_breaker.stats()["state"] == CLOSED
+    assert api_module.lex_breaker.stats()["recent_calls"] == 0
+
+
+def test_breaker_probes_lex_after_recovery(client, api_module, monkeypatch):
+    clock = Clock()
+    faulty = FaultyLex(error_rate=1.0)
+    monkeypatch.setattr(api_module, "lex_client", faulty)
+    monkeypatch.setattr(api_module, "lex_breaker", CircuitBreaker(min_calls=2, open_seconds=10, probes=1, clock=clock))
+    for _ in range(3):
+        client.post("/chat/", json={"message": "hello"})
+    assert faulty.calls == 2
+
+    faulty.error_rate = 0.0
+    clock.now = 10
+    body = client.post("/chat/", json={"message": "hello"}).json()
+    assert body["source"] == "lex" and api_module.lex_breaker.state == CLOSED
+
+
+def test_admission_control_returns_429(client, api_module, lex, monkeypatch):
+    monkeypatch.setattr(api_module, "admission", AdmissionControl(rate=0.5, burst=2))
+    statuses = [client.post("/chat/", json={"message": "hello"}).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    throttled = client.post("/chat/", json={"message": "hello"})
+    assert throttled.headers["retry-after"] == "2"
+
+    event = function_url_event("POST", "/chat/", {"message": "hello"})
+    event["requestContext"]["http"]["sourceIp"] = "10.0.0.9"
+    statuses = [api_module.url_handler(event, None)["statusCode"] for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    assert json.loads(api_module.url_handler(event, None)["body"]) == {"detail": "Too many requests"}
+    assert len(lex.calls) == 4
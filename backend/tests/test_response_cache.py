@@ -0,0 +1,94 @@
+import json
+
+from response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_counters():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1      # "a" is now most recent
+    cache.put("c", 3)               # evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "entries": 2, "max_entries": 2, "ttl_seconds": 300.0,
+        "hits": 2, "misses": 1, "evictions": 1, "expirations": 0,
+    }
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResponseCache(ttl_seconds=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert len(cache) == 0 and cache.expirations == 1
+
+
+def test_key_normalizes_text():
+    assert ResponseCache.key("Recommend  a song!", "b", "a", "en_US") == \
+        ResponseCache.key("recommend a song", "b", "a", "en_US")
+
+
+def test_multi_turn_responses_are_not_cacheable():
+    assert not ResponseCache.cacheable({"sessionState": {"dialogAction": {"type": "ElicitSlot"}}})
+    assert not ResponseCache.cacheable({"sessionState": {"dialogAction": {"type": "ConfirmIntent"}}})
+    assert ResponseCache.cacheable({"sessionState": {"dialogAction": {"type": "Close"}}})
+
+
+def test_key_includes_the_session_state_sent():
+    state = {"sessionAttributes": {"seen": "b1:AQ==", "userId": "u"}, "dialogAction": {"type": "ConfirmIntent"}}
+    key = ResponseCache.key("yes", "b", "a", "en_US", state)
+    assert key == ResponseCache.key("Yes!", "b", "a", "en_US", json.loads(json.dumps(state)))
+    assert key != ResponseCache.key("yes", "b", "a", "en_US", {"sessionAttributes": {"userId": "u"}})
+    assert ResponseCache.key("yes", "b", "a", "en_US") == ResponseCache.key("yes", "b", "a", "en_US", {})
+    # Fulfilled recommendations carry attributes and are still replayed
+    assert ResponseCache.cacheable(
+        {"sessionState": {"dialogAction": {"type": "Close"}, "sessionAttributes": {"seen": "b1:AQ=="}}}
+    )
+
+
+def test_endpoint_serves_repeats_from_cache(client, lex):
+    lex.content, lex.dialog_action = "Okay, let me know if you need anything else.", "Close"
+    first = client.post("/chat/", json={"message": "No thanks"}).json()
+    second = client.post("/chat/", json={"message": "no thanks!"}).json()
+    assert (first["source"], second["source"]) == ("lex", "cache")
+    assert first["response"] == second["response"]
+    assert len(lex.calls) == 1
+    assert client.get("/cache/stats").json()["hits"] == 1
+
+
+def test_endpoint_skips_cache_for_elicitation(client, lex):
+    for _ in range(2):
+        assert client.post("/chat/", json={"message": "Recommend a song"}).json()["source"] == "lex"
+    assert len(lex.calls) == 2
+
+
+def test_repeated_mood_request_is_served_from_cache(client, local_lex, api_module, monkeypatch):
+    # Send the mood through Lex and the fulfillment Lambda rather than the local matcher
+    monkeypatch.setattr(api_module, "get_local_matcher", lambda: None)
+
+    def request_happy(session_id):
+        client.post("/chat/", json={"message": "I am in a happy mood", "session_id": session_id})
+        return client.post("/chat/", json={"message": "yes", "session_id": session_id}).json()
+
+    first, second = request_happy("cache-1"), request_happy("cache-2")
+    assert (first["source"], second["source"]) == ("lex", "cache")
+    assert first["response"] == second["response"]
+    # The replayed attributes (songs heard) become the new session's own
+    stored = api_module.session_store.get("cache-2")["sessionAttributes"]
+    assert stored == api_module.session_store.get("cache-1")["sessionAttributes"]
+    # A session that has heard that song sends other attributes, so Lex picks another
+    again = request_happy("cache-1")
+    assert again["source"] == "lex" and again["response"] != first["response"]
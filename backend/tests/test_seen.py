@@ -0,0 +1,76 @@
+import numpy as np
+
+from conftest import lex_event
+from recommender import Catalog, Recommender, load_catalog
+from recommender.seen import MAX_ENCODED_LENGTH, SEEN_ATTRIBUTE, SeenSet
+
+
+def test_bitset_round_trip():
+    seen = SeenSet(36)
+    for row in (0, 7, 35):
+        seen.add(row)
+    decoded = SeenSet.decode(seen.encode(), 36)
+    assert decoded.exact and len(decoded) == 3
+    assert decoded.contains(np.arange(36)).nonzero()[0].tolist() == [0, 7, 35]
+
+
+def test_bloom_filter_for_large_catalogs():
+    seen = SeenSet(1_000_000)
+    served = np.arange(0, 1_000_000, 20_000)
+    for row in served:
+        seen.add(row)
+    encoded = seen.encode()
+    assert encoded.startswith("f50:") and len(encoded) <= MAX_ENCODED_LENGTH
+    decoded = SeenSet.decode(encoded, 1_000_000)
+    assert decoded.contains(served).all()
+    assert decoded.contains(np.arange(1, 100_000, 7)).mean() < 0.001
+
+
+def test_bad_values_decode_empty():
+    assert len(SeenSet.decode(None, 36)) == 0
+    assert len(SeenSet.decode("b3:!!!", 36)) == 0
+    # Encoded for a catalog of another size
+    assert len(SeenSet.decode(SeenSet(100).encode(), 36)) == 0
+
+
+def test_pick_skips_seen_rows():
+    recommender = Recommender(Catalog.synthetic(500, seed=2))
+    ranked = recommender.top_k("happy", k=3)
+    seen = SeenSet(500)
+    picks = []
+    for _ in range(3):
+        picks.append(recommender.pick("happy", seen=seen))
+        seen.add(picks[-1])
+    assert picks == ranked.tolist()
+
+
+def test_pick_repeats_once_everything_was_served():
+    recommender = Recommender(load_catalog())
+    seen = SeenSet(len(recommender.catalog))
+    for row in range(len(recommender.catalog)):
+        seen.add(row)
+    assert recommender.pick("happy", seen=seen) == recommender.top_k("happy")[0]
+
+
+def test_handler_serves_alternatives(fulfillment):
+    attributes = {}
+    songs = []
+    for _ in range(3):
+        event = lex_event(mood="happy")
+        event["sessionState"]["sessionAttributes"] = attributes
+        response = fulfillment.handler(event, None)
+        attributes = response["sessionState"]["sessionAttributes"]
+        songs.append(response["messages"][0]["content"])
+    assert len(set(songs)) == 3
+    assert songs[0] == 'Based on your mood, I recommend: 🎵 "Happy" by Pharrell Williams'
+    assert SEEN_ATTRIBUTE in attributes
+
+
+def test_session_does_not_repeat_on_the_local_path(client):
+    first = client.post("/chat/", json={"message": "I am in a happy mood"}).json()
+    again = [
+        client.post("/chat/", json={"message": "I am in a happy mood", "session_id": first["session_id"]}).json()
+        for _ in range(2)
+    ]
+    assert {r["source"] for r in again} == {"local"}
+    assert len({first["response"], *(r["response"] for r in again)}) == 3
@@ -0,0 +1,91 @@
+import pytest
+
+from session_store import MemorySessionStore, SqliteSessionStore, create_session_store
+
+
+class Clock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    clock = Clock()
+    if request.param == "memory":
+        instance = MemorySessionStore(ttl_seconds=300, clock=clock)
+    else:
+        instance = SqliteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl_seconds=300, clock=clock)
+    instance.clock_ = clock
+    return instance
+
+
+def test_store_round_trip_and_idle_expiry(store):
+    store.put("s1", {"dialogAction": "ElicitSlot", "sessionAttributes": {"k": "v"}})
+    assert store.get("s1") == {"dialogAction": "ElicitSlot", "sessionAttributes": {"k": "v"}}
+    store.clock_.now += 299
+    store.put("s1", {"dialogAction": "ConfirmIntent"})   # activity refreshes the TTL
+    store.clock_.now += 299
+    assert store.get("s1") == {"dialogAction": "ConfirmIntent"}
+    store.clock_.now += 1
+    assert store.get("s1") is None
+
+
+def test_store_delete(store):
+    store.put("s1", {})
+    store.delete("s1")
+    assert store.get("s1") is None
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    SqliteSessionStore(path).put("s1", {"intent": "GetMusicRecommendation"})
+    assert SqliteSessionStore(path).get("s1") == {"intent": "GetMusicRecommendation"}
+
+
+def test_create_session_store_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("SESSION_STORE", "sqlite")
+    monkeypatch.setenv("SESSION_DB_PATH", str(tmp_path / "s.sqlite3"))
+    assert isinstance(create_session_store(300), SqliteSessionStore)
+    monkeypatch.setenv("SESSION_STORE", "redis")
+    with pytest.raises(ValueError):
+        create_session_store(300)
+
+
+def test_multi_turn_dialog_completes(client, local_lex):
+    first = client.post("/chat/", json={"message": "Recommend a song"}).json()
+    assert first["response"] == "What is your current mood?"
+    session = {"session_id": first["session_id"]}
+
+    # "sad" alone would not match a template; in-session it fills the slot
+    second = client.post("/chat/", json={"message": "sad", **session}).json()
+    assert second == {"response": "Shall i look for music based on your mood?", "source": "lex", **session}
+    third = client.post("/chat/", json={"message": "yes", **session}).json()
+    assert third["response"] == 'Based on your mood, I recommend: 🎵 "Someone Like You" by Adele'
+    assert local_lex.calls == 3
+
+
+def test_mid_dialog_turns_hand_lex_the_whole_dialog_state(client, api_module, local_lex):
+    # Session attributes in play, so every turn sends a sessionState, which replaces Lex's
+    first = client.post("/chat/", json={"message": "Recommend a song", "playlist_size": 2}).json()
+    session = {"session_id": first["session_id"]}
+    stored = api_module.session_store.get(first["session_id"])
+    assert stored["lexState"]["dialogAction"] == {"type": "ElicitSlot", "slotToElicit": "mood"}
+    assert client.post("/chat/", json={"message": "sad", **session}).json()["response"].startswith("Shall i")
+    third = client.post("/chat/", json={"message": "yes", **session}).json()
+    assert third["response"].startswith("Here is your playlist:")
+
+
+def test_mid_dialog_messages_skip_local_path(client, local_lex):
+    session_id = client.post("/chat/", json={"message": "Recommend a song"}).json()["session_id"]
+    body = client.post("/chat/", json={"message": "I am in a happy mood", "session_id": session_id}).json()
+    assert body["source"] == "lex"
+    # Once the dialog is closed the session may use the fast path again
+    client.post("/chat/", json={"message": "no", "session_id": session_id})
+    body = client.post("/chat/", json={"message": "I am in a happy mood", "session_id": session_id}).json()
+    assert body["source"] == "local"
+
+
+def test_rejects_malformed_session_id(client):
+    assert client.post("/chat/", json={"message": "hi", "session_id": "not valid!"}).status_code == 422
@@ -0,0 +1,137 @@
+import io
+import json
+import threading
+
+import pytest
+
+from harness import api_gateway_event
+from metrics import Metrics
+from transcripts import JsonlSink, TranscriptLogger
+
+
+class ListSink:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.written = threading.Event()
+
+    def write(self, records):
+        if self.fail:
+            raise IOError("bucket unavailable")
+        self.batches.append(records)
+        self.written.set()
+
+
+def quiet_logger(sink, **options):
+    """A logger whose background worker never starts, so flush() does all the writing."""
+    log = TranscriptLogger(sink, **options)
+    log._start = lambda: None
+    return log
+
+
+def test_flush_writes_in_batches():
+    sink = ListSink()
+    log = quiet_logger(sink, batch_size=4, max_queue=100)
+    for i in range(3):
+        log.log({"i": i})
+    assert log.flush() == 0
+    assert sink.batches == [[{"i": 0}, {"i": 1}, {"i": 2}]]
+    assert log.stats()["written"] == 3
+
+
+def test_full_queue_drops_oldest_or_newest():
+    oldest = quiet_logger(ListSink(), max_queue=2, batch_size=10)
+    newest = quiet_logger(ListSink(), max_queue=2, batch_size=10, drop_policy="newest")
+    for i in range(4):
+        oldest.log(i)
+        newest.log(i)
+    oldest.flush()
+    newest.flush()
+    assert oldest.sink.batches == [[2, 3]] and oldest.dropped == 2
+    assert newest.sink.batches == [[0, 1]] and newest.dropped == 2
+
+
+def test_worker_flushes_a_full_batch_in_background():
+    sink = ListSink()
+    log = TranscriptLogger(sink, batch_size=2, flush_seconds=3600)
+    log.log("a")
+    log.log("b")
+    assert sink.written.wait(5)
+    assert sink.batches[0] == ["a", "b"]
+
+
+def test_failing_sink_loses_batch_but_not_requests():
+    log = quiet_logger(ListSink(fail=True))
+    assert log.log({"i": 1})
+    assert log.flush() == 0
+    assert log.stats()["failed"] == 1
+
+
+def test_flush_respects_max_age():
+    log = quiet_logger(ListSink())
+    log.log("recent")
+    assert log.flush(max_age=60) == 1
+    assert log.flush(max_age=0) == 0
+
+
+def test_request_path_never_writes(api_module, client, monkeypatch):
+    sink = ListSink()
+    monkeypatch.setattr(api_module, "transcript_log", quiet_logger(sink))
+    event = api_gateway_event("POST", "/chat/", {"message": "I am in a happy mood"})
+    assert api_module.handler(event, None)["statusCode"] == 200
+    # Left for the worker, or the next invocation's wake()
+    assert sink.batches == [] and len(api_module.transcript_log) == 1
+
+
+def test_records_left_by_a_freeze_are_written_first(api_module, client, monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(api_module, "metrics", Metrics("api", stream=stream))
+    # flush_seconds=0: anything queued at the start of an invocation outlived a freeze
+    log = quiet_logger(ListSink(), max_queue=1, flush_seconds=0)
+    monkeypatch.setattr(api_module, "transcript_log", log)
+    log.log("dropped")
+    log.log("left by the freeze")
+    event = api_gateway_event("POST", "/chat/", {"message": "I am in a happy mood"})
+    assert api_module.handler(event, None)["statusCode"] == 200
+    # Written before this turn was, and the drop reported once
+    assert log.sink.batches == [["left by the freeze"]] and len(log) == 1
+    assert api_module.handler(event, None)["statusCode"] == 200
+    first, second = (json.loads(line) for line in stream.getvalue().splitlines())
+    assert first["TranscriptsDropped"] == 1 and second["TranscriptsDropped"] == 0
+    assert "TranscriptFlushMs" in first
+
+
+def test_jsonl_sink_appends(tmp_path):
+    path = tmp_path / "turns.jsonl"
+    sink = JsonlSink(str(path))
+    sink.write([{"a": 1}])
+    sink.write([{"a": 2}, {"a": 3}])
+    assert [json.loads(line)["a"] for line in path.read_text().splitlines()] == [1, 2, 3]
+
+
+def test_parquet_sink(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from transcripts import ParquetSink
+
+    sink = ParquetSink(str(tmp_path))
+    sink.write([{"utterance": "hi", "slots": {"mood": "happy"}}])
+    (path,) = tmp_path.glob("*.parquet")
+    assert pq.read_table(path).to_pylist() == [{"utterance": "hi", "slots": '{"mood": "happy"}'}]
+
+
+def test_chat_turn_is_logged(api_module, client, monkeypatch):
+    sink = ListSink()
+    monkeypatch.setattr(api_module, "transcript_log", quiet_logger(sink))
+    response = client.post("/chat/", json={"message": "I am in a happy mood"})
+    assert response.status_code == 200
+    api_module.transcript_log.flush()
+
+    (record,) = sink.batches[0]
+    assert record["utterance"] == "I am in a happy mood"
+    assert record["source"] == "local"
+    assert record["intent"] == "GetMusicRecommendation"
+    assert record["slots"] == {"mood": "happy"}
+    # "Happy" by Pharrell Williams
+    assert record["track_ids"] == [2]
+    assert record["session_id"] == response.json()["session_id"]
+    assert record["latency_ms"] >= 0
@@ -0,0 +1,48 @@
+import base64
+import json
+
+from harness import api_gateway_event, function_url_event
+
+
+def call(api_module, method, path, body=None, **event):
+    response = api_module.url_handler({**function_url_event(method, path, body), **event}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_chat_matches_the_fastapi_route(api_module, lex):
+    status, raw = call(api_module, "POST", "/chat/", {"message": "hello", "session_id": "s1"})
+    proxied = api_module.handler(api_gateway_event("POST", "/chat/", {"message": "hello", "session_id": "s1"}), None)
+    assert status == proxied["statusCode"] == 200
+    assert raw == json.loads(proxied["body"]) == {
+        "response": "What is your current mood?", "source": "lex", "session_id": "s1",
+    }
+    assert len(lex.calls) == 2
+
+
+def test_local_path_and_base64_bodies(api_module, lex):
+    body = base64.b64encode(json.dumps({"message": "I am in a happy mood"}).encode()).decode()
+    event = function_url_event("POST", "/chat")
+    event.update(body=body, isBase64Encoded=True)
+    result = json.loads(api_module.url_handler(event, None)["body"])
+    assert result["source"] == "local" and result["session_id"]
+    assert lex.calls == []
+
+
+def test_invalid_requests_are_rejected(api_module, lex):
+    assert call(api_module, "POST", "/chat/", body=None)[0] == 422
+    assert call(api_module, "POST", "/chat/", {"message": 3})[0] == 422
+    assert call(api_module, "POST", "/chat/", {"message": "hi", "session_id": "x"})[0] == 422
+    assert call(api_module, "POST", "/chat/", {"message": "hi", "playlist_size": 0})[0] == 422
+    assert call(api_module, "POST", "/chat/", {"message": "hi", "user_id": ""})[0] == 422
+    bad_json = function_url_event("POST", "/chat/")
+    bad_json["body"] = "{not json"
+    assert api_module.url_handler(bad_json, None)["statusCode"] == 400
+    assert lex.calls == []
+
+
+def test_other_routes_fall_through_to_fastapi(api_module, lex):
+    assert call(api_module, "GET", "/health") == (200, {"status": "healthy"})
+    status, stats = call(api_module, "GET", "/cache/stats")
+    assert status == 200 and "hits" in stats
+    status, batch = call(api_module, "POST", "/chat/batch", {"items": [{"message": "hello"}]})
+    assert status == 200 and len(batch["results"]) == 1
@@ -0,0 +1,82 @@
+"""Helpers for driving the Lambda handlers in-process, outside AWS."""
+import importlib.util
+import json
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(BACKEND_DIR, "lambda_api")
+
+for _path in (API_DIR, BACKEND_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+
+def load_lambda(name):
+    """
+    Imports backend/<name>/lambda_function.py under a unique module name
+
+    Both Lambdas name their entry module lambda_function, so they cannot
+    be imported side by side the normal way.
+    """
+    path = os.path.join(BACKEND_DIR, name, "lambda_function.py")
+    spec = importlib.util.spec_from_file_location(f"{name}_function", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_api(**environ):
+    """Imports the API Lambda with placeholder configuration for local runs."""
+    os.environ.setdefault("LEX_BOT_ID", "LOCALBOT")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-1")
+    # Keep the transcript pipeline running, but out of the console
+    os.environ.setdefault("TRANSCRIPT_SINK", "jsonl")
+    os.environ.setdefault("TRANSCRIPT_PATH", os.devnull)
+    # Load tests drive every request from one address
+    os.environ.setdefault("ADMISSION_RATE", "0")
+    os.environ.update(environ)
+    return load_lambda("lambda_api")
+
+
+def api_gateway_event(method, path, body=None, headers=None, query=None):
+    """Builds an API Gateway REST proxy event as LambdaRestApi(proxy=True) sends it."""
+    headers = {"Host": "localhost", "Content-Type": "application/json", **(headers or {})}
+    return {
+        "resource": "/{proxy+}",
+        "path": path,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {name: [value] for name, value in headers.items()},
+        "queryStringParameters": query,
+        "multiValueQueryStringParameters": {k: [v] for k, v in query.items()} if query else None,
+        "pathParameters": {"proxy": path.lstrip("/")},
+        "requestContext": {
+            "resourcePath": "/{proxy+}",
+            "httpMethod": method,
+            "path": f"/prod{path}",
+            "stage": "prod",
+            "identity": {"sourceIp": "127.0.0.1"},
+        },
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+def function_url_event(method, path, body=None, headers=None):
+    """Builds a Lambda Function URL (payload format 2.0) event."""
+    headers = {"host": "localhost", "content-type": "application/json", **(headers or {})}
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": "",
+        "headers": headers,
+        "requestContext": {
+            "http": {"method": method, "path": path, "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1"},
+            "routeKey": "$default",
+            "stage": "$default",
+        },
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
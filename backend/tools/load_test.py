@@ -0,0 +1,137 @@
+"""
+Offline load test for the API Lambda.
+
+The Mangum handler is driven in-process with synthetic API Gateway proxy
+events, one at a time as a Lambda container would see them, while Lex is
+replaced by LocalLex (which in turn calls the fulfillment handler). The run
+reports throughput, latency percentiles, memory and which path answered.
+Thresholds turn it into a CI gate: the script exits 1 when one is missed.
+
+Usage:
+    python tools/load_test.py [--requests 2000] [--lex-latency-ms 0] [--lex-error-rate 0]
+                              [--max-p99-ms 50] [--min-rps 200] [--json]
+"""
+import argparse
+from collections import Counter
+import contextlib
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import api_gateway_event, load_api  # noqa: E402
+from local_lex import FaultyLex, LocalLex  # noqa: E402
+from local_nlu import INTENT_NAME, load_bot_definition  # noqa: E402
+
+MOODS = ["happy", "sad", "energetic", "calm", "romantic", "grumpy", "sleepy"]
+GENRES = ["rock", "pop", "jazz", "hip-hop", "polka"]
+FREE_TEXT = ["hello", "thanks", "who are you", "cancel"]
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def message_mix(count, seed=0):
+    rng = random.Random(seed)
+    templates = load_bot_definition()["intents"][INTENT_NAME]["sample_utterances"]
+    for _ in range(count):
+        if rng.random() < 0.1:
+            yield rng.choice(FREE_TEXT)
+        else:
+            yield rng.choice(templates).format(mood=rng.choice(MOODS), genre=rng.choice(GENRES))
+
+
+def percentile(sorted_samples, q):
+    index = min(len(sorted_samples) - 1, int(round(q / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def run(requests, lex_latency, warmup, seed=0, lex_error_rate=0.0):
+    api = load_api()
+    api.lex_client = LocalLex(latency=lex_latency)
+    if lex_error_rate:
+        # Throttled calls open the breaker, which then answers locally
+        api.lex_client = FaultyLex(api.lex_client, error_rate=lex_error_rate, seed=seed)
+
+    events = [api_gateway_event("POST", "/chat/", {"message": m}) for m in message_mix(requests + warmup, seed)]
+    for event in events[:warmup]:
+        api.handler(event, None)
+
+    rss_start = rss_bytes()
+    sources = Counter()
+    samples = []
+    started = time.perf_counter()
+    for event in events[warmup:]:
+        start = time.perf_counter()
+        response = api.handler(event, None)
+        samples.append(time.perf_counter() - start)
+        if response["statusCode"] != 200:
+            sources["error"] += 1
+        else:
+            sources[json.loads(response["body"]).get("source", "unknown")] += 1
+    elapsed = time.perf_counter() - started
+
+    samples.sort()
+    return {
+        "requests": requests,
+        "throughput_rps": requests / elapsed,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": samples[-1] * 1000,
+        "rss_start_mb": rss_start / 2**20,
+        "rss_end_mb": rss_bytes() / 2**20,
+        # ru_maxrss is reported in KiB on Linux
+        "rss_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "lex_calls": api.lex_client.calls,
+        "sources": dict(sources),
+        "breaker": api.lex_breaker.stats(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--lex-latency-ms", type=float, default=0.0, help="simulated recognize_text round-trip")
+    parser.add_argument("--lex-error-rate", type=float, default=0.0, help="share of Lex calls that are throttled")
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    parser.add_argument("--min-rps", type=float, default=None)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    # Keep the handlers' request logging out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        report = run(args.requests, args.lex_latency_ms / 1000, args.warmup, lex_error_rate=args.lex_error_rate)
+    failures = []
+    if args.max_p99_ms is not None and report["p99_ms"] > args.max_p99_ms:
+        failures.append(f"p99 {report['p99_ms']:.2f} ms > {args.max_p99_ms} ms")
+    if args.min_rps is not None and report["throughput_rps"] < args.min_rps:
+        failures.append(f"throughput {report['throughput_rps']:.1f} rps < {args.min_rps} rps")
+    report["failures"] = failures
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"requests:    {report['requests']} ({report['lex_calls']} reached Lex)")
+        print(f"throughput:  {report['throughput_rps']:.1f} req/s")
+        print(f"latency ms:  p50 {report['p50_ms']:.2f}  p95 {report['p95_ms']:.2f}  "
+              f"p99 {report['p99_ms']:.2f}  max {report['max_ms']:.2f}")
+        print(f"RSS MB:      start {report['rss_start_mb']:.1f}  end {report['rss_end_mb']:.1f}  "
+              f"peak {report['rss_peak_mb']:.1f}")
+        print(f"served by:   {report['sources']}")
+        print(f"breaker:     {report['breaker']['state']}, opened {report['breaker']['times_opened']} times, "
+              f"{report['breaker']['rejected']} calls skipped")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
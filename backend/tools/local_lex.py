@@ -0,0 +1,245 @@
+"""
+In-process stand-in for the lexv2-runtime recognize_text call.
+
+LocalLex reads the same bot_definition.json that InfraChatbotStack deploys
+and plays the GetMusicRecommendation dialog the way the bot is configured:
+utterance matching, required-slot elicitation, intent confirmation, the
+fulfillment code hook (lambda_fulfillment.handler, called in-process), the
+closing response and the built-in Cancel/Stop/StartOver/Fallback intents.
+It is a behavioural model for tests and load tests, not a full NLU.
+"""
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from harness import load_lambda
+from local_nlu import INTENT_NAME, compile_templates, load_bot_definition, normalize
+
+BUILTIN_INTENTS = {
+    "CancelIntent": {"cancel", "never mind", "nevermind", "forget it"},
+    "StopIntent": {"stop", "quit", "exit"},
+    "StartOverIntent": {"start over", "restart", "begin again"},
+}
+AFFIRMATIVE = {"yes", "yeah", "yep", "sure", "ok", "okay", "please", "yes please", "y"}
+NEGATIVE = {"no", "nope", "nah", "no thanks", "n"}
+
+
+def plain_text(content):
+    return {"contentType": "PlainText", "content": content}
+
+
+class LocalLex:
+    """
+    Drop-in replacement for boto3.client("lexv2-runtime").
+
+    Arguments:-
+        fulfillment: callable(event, context) used as the fulfillment code
+                     hook; defaults to lambda_fulfillment.handler
+        definition: parsed bot_definition.json, loaded when omitted
+        latency: seconds to sleep per call, to emulate the network hop
+        clock: time source for idle-session expiry
+    """
+
+    def __init__(self, fulfillment=None, definition=None, latency=0.0, clock=time.monotonic):
+        definition = definition or load_bot_definition()
+        self.intent = definition["intents"][INTENT_NAME]
+        self.idle_ttl = definition["idle_session_ttl_in_seconds"]
+        self.pattern, self.slot_groups = compile_templates(self.intent["sample_utterances"])
+        self.fulfillment = fulfillment or load_lambda("lambda_fulfillment").handler
+        self.latency = latency
+        self.clock = clock
+        self.sessions = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _session(self, session_id):
+        now = self.clock()
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None or now - session["last_used"] > self.idle_ttl:
+                session = {"intent": None, "slots": {}, "awaiting": None, "attributes": {}}
+                self.sessions[session_id] = session
+            session["last_used"] = now
+            return session
+
+    def recognize_text(self, botId, botAliasId, localeId, sessionId, text, sessionState=None, **_):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        session = self._session(sessionId)
+        if sessionState is not None:
+            self._restore(session, sessionState)
+        utterance = normalize(text)
+        bot = {"id": botId, "aliasId": botAliasId, "localeId": localeId, "name": "MoodBasedMusicRecommender"}
+
+        for name, phrases in BUILTIN_INTENTS.items():
+            if utterance in phrases:
+                self._reset(session)
+                return self._response(sessionId, session, name, "Close", "Fulfilled", [])
+
+        awaiting = session["awaiting"]
+        if awaiting == "confirmation":
+            if utterance in AFFIRMATIVE:
+                return self._fulfill(sessionId, session, text, bot)
+            if utterance in NEGATIVE:
+                self._reset(session)
+                return self._response(sessionId, session, INTENT_NAME, "Close", "Failed",
+                                      [plain_text(self.intent["declination_response"])])
+            return self._confirm(sessionId, session)
+        if awaiting:
+            session["slots"][awaiting] = utterance
+            return self._next_step(sessionId, session)
+
+        found = self.pattern.match(utterance)
+        if not found:
+            # The bot's FallbackIntent has its fulfillment code hook enabled
+            return self._fulfill(sessionId, session, text, bot, intent_name="FallbackIntent")
+        groups = self.slot_groups[int(found.lastgroup[1:])]
+        session["intent"] = INTENT_NAME
+        session["slots"] = {slot: found.group(group) for slot, group in groups.items()}
+        return self._next_step(sessionId, session)
+
+    def _restore(self, session, state):
+        """
+        Like Lex V2, a sessionState passed by the caller replaces the session's:
+        attributes, and the dialog, which is dropped when it carries no intent.
+        """
+        session["attributes"] = dict(state.get("sessionAttributes") or {})
+        intent = state.get("intent") or {}
+        action = state.get("dialogAction") or {}
+        if intent.get("name") != INTENT_NAME or intent.get("state") != "InProgress":
+            self._reset(session)
+            return
+        session["intent"] = INTENT_NAME
+        session["slots"] = {
+            name: ((slot or {}).get("value") or {}).get("interpretedValue")
+            for name, slot in (intent.get("slots") or {}).items()
+            if slot
+        }
+        if action.get("type") == "ElicitSlot":
+            session["awaiting"] = action.get("slotToElicit")
+        elif action.get("type") == "ConfirmIntent":
+            session["awaiting"] = "confirmation"
+        else:
+            session["awaiting"] = None
+
+    def _reset(self, session):
+        session.update(intent=None, slots={}, awaiting=None)
+
+    def _next_step(self, session_id, session):
+        for slot in self.intent["slots"]:
+            if slot["required"] and not session["slots"].get(slot["name"]):
+                session["awaiting"] = slot["name"]
+                return self._response(session_id, session, INTENT_NAME, "ElicitSlot", "InProgress",
+                                      [plain_text(slot["prompt"])], slot_to_elicit=slot["name"])
+        return self._confirm(session_id, session)
+
+    def _confirm(self, session_id, session):
+        session["awaiting"] = "confirmation"
+        return self._response(session_id, session, INTENT_NAME, "ConfirmIntent", "InProgress",
+                              [plain_text(self.intent["confirmation_prompt"])])
+
+    def _fulfill(self, session_id, session, text, bot, intent_name=INTENT_NAME):
+        event = {
+            "messageVersion": "1.0",
+            "invocationSource": "FulfillmentCodeHook",
+            "inputMode": "Text",
+            "inputTranscript": text,
+            "sessionId": session_id,
+            "bot": bot,
+            "sessionState": {
+                "sessionAttributes": dict(session["attributes"]),
+                "intent": {
+                    "name": intent_name,
+                    "slots": self._lex_slots(session) if intent_name == INTENT_NAME else {},
+                    "state": "ReadyForFulfillment",
+                    "confirmationState": "Confirmed" if intent_name == INTENT_NAME else "None",
+                },
+            },
+        }
+        result = self.fulfillment(event, None)
+        state = result.get("sessionState", {})
+        if "sessionAttributes" in state:
+            # Like Lex, the code hook's attributes replace the session's
+            session["attributes"] = dict(state["sessionAttributes"] or {})
+        messages = list(result.get("messages", []))
+        if intent_name == INTENT_NAME:
+            messages.append(plain_text(self.intent["closing_response"]))
+        response = self._response(session_id, session, intent_name,
+                                  state.get("dialogAction", {}).get("type", "Close"),
+                                  state.get("intent", {}).get("state", "Fulfilled"), messages)
+        self._reset(session)
+        return response
+
+    def _lex_slots(self, session):
+        slots = {}
+        for slot in self.intent["slots"]:
+            value = session["slots"].get(slot["name"])
+            slots[slot["name"]] = (
+                {"value": {"originalValue": value, "interpretedValue": value, "resolvedValues": [value]}}
+                if value else None
+            )
+        return slots
+
+    def _response(self, session_id, session, intent_name, action, state, messages, slot_to_elicit=None):
+        dialog_action = {"type": action}
+        if slot_to_elicit:
+            dialog_action["slotToElicit"] = slot_to_elicit
+        intent = {
+            "name": intent_name,
+            "slots": self._lex_slots(session) if intent_name == INTENT_NAME else {},
+            "state": state,
+            "confirmationState": "None",
+        }
+        return {
+            "sessionId": session_id,
+            "messages": messages,
+            "sessionState": {
+                "dialogAction": dialog_action,
+                "intent": intent,
+                "sessionAttributes": dict(session["attributes"]),
+            },
+            "interpretations": [{"intent": intent, "nluConfidence": {"score": 1.0}}],
+        }
+
+
+class FaultyLex:
+    """
+    Wraps a Lex stand-in and injects failures and latency.
+
+    The attributes can be changed between calls to script an outage and its
+    recovery, e.g. set error_rate to 1.0 and later back to 0.0.
+
+    Arguments:-
+        lex: client to wrap, a LocalLex when omitted
+        error_rate: share of calls that raise `error_code`, 0-1
+        latency: seconds slept before every call
+        error_code: (code, HTTP status) of the injected botocore ClientError
+        seed: random seed, so failure sequences repeat
+    """
+
+    def __init__(self, lex=None, error_rate=0.0, latency=0.0,
+                 error_code=("ThrottlingException", 429), seed=0):
+        self.lex = lex or LocalLex()
+        self.error_rate = error_rate
+        self.latency = latency
+        self.error_code = error_code
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    def recognize_text(self, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.failures += 1
+            code, status = self.error_code
+            raise ClientError(
+                {"Error": {"Code": code, "Message": "Injected fault"}, "ResponseMetadata": {"HTTPStatusCode": status}},
+                "RecognizeText",
+            )
+        return self.lex.recognize_text(**kwargs)
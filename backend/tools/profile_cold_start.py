@@ -0,0 +1,105 @@
+"""
+Reports what a Lambda cold start spends on imports and fails over budget.
+
+The handler module is imported in a fresh interpreter with -X importtime.
+The per-module timings are summed per top-level package, and for the API a
+first GET /health is then sent through the Mangum handler. The script exits
+with status 1 when import + first request takes longer than --budget-ms, so
+it can gate CI.
+
+Usage:
+    python tools/profile_cold_start.py [--lambda lambda_api] [--budget-ms 800] [--top 15]
+"""
+import argparse
+from collections import defaultdict
+import json
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints a JSON summary on stdout
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import lambda_function
+imported = time.perf_counter() - start
+first_request = None
+if {health!r}:
+    event = {{
+        "resource": "/{{proxy+}}", "path": "/health", "httpMethod": "GET",
+        "headers": {{"Host": "localhost"}}, "multiValueHeaders": {{}},
+        "queryStringParameters": None, "multiValueQueryStringParameters": None,
+        "requestContext": {{"resourcePath": "/{{proxy+}}", "httpMethod": "GET", "stage": "prod"}},
+        "body": None, "isBase64Encoded": False,
+    }}
+    start = time.perf_counter()
+    response = lambda_function.handler(event, None)
+    first_request = time.perf_counter() - start
+    assert response["statusCode"] == 200, response
+print(json.dumps({{
+    "import": imported,
+    "first_request": first_request,
+    "loaded": {{name: name in sys.modules for name in ("boto3", "botocore", "numpy")}},
+}}))
+"""
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def summarize_imports(stderr):
+    """Sums -X importtime self-times (microseconds) per top-level package."""
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        found = IMPORT_LINE.match(line)
+        if found:
+            totals[found.group(4).split(".")[0]] += int(found.group(1))
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def profile(lambda_name):
+    directory = os.path.join(BACKEND_DIR, lambda_name)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([directory, BACKEND_DIR])
+    env.setdefault("LEX_BOT_ID", "PROFILEBOT")
+    env.setdefault("AWS_DEFAULT_REGION", "eu-west-1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(health=lambda_name == "lambda_api")],
+        cwd=directory, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), summarize_imports(result.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lambda", dest="lambda_name", default="lambda_api",
+                        choices=["lambda_api", "lambda_fulfillment"])
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail when startup takes longer")
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    args = parser.parse_args(argv)
+
+    summary, packages = profile(args.lambda_name)
+    print(f"{'package':<28} {'self ms':>8}")
+    for name, micros in packages[:args.top]:
+        print(f"{name:<28} {micros / 1000:>8.1f}")
+
+    startup_ms = summary["import"] * 1000
+    print(f"\nimport lambda_function:     {startup_ms:.1f} ms")
+    if summary["first_request"] is not None:
+        startup_ms += summary["first_request"] * 1000
+        print(f"first GET /health:          {summary['first_request'] * 1000:.1f} ms")
+    loaded = ", ".join(f"{name}={'yes' if flag else 'no'}" for name, flag in summary["loaded"].items())
+    print(f"loaded after startup:       {loaded}")
+
+    if args.budget_ms is not None:
+        verdict = "within" if startup_ms <= args.budget_ms else "OVER"
+        print(f"startup {startup_ms:.1f} ms is {verdict} budget of {args.budget_ms:.0f} ms")
+        if startup_ms > args.budget_ms:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,10 +4,18 @@ import os
 import aws_cdk as cdk
 
 from infra.infra_stack import InfraChatbotStack
+from infra.performance import PROFILES
 
 
 app = cdk.App()
+# Select with: cdk deploy -c performance_profile=low-latency
+profile_name = app.node.try_get_context("performance_profile") or "default"
+if profile_name not in PROFILES:
+    raise ValueError(f"Unknown performance_profile {profile_name!r}, expected one of {', '.join(PROFILES)}")
 InfraChatbotStack(app, "InfraChatbotStack",
+    performance=PROFILES[profile_name],
+    # Add a Function URL on the lean entry point with: cdk deploy -c function_url=true
+    function_url=str(app.node.try_get_context("function_url")).lower() == "true",
     # If you don't specify 'env', this stack will be environment-agnostic.
     # Account/Region-dependent features and context lookups will not work,
     # but a single synthesized template can be deployed anywhere.
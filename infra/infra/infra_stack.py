@@ -8,13 +8,31 @@ from aws_cdk import (
     aws_iam as iam,
     aws_lambda as lambda_,
     aws_apigateway as apigateway,
+    aws_events as events,
+    aws_events_targets as targets,
     aws_s3 as s3,
     aws_cloudfront as cloudfront,
     aws_cloudfront_origins as origins,
 )
 from constructs import Construct
+from typing import Optional
+import json
 import os
 
+from .performance import WARMUP_EVENT, FunctionProfile, PerformanceProfile, lex_environment
+
+# Query parameters of GET /recommendations; the edge cache is keyed on exactly these
+RECOMMENDATION_QUERY_PARAMS = ["mood", "genre", "limit"]
+
+# Local-only folders under backend/ that should not trigger a new asset hash
+BACKEND_ASSET_EXCLUDES = ["tests", "benchmarks", "tools", "**/__pycache__", ".pytest_cache"]
+
+# Intent, slot and prompt definitions, shared with the API's local NLU matcher
+# and the local Lex stand-in used by tests and load tests
+with open(os.path.join("..", "backend", "bot_definition.json")) as f:
+    BOT_DEFINITION = json.load(f)
+MUSIC_INTENT = BOT_DEFINITION["intents"]["GetMusicRecommendation"]
+
 
 def create_message(message):
     """
@@ -31,10 +49,57 @@ def create_message(message):
                 value=message)))
 
 
+def function_options(architecture: lambda_.Architecture, profile: FunctionProfile) -> dict:
+    """
+    Translates a FunctionProfile into lambda_.Function keyword arguments
+
+    Arguments:-
+        architecture: instruction set shared by both functions
+        profile: FunctionProfile - sizing of this function
+    Returns:-
+        dict of keyword arguments
+    """
+    return dict(
+        architecture=architecture,
+        memory_size=profile.memory_mb,
+        timeout=Duration.seconds(profile.timeout_seconds),
+        ephemeral_storage_size=Size.mebibytes(profile.ephemeral_storage_mb),
+        reserved_concurrent_executions=profile.reserved_concurrency,
+        snap_start=lambda_.SnapStartConf.ON_PUBLISHED_VERSIONS if profile.snap_start else None,
+    )
+
+
+def live_alias(scope: Construct, construct_id: str, function: lambda_.Function,
+               profile: FunctionProfile) -> lambda_.Alias:
+    """
+    Creates the "live" alias that callers invoke, on the latest published version
+
+    Provisioned concurrency and SnapStart both apply to published versions,
+    so every caller goes through this alias rather than $LATEST.
+    """
+    return lambda_.Alias(
+        scope, construct_id,
+        alias_name="live",
+        version=function.current_version,
+        provisioned_concurrent_executions=profile.provisioned_concurrency or None,
+    )
+
+
 class InfraChatbotStack(Stack):
 
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str,
+                 performance: Optional[PerformanceProfile] = None,
+                 function_url: bool = False, **kwargs) -> None:
+        """
+        Arguments:-
+            performance: PerformanceProfile - sizing of both Lambdas, the default profile when None
+            function_url: also expose the API through a Lambda Function URL, served by the
+                          lean url_handler entry point instead of API Gateway, Mangum and FastAPI
+        """
         super().__init__(scope, construct_id, **kwargs)
+        performance = performance or PerformanceProfile()
+        # Wheels (NumPy) must be installed for the target instruction set
+        platform = performance.architecture.docker_platform
 
         ## Create an IAM role for the Lex bot
         role_lex = iam.Role(
@@ -69,22 +134,36 @@ class InfraChatbotStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_12,
             handler="lambda_function.handler",
             code=lambda_.Code.from_asset(
-                path=os.path.join("..", "backend", "lambda_fulfillment"),
+                path=os.path.join("..", "backend"),
+                exclude=BACKEND_ASSET_EXCLUDES,
                 bundling={
                     "image": lambda_.Runtime.PYTHON_3_12.bundling_image,
+                    "platform": platform,
                     "command": [
                         "bash", "-c",
-                        "cp lambda_function.py /asset-output"
+                        "pip install -r lambda_fulfillment/requirements.txt -t /asset-output"
+                        " && cp lambda_fulfillment/lambda_function.py metrics.py /asset-output"
+                        " && cp -r recommender /asset-output"
+                        # Ship the catalog pre-built so cold starts mmap it instead of parsing JSON
+                        " && PYTHONPATH=/asset-output python -m recommender.build_catalog"
+                        " recommender/data/catalog.jsonl /asset-output/recommender/data/catalog.mcat"
+                        # and the quantized mood vector table, mapped instead of built from the lexicon
+                        " && PYTHONPATH=/asset-output python -m recommender.mood_vectors"
+                        " recommender/data/mood_lexicon.json /asset-output/recommender/data/mood_vectors.mvec"
                     ]
                 }
             ),
             role=role_lambda,
-            memory_size=1024,
-            ephemeral_storage_size=Size.mebibytes(1024)
+            environment={
+                "CATALOG_PATH": "/var/task/recommender/data/catalog.mcat",
+                "MOOD_VECTORS_PATH": "/var/task/recommender/data/mood_vectors.mvec"
+            },
+            **function_options(performance.architecture, performance.fulfillment)
         )
+        fulfillment_alias = live_alias(self, "LambdaFulfillmentLive", lambda_fulfillment, performance.fulfillment)
 
         # Grant Lex permission to invoke FulfillmentLambda
-        lambda_fulfillment.add_permission(
+        fulfillment_alias.add_permission(
             "LexInvokePermission",
             principal=iam.ServicePrincipal("lexv2.amazonaws.com"),
             source_arn=f"arn:aws:lex:{self.region}:{self.account}:bot-alias/*/*"
@@ -97,7 +176,7 @@ class InfraChatbotStack(Stack):
             self, "MusicRecommender",
             name="MoodBasedMusicRecommender",
             data_privacy={"ChildDirected": False},
-            idle_session_ttl_in_seconds=300,
+            idle_session_ttl_in_seconds=BOT_DEFINITION["idle_session_ttl_in_seconds"],
             role_arn=role_lex.role_arn,
             auto_build_bot_locales=True,
             test_bot_alias_settings=lex.CfnBot.TestBotAliasSettingsProperty(
@@ -108,7 +187,7 @@ class InfraChatbotStack(Stack):
                             enabled=True,
                             code_hook_specification=lex.CfnBot.CodeHookSpecificationProperty(
                                 lambda_code_hook=lex.CfnBot.LambdaCodeHookProperty(
-                                    lambda_arn=lambda_fulfillment.function_arn,
+                                    lambda_arn=fulfillment_alias.function_arn,
                                     code_hook_interface_version="1.0"
                                 )
                             )
@@ -127,70 +206,42 @@ class InfraChatbotStack(Stack):
                             name="GetMusicRecommendation",
                             sample_utterances=[
                                 lex.CfnBot.SampleUtteranceProperty(utterance=utterance)
-                                for utterance in [
-                                    "music",
-                                    "Suggest some music",
-                                    "Recommend a song",
-                                    "Recommend me some music",
-                                    "I want to listen to music",
-                                    "Suggest a song for me",
-                                    "What should I listen to?",
-                                    "I am in a {mood} mood",
-                                    "Play some music for my {mood} mood",
-                                    "I am feeling {mood} , what do you suggest?",
-                                    "Suggest a song based on my {mood} mood",
-                                    "I want to listen to {genre} music",
-                                    "Recommend a {genre} song for me",
-                                    "Suggest a {genre} song",
-                                    "I am in a {mood} mood. Suggest me some {genre} music",
-                                    "I am feeling {mood} and want to listen to {genre} music",
-                                    "Feeling {mood} , what {genre} music do you suggest?",
-                                ]
+                                for utterance in MUSIC_INTENT["sample_utterances"]
                             ],
 
                             # Define slots
                             slots=[
                                 lex.CfnBot.SlotProperty(
-                                    name="mood",
-                                    slot_type_name="AMAZON.AlphaNumeric",
+                                    name=slot["name"],
+                                    slot_type_name=slot["slot_type"],
                                     value_elicitation_setting=lex.CfnBot.SlotValueElicitationSettingProperty(
-                                        slot_constraint="Required",
+                                        slot_constraint="Required" if slot["required"] else "Optional",
                                         prompt_specification=lex.CfnBot.PromptSpecificationProperty(
-                                            max_retries=2,
-                                            message_groups_list=[create_message("What is your current mood?")]
-                                        )
-                                    )
-                                ),
-                                lex.CfnBot.SlotProperty(
-                                    name="genre",
-                                    slot_type_name="AMAZON.AlphaNumeric",
-                                    value_elicitation_setting=lex.CfnBot.SlotValueElicitationSettingProperty(
-                                        slot_constraint="Optional",
-                                        prompt_specification=lex.CfnBot.PromptSpecificationProperty(
-                                            max_retries=2,
-                                            message_groups_list=[create_message("What genre do you want to listen?")]
+                                            max_retries=slot["max_retries"],
+                                            message_groups_list=[create_message(slot["prompt"])]
                                         )
                                     )
                                 )
+                                for slot in MUSIC_INTENT["slots"]
                             ],
 
                             # Define slot priorities to enforce order
                             slot_priorities=[
                                 lex.CfnBot.SlotPriorityProperty(
                                     priority=index,
-                                    slot_name=slot_name
+                                    slot_name=slot["name"]
                                 )
-                                for index, slot_name in enumerate(["mood", "genre"])
+                                for index, slot in enumerate(MUSIC_INTENT["slots"])
                             ],
 
                             # Confirmation setting
                             intent_confirmation_setting=lex.CfnBot.IntentConfirmationSettingProperty(
                                 prompt_specification=lex.CfnBot.PromptSpecificationProperty(
                                     max_retries=2,
-                                    message_groups_list=[create_message("Shall i look for music based on your mood?")]
+                                    message_groups_list=[create_message(MUSIC_INTENT["confirmation_prompt"])]
                                 ),
                                 declination_response=lex.CfnBot.ResponseSpecificationProperty(
-                                    message_groups_list=[create_message("Okay, let me know if you need anything else.")],
+                                    message_groups_list=[create_message(MUSIC_INTENT["declination_response"])],
                                 )
                             ),
 
@@ -202,7 +253,7 @@ class InfraChatbotStack(Stack):
                             # Intent closing setting
                             intent_closing_setting=lex.CfnBot.IntentClosingSettingProperty(
                                 closing_response=lex.CfnBot.ResponseSpecificationProperty(
-                                    message_groups_list=[create_message("Do you need any more recommendations?")],
+                                    message_groups_list=[create_message(MUSIC_INTENT["closing_response"])],
                                 )
                             )
                         ),
@@ -243,30 +294,74 @@ class InfraChatbotStack(Stack):
             ]
         )
 
+        # S3 Bucket for conversation transcripts written by the api Lambda
+        transcripts_bucket = s3.Bucket(
+            self, "ChatTranscriptsBucket",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            # RemovalPolicy.DESTROY is for dev/testing, use RETAIN in production
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
         # Create api Lambda function
         lambda_api = lambda_.Function(
             self, "LambdaApi",
             runtime=lambda_.Runtime.PYTHON_3_12,
-            handler="lambda_function.handler",
+            # url_handler answers Function URL chat requests itself and hands
+            # everything else, API Gateway events included, to the FastAPI app
+            handler="lambda_function.url_handler" if function_url else "lambda_function.handler",
             code=lambda_.Code.from_asset(
-                path=os.path.join("..", "backend", "lambda_api"),
+                path=os.path.join("..", "backend"),
+                exclude=BACKEND_ASSET_EXCLUDES,
                 bundling={
                     "image": lambda_.Runtime.PYTHON_3_12.bundling_image,
+                    "platform": platform,
                     "command": [
                         "bash", "-c",
-                        "pip install -r requirements.txt -t /asset-output && cp lambda_function.py /asset-output"
+                        "pip install -r lambda_api/requirements.txt -t /asset-output"
+                        " && cp lambda_api/*.py bot_definition.json metrics.py /asset-output"
+                        " && cp -r recommender /asset-output"
+                        " && PYTHONPATH=/asset-output python -m recommender.build_catalog"
+                        " recommender/data/catalog.jsonl /asset-output/recommender/data/catalog.mcat"
+                        " && PYTHONPATH=/asset-output python -m recommender.mood_vectors"
+                        " recommender/data/mood_lexicon.json /asset-output/recommender/data/mood_vectors.mvec"
                     ]
                 }
             ),
             role=role_lex_lambda,
-            memory_size=1024,
-            ephemeral_storage_size=Size.mebibytes(1024),
+            **function_options(performance.architecture, performance.api),
             environment={
                 "LEX_BOT_ID": bot.attr_id,
                 "LEX_BOT_ALIAS_ID": "TSTALIASID",
-                "LEX_LOCALE_ID": "en_US"
+                "LEX_LOCALE_ID": "en_US",
+                "CATALOG_PATH": "/var/task/recommender/data/catalog.mcat",
+                "MOOD_VECTORS_PATH": "/var/task/recommender/data/mood_vectors.mvec",
+                "TRANSCRIPT_SINK": "s3",
+                "TRANSCRIPT_BUCKET": transcripts_bucket.bucket_name,
+                # Token bucket per caller address; API Gateway passes the client's own
+                "ADMISSION_RATE": "5",
+                "ADMISSION_BURST": "20",
+                # Sizes the largest batch to what can be answered in time
+                "API_TIMEOUT_SECONDS": str(performance.api.timeout_seconds),
+                # Initialized environments and snapshots should hold the clients a request needs
+                "EAGER_INIT": "true" if performance.api.eager_init else "false",
+                # Lex deadline, socket timeouts and retries, sized so the fallback
+                # still answers before the function times out
+                **lex_environment(performance.api.timeout_seconds)
             }
         )
+        transcripts_bucket.grant_put(lambda_api)
+        api_alias = live_alias(self, "LambdaApiLive", lambda_api, performance.api)
+
+        # Scheduled ping that keeps an environment of each function initialized
+        if performance.warmup_interval is not None:
+            warmup = events.Rule(
+                self, "WarmupSchedule",
+                schedule=events.Schedule.rate(performance.warmup_interval)
+            )
+            for alias in (fulfillment_alias, api_alias):
+                warmup.add_target(targets.LambdaFunction(
+                    alias, event=events.RuleTargetInput.from_object(WARMUP_EVENT)
+                ))
 
         # Grant Lex permission to invoke Lambda
         lambda_api.add_permission(
@@ -278,7 +373,7 @@ class InfraChatbotStack(Stack):
         # API Gateway REST API (Option 1A)
         api = apigateway.LambdaRestApi(
             self, "FastAPIGateway",
-            handler=lambda_api,
+            handler=api_alias,
             proxy=True,  # Proxy all requests to Lambda
             default_cors_preflight_options=apigateway.CorsOptions(
                 allow_origins=apigateway.Cors.ALL_ORIGINS,
@@ -287,6 +382,23 @@ class InfraChatbotStack(Stack):
             )
         )
 
+        if function_url:
+            url = api_alias.add_function_url(
+                auth_type=lambda_.FunctionUrlAuthType.NONE,
+                cors=lambda_.FunctionUrlCorsOptions(
+                    allowed_origins=["*"],
+                    allowed_methods=[lambda_.HttpMethod.ALL],
+                    allowed_headers=["*"]
+                )
+            )
+            CfnOutput(
+                self,
+                "FunctionUrl",
+                value=url.url,
+                export_name="FunctionUrl",
+                description="Lambda Function URL served by the lean url_handler entry point"
+            )
+
         # S3 Bucket for React App
         frontend_bucket = s3.Bucket(
             self, "ChatbotFrontendBucket",
@@ -309,6 +421,22 @@ class InfraChatbotStack(Stack):
         # Grant OAI read access to the S3 bucket
         frontend_bucket.grant_read(oai)
 
+        # Edge cache for GET /recommendations. The API's Cache-Control (s-maxage)
+        # sets the TTL within these bounds, and expired entries are revalidated
+        # with If-None-Match, which the API answers with a 304.
+        recommendations_cache_policy = cloudfront.CachePolicy(
+            self, "RecommendationsCachePolicy",
+            comment="GET /recommendations keyed on mood, genre and limit",
+            min_ttl=Duration.seconds(0),
+            default_ttl=Duration.minutes(5),
+            max_ttl=Duration.days(1),
+            query_string_behavior=cloudfront.CacheQueryStringBehavior.allow_list(*RECOMMENDATION_QUERY_PARAMS),
+            header_behavior=cloudfront.CacheHeaderBehavior.none(),
+            cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+            enable_accept_encoding_gzip=True,
+            enable_accept_encoding_brotli=True
+        )
+
         # CloudFront Distribution
         distribution = cloudfront.Distribution(
             self, "ChatbotCloudFrontDistribution",
@@ -316,6 +444,16 @@ class InfraChatbotStack(Stack):
                 origin=origins.S3Origin(frontend_bucket, origin_access_identity=oai),
                 viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS
             ),
+            additional_behaviors={
+                # Popular mood lookups are answered at the edge without invoking the API Lambda
+                "/recommendations": cloudfront.BehaviorOptions(
+                    origin=origins.RestApiOrigin(api),
+                    viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                    allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD_OPTIONS,
+                    cache_policy=recommendations_cache_policy,
+                    compress=True
+                )
+            },
             default_root_object="index.html",
             error_responses=[
                 cloudfront.ErrorResponse(
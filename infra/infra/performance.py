@@ -0,0 +1,124 @@
+"""Performance profiles for the chatbot Lambdas."""
+from dataclasses import dataclass, field
+from typing import Optional
+
+from aws_cdk import Duration, aws_lambda as lambda_
+
+# Payload of the scheduled warm-up ping. Both handlers answer it without Lex.
+WARMUP_EVENT = {"warmup": True}
+
+# API Gateway gives up on a REST API integration after 29 seconds
+API_GATEWAY_TIMEOUT_SECONDS = 29
+# Time the API keeps after the Lex deadline to answer with its local fallback
+FALLBACK_MARGIN_SECONDS = 2
+# Lex client socket timeouts: connecting, and the shortest useful wait for a reply
+LEX_CONNECT_TIMEOUT_SECONDS = 1
+LEX_MIN_READ_SECONDS = 3
+LEX_MAX_ATTEMPTS = 3
+
+
+def lex_environment(timeout_seconds: int) -> dict:
+    """
+    Lex client deadlines that fit inside the API function's timeout
+
+    The overall Lex deadline leaves FALLBACK_MARGIN_SECONDS for the local
+    fallback, and as many attempts as fit inside it, each given at least
+    LEX_MIN_READ_SECONDS to read a reply.
+
+    Arguments:-
+        timeout_seconds: timeout of the API Lambda
+    Returns:-
+        dict of environment variables read by lambda_api/lex_runtime.py
+    """
+    deadline = timeout_seconds - FALLBACK_MARGIN_SECONDS
+    attempt = LEX_CONNECT_TIMEOUT_SECONDS + LEX_MIN_READ_SECONDS
+    attempts = min(LEX_MAX_ATTEMPTS, deadline // attempt)
+    if attempts < 1:
+        raise ValueError(f"The API timeout must be at least {FALLBACK_MARGIN_SECONDS + attempt} seconds")
+    return {
+        "LEX_TIMEOUT_SECONDS": str(deadline),
+        "LEX_CONNECT_TIMEOUT": str(LEX_CONNECT_TIMEOUT_SECONDS),
+        "LEX_READ_TIMEOUT": f"{deadline / attempts - LEX_CONNECT_TIMEOUT_SECONDS:g}",
+        "LEX_MAX_ATTEMPTS": str(attempts),
+    }
+
+
+@dataclass(frozen=True)
+class FunctionProfile:
+    """
+    Sizing of one Lambda function.
+
+    Arguments:-
+        memory_mb: memory size, which also scales CPU
+        ephemeral_storage_mb: /tmp size
+        provisioned_concurrency: environments kept initialized on the live alias
+        reserved_concurrency: cap on concurrent executions, None for no cap
+        snap_start: restore published versions from an initialized snapshot
+        timeout_seconds: longest an invocation may run
+        eager_init: build the API's Lex client, catalog and matcher at import time
+                    (EAGER_INIT), so provisioned environments and SnapStart
+                    snapshots hold them; fulfillment always loads at import
+    """
+    memory_mb: int = 1024
+    ephemeral_storage_mb: int = 1024
+    provisioned_concurrency: int = 0
+    reserved_concurrency: Optional[int] = None
+    snap_start: bool = False
+    timeout_seconds: int = 10
+    eager_init: bool = False
+
+    def __post_init__(self):
+        if self.snap_start and self.provisioned_concurrency:
+            raise ValueError("SnapStart and provisioned concurrency cannot be combined")
+        if self.snap_start and self.ephemeral_storage_mb > 512:
+            raise ValueError("SnapStart supports at most 512 MB of ephemeral storage")
+        if self.reserved_concurrency is not None and self.provisioned_concurrency > self.reserved_concurrency:
+            raise ValueError("Provisioned concurrency cannot exceed reserved concurrency")
+
+
+@dataclass(frozen=True)
+class PerformanceProfile:
+    """
+    Deployment-wide performance settings for InfraChatbotStack.
+
+    Arguments:-
+        architecture: lambda_.Architecture.X86_64 or ARM_64 for both functions
+        api: sizing of the API Lambda
+        fulfillment: sizing of the fulfillment Lambda
+        warmup_interval: how often a scheduled rule pings both aliases, None to disable
+    """
+    architecture: lambda_.Architecture = lambda_.Architecture.X86_64
+    api: FunctionProfile = field(default_factory=FunctionProfile)
+    fulfillment: FunctionProfile = field(default_factory=FunctionProfile)
+    warmup_interval: Optional[Duration] = None
+
+    def __post_init__(self):
+        if self.api.timeout_seconds > API_GATEWAY_TIMEOUT_SECONDS:
+            raise ValueError(f"API Gateway stops waiting for the API after {API_GATEWAY_TIMEOUT_SECONDS} seconds")
+        # Fails early when the timeout leaves no room for a Lex call and the fallback
+        lex_environment(self.api.timeout_seconds)
+
+
+PROFILES = {
+    # What the stack has always deployed
+    "default": PerformanceProfile(),
+    # Graviton, right-sized memory and a warm-up ping instead of paid idle capacity
+    "cost": PerformanceProfile(
+        architecture=lambda_.Architecture.ARM_64,
+        api=FunctionProfile(memory_mb=512, ephemeral_storage_mb=512),
+        fulfillment=FunctionProfile(memory_mb=512, ephemeral_storage_mb=512),
+        warmup_interval=Duration.minutes(5),
+    ),
+    # Initialized environments always waiting, capped so a spike cannot starve the account
+    "low-latency": PerformanceProfile(
+        architecture=lambda_.Architecture.ARM_64,
+        api=FunctionProfile(memory_mb=1769, provisioned_concurrency=2, reserved_concurrency=50, eager_init=True),
+        fulfillment=FunctionProfile(memory_mb=1024, provisioned_concurrency=2, reserved_concurrency=50),
+    ),
+    # Snapshot-restored cold starts without provisioned concurrency charges
+    "snapstart": PerformanceProfile(
+        architecture=lambda_.Architecture.ARM_64,
+        api=FunctionProfile(memory_mb=1024, ephemeral_storage_mb=512, snap_start=True, eager_init=True),
+        fulfillment=FunctionProfile(memory_mb=1024, ephemeral_storage_mb=512, snap_start=True),
+    ),
+}
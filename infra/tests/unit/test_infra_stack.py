@@ -1,15 +1,168 @@
 import aws_cdk as core
 import aws_cdk.assertions as assertions
+from aws_cdk import Duration
+import pytest
 
-from infra.infra_stack import InfraStack
+from infra.infra_stack import InfraChatbotStack
+from infra.performance import FALLBACK_MARGIN_SECONDS, PROFILES, FunctionProfile, PerformanceProfile
 
-# example tests. To run these tests, uncomment this file along with the example
-# resource in infra/infra_stack.py
-def test_sqs_queue_created():
-    app = core.App()
-    stack = InfraStack(app, "infra")
-    template = assertions.Template.from_stack(stack)
+FUNCTIONS = {"api": "LambdaApi", "fulfillment": "LambdaFulfillment"}
 
-#     template.has_resource_properties("AWS::SQS::Queue", {
-#         "VisibilityTimeout": 300
-#     })
+
+def synth(performance=None, **options):
+    # Skip Docker bundling; the template is all these tests look at
+    app = core.App(context={"aws:cdk:bundling-stacks": []})
+    stack = InfraChatbotStack(app, "test", performance=performance, **options)
+    return assertions.Template.from_stack(stack)
+
+
+def resource(template, resource_type, logical_prefix):
+    matches = {
+        name: body for name, body in template.find_resources(resource_type).items()
+        if name.startswith(logical_prefix)
+    }
+    assert len(matches) == 1, matches.keys()
+    return next(iter(matches.values()))
+
+
+def test_default_profile_keeps_previous_sizing():
+    template = synth()
+    for logical_id in FUNCTIONS.values():
+        properties = resource(template, "AWS::Lambda::Function", logical_id)["Properties"]
+        assert properties["Architectures"] == ["x86_64"]
+        assert properties["MemorySize"] == 1024
+        assert properties["EphemeralStorage"] == {"Size": 1024}
+        assert "ReservedConcurrentExecutions" not in properties
+        assert "SnapStart" not in properties
+    template.resource_count_is("AWS::Lambda::Alias", 2)
+    template.resource_count_is("AWS::Events::Rule", 0)
+    # Admission control is off by default in the API and switched on for the deployment
+    api = resource(template, "AWS::Lambda::Function", "LambdaApi")["Properties"]["Environment"]["Variables"]
+    assert (api["ADMISSION_RATE"], api["ADMISSION_BURST"]) == ("5", "20")
+    for alias in template.find_resources("AWS::Lambda::Alias").values():
+        assert alias["Properties"]["Name"] == "live"
+        assert "ProvisionedConcurrencyConfig" not in alias["Properties"]
+
+
+@pytest.mark.parametrize("name", sorted(PROFILES))
+def test_profiles_synthesize(name):
+    profile = PROFILES[name]
+    template = synth(profile)
+    for attribute, logical_id in FUNCTIONS.items():
+        sizing = getattr(profile, attribute)
+        properties = resource(template, "AWS::Lambda::Function", logical_id)["Properties"]
+        assert properties["Architectures"] == [profile.architecture.name]
+        assert properties["MemorySize"] == sizing.memory_mb
+        assert properties["EphemeralStorage"] == {"Size": sizing.ephemeral_storage_mb}
+        assert properties.get("ReservedConcurrentExecutions") == sizing.reserved_concurrency
+        assert ("SnapStart" in properties) == sizing.snap_start
+
+        if attribute == "api":
+            assert properties["Environment"]["Variables"]["EAGER_INIT"] == ("true" if sizing.eager_init else "false")
+        alias = resource(template, "AWS::Lambda::Alias", f"{logical_id}Live")["Properties"]
+        provisioned = alias.get("ProvisionedConcurrencyConfig", {}).get("ProvisionedConcurrentExecutions", 0)
+        assert provisioned == sizing.provisioned_concurrency
+    template.resource_count_is("AWS::Events::Rule", 1 if profile.warmup_interval else 0)
+
+
+@pytest.mark.parametrize("name", sorted(PROFILES))
+def test_lex_retries_and_the_fallback_fit_the_api_timeout(name):
+    template = synth(PROFILES[name])
+    for logical_id in FUNCTIONS.values():
+        assert resource(template, "AWS::Lambda::Function", logical_id)["Properties"]["Timeout"] > 3
+    api = resource(template, "AWS::Lambda::Function", "LambdaApi")["Properties"]
+    lex = {
+        name: float(api["Environment"]["Variables"][name])
+        for name in ("LEX_TIMEOUT_SECONDS", "LEX_CONNECT_TIMEOUT", "LEX_READ_TIMEOUT", "LEX_MAX_ATTEMPTS")
+    }
+    # The fallback answers after the Lex deadline, before Lambda or API Gateway give up
+    assert lex["LEX_TIMEOUT_SECONDS"] + FALLBACK_MARGIN_SECONDS <= api["Timeout"] <= 29
+    assert api["Environment"]["Variables"]["API_TIMEOUT_SECONDS"] == str(api["Timeout"])
+    # Every attempt botocore makes ends before the overall deadline
+    attempts = lex["LEX_MAX_ATTEMPTS"]
+    assert attempts >= 1
+    assert attempts * (lex["LEX_CONNECT_TIMEOUT"] + lex["LEX_READ_TIMEOUT"]) <= lex["LEX_TIMEOUT_SECONDS"]
+
+
+def test_api_timeouts_are_validated():
+    with pytest.raises(ValueError):
+        PerformanceProfile(api=FunctionProfile(timeout_seconds=30))
+    with pytest.raises(ValueError):
+        PerformanceProfile(api=FunctionProfile(timeout_seconds=3))
+
+
+def test_warm_capacity_is_initialized_eagerly():
+    # Paying for provisioned environments or snapshots only helps if they hold the Lex client and catalog
+    for profile in PROFILES.values():
+        if profile.api.provisioned_concurrency or profile.api.snap_start:
+            assert profile.api.eager_init
+
+
+def test_warmup_rule_pings_both_aliases():
+    template = synth(PerformanceProfile(warmup_interval=Duration.minutes(5)))
+    (rule,) = template.find_resources("AWS::Events::Rule").values()
+    assert rule["Properties"]["ScheduleExpression"] == "rate(5 minutes)"
+    rule_targets = rule["Properties"]["Targets"]
+    assert len(rule_targets) == 2
+    assert all(target["Input"] == '{"warmup":true}' for target in rule_targets)
+    assert {target["Arn"]["Ref"] for target in rule_targets} == set(template.find_resources("AWS::Lambda::Alias"))
+
+
+def test_callers_use_the_live_alias():
+    template = synth(PROFILES["low-latency"])
+    aliases = template.find_resources("AWS::Lambda::Alias")
+    fulfillment_alias = next(name for name in aliases if name.startswith("LambdaFulfillmentLive"))
+    bot = resource(template, "AWS::Lex::Bot", "MusicRecommender")["Properties"]
+    hook = bot["TestBotAliasSettings"]["BotAliasLocaleSettings"][0]["BotAliasLocaleSetting"]
+    assert hook["CodeHookSpecification"]["LambdaCodeHook"]["LambdaArn"] == {"Ref": fulfillment_alias}
+    template.has_resource_properties("AWS::Lambda::Permission", {
+        "FunctionName": {"Ref": fulfillment_alias},
+        "Principal": "lexv2.amazonaws.com",
+    })
+
+
+def test_function_url_uses_the_lean_handler():
+    template = synth()
+    template.resource_count_is("AWS::Lambda::Url", 0)
+    assert resource(template, "AWS::Lambda::Function", "LambdaApi")["Properties"]["Handler"] == "lambda_function.handler"
+
+    template = synth(function_url=True)
+    api = resource(template, "AWS::Lambda::Function", "LambdaApi")["Properties"]
+    assert api["Handler"] == "lambda_function.url_handler"
+    (url,) = template.find_resources("AWS::Lambda::Url").values()
+    assert url["Properties"]["AuthType"] == "NONE"
+    # Served by the live alias, where provisioned concurrency applies
+    assert url["Properties"]["Qualifier"] == "live"
+    # API Gateway keeps working; url_handler hands its events to FastAPI
+    template.resource_count_is("AWS::ApiGateway::RestApi", 1)
+    template.has_output("FunctionUrl", {})
+
+
+def test_recommendations_are_cached_at_the_edge():
+    template = synth()
+    (distribution,) = template.find_resources("AWS::CloudFront::Distribution").values()
+    config = distribution["Properties"]["DistributionConfig"]
+    (behavior,) = config["CacheBehaviors"]
+    assert behavior["PathPattern"] == "/recommendations"
+    assert behavior["AllowedMethods"] == ["GET", "HEAD", "OPTIONS"]
+    # The REST API's stage is the origin path, so /recommendations reaches /prod/recommendations
+    api_origin = next(origin for origin in config["Origins"] if origin["Id"] == behavior["TargetOriginId"])
+    assert "FastAPIGateway" in str(api_origin["DomainName"]) and "OriginPath" in api_origin
+
+    policy = resource(template, "AWS::CloudFront::CachePolicy", "RecommendationsCachePolicy")["Properties"]
+    keys = policy["CachePolicyConfig"]["ParametersInCacheKeyAndForwardedToOrigin"]
+    assert keys["QueryStringsConfig"] == {
+        "QueryStringBehavior": "whitelist", "QueryStrings": ["mood", "genre", "limit"],
+    }
+    assert keys["HeadersConfig"] == {"HeaderBehavior": "none"}
+    assert keys["CookiesConfig"] == {"CookieBehavior": "none"}
+    assert behavior["CachePolicyId"] == {"Ref": next(iter(template.find_resources("AWS::CloudFront::CachePolicy")))}
+
+
+def test_invalid_profiles_are_rejected():
+    with pytest.raises(ValueError):
+        FunctionProfile(snap_start=True, provisioned_concurrency=1, ephemeral_storage_mb=512)
+    with pytest.raises(ValueError):
+        FunctionProfile(snap_start=True)
+    with pytest.raises(ValueError):
+        FunctionProfile(provisioned_concurrency=5, reserved_concurrency=2)